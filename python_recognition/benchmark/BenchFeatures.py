@@ -0,0 +1,123 @@
+"""
+Microbenchmark of the landmark feature extraction.
+
+Compares the original list-based implementation (calc_landmark_list + pre_process_landmark,
+formerly copy-pasted in Runner.py and LandmarksProcessor.py) with the vectorized NumPy
+implementation in common/LandmarkFeatures.py. Random synthetic hands are used, so neither
+MediaPipe nor a camera is needed.
+
+Usage: python BenchFeatures.py [--repeat N] [--batch N]
+"""
+
+import argparse
+import copy
+import itertools
+import os
+import sys
+import timeit
+from types import SimpleNamespace
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.LandmarkFeatures import NUM_LANDMARKS, landmarks_to_feature_batch, landmarks_to_features
+
+
+IMAGE_WIDTH = 640
+IMAGE_HEIGHT = 480
+RANDOM_SEED = 42
+
+
+def calc_landmark_list(image_width, image_height, landmarks):
+    """Original list-based pixel conversion (takes the image size instead of the image)."""
+    landmark_point = []
+
+    for _, landmark in enumerate(landmarks.landmark):
+        landmark_x = min(int(landmark.x * image_width), image_width - 1)
+        landmark_y = min(int(landmark.y * image_height), image_height - 1)
+
+        landmark_point.append([landmark_x, landmark_y])
+
+    return landmark_point
+
+
+def pre_process_landmark(landmark_list):
+    """Original list-based relative coordinates and normalization."""
+    temp_landmark_list = copy.deepcopy(landmark_list)
+
+    base_x, base_y = 0, 0
+    for index, landmark_point in enumerate(temp_landmark_list):
+        if index == 0:
+            base_x, base_y = landmark_point[0], landmark_point[1]
+
+        temp_landmark_list[index][0] = temp_landmark_list[index][0] - base_x
+        temp_landmark_list[index][1] = temp_landmark_list[index][1] - base_y
+
+    temp_landmark_list = list(
+        itertools.chain.from_iterable(temp_landmark_list))
+
+    max_value = max(list(map(abs, temp_landmark_list)))
+
+    def normalize_(n):
+        return n / max_value
+
+    temp_landmark_list = list(map(normalize_, temp_landmark_list))
+
+    return temp_landmark_list
+
+
+def random_hand(rng):
+    """Creates an object shaped like a MediaPipe LandmarkList with random coordinates."""
+    points = rng.uniform(-0.05, 1.05, size=(NUM_LANDMARKS, 3))
+    return SimpleNamespace(landmark=[SimpleNamespace(x=float(x), y=float(y), z=float(z)) for x, y, z in points])
+
+
+def check_parity(hands):
+    """Verifies that both implementations produce the same features (up to float32 rounding)."""
+    for hand in hands:
+        expected = np.asarray(pre_process_landmark(calc_landmark_list(IMAGE_WIDTH, IMAGE_HEIGHT, hand)),
+                              dtype=np.float32)
+        actual = landmarks_to_features(hand, IMAGE_WIDTH, IMAGE_HEIGHT)
+        if not np.array_equal(expected, actual):
+            raise AssertionError(f"Feature mismatch, max difference {np.abs(expected - actual).max()}")
+
+    expected = np.asarray([pre_process_landmark(calc_landmark_list(IMAGE_WIDTH, IMAGE_HEIGHT, hand))
+                           for hand in hands], dtype=np.float32)
+    if not np.array_equal(expected, landmarks_to_feature_batch(hands, IMAGE_WIDTH, IMAGE_HEIGHT)):
+        raise AssertionError("Batch feature mismatch")
+
+
+def report(name, seconds, calls):
+    print(f"{name:<28} {seconds / calls * 1e6:10.2f} us/hand")
+
+
+def run(repeat, batch_size):
+    rng = np.random.default_rng(RANDOM_SEED)
+    hands = [random_hand(rng) for _ in range(batch_size)]
+
+    check_parity(hands)
+    print(f"Parity OK on {batch_size} hands")
+
+    hand = hands[0]
+    out = np.empty(2 * NUM_LANDMARKS, dtype=np.float32)
+
+    legacy = timeit.timeit(
+        lambda: pre_process_landmark(calc_landmark_list(IMAGE_WIDTH, IMAGE_HEIGHT, hand)), number=repeat)
+    single = timeit.timeit(
+        lambda: landmarks_to_features(hand, IMAGE_WIDTH, IMAGE_HEIGHT, out=out), number=repeat)
+    batch = timeit.timeit(
+        lambda: landmarks_to_feature_batch(hands, IMAGE_WIDTH, IMAGE_HEIGHT), number=max(repeat // batch_size, 1))
+
+    report("list-based (single)", legacy, repeat)
+    report("numpy (single)", single, repeat)
+    report(f"numpy (batch of {batch_size})", batch, max(repeat // batch_size, 1) * batch_size)
+    print(f"Speed-up single: {legacy / single:.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=20000, help="Number of timed calls")
+    parser.add_argument('--batch', type=int, default=64, help="Number of hands in the batch benchmark")
+    args = parser.parse_args()
+
+    run(args.repeat, args.batch)
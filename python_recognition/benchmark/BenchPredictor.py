@@ -0,0 +1,93 @@
+"""
+Microbenchmark of XGBoost prediction latency.
+
+Compares the per-frame prediction of the original Runner (a new DMatrix from a Python list
+for every hand) with XGBoostPredictor (inplace prediction on a reused float32 buffer)
+and the flattened NumPy ensemble of FlatTrees.py, for single rows and for batches. Without --model a synthetic 28-class model of the same
+shape as TrainerXGB's (depth 6, 200 rounds) is trained on random data.
+
+Usage: python BenchPredictor.py [--model PATH] [--repeat N] [--batch N]
+"""
+
+import argparse
+import os
+import sys
+import timeit
+
+import numpy as np
+import xgboost as xgb
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.LandmarkFeatures import NUM_FEATURES
+from common.FlatTrees import FlatTrees, check_parity
+from common.Predictors import XGBoostPredictor
+
+
+RANDOM_SEED = 42
+NUM_CLASSES = 28
+
+
+def synthetic_model(rng, num_rounds=200):
+    """Trains a multi:softprob model on random data (only the model shape matters for latency)."""
+    features = rng.uniform(-1, 1, size=(NUM_CLASSES * 50, NUM_FEATURES)).astype(np.float32)
+    labels = np.repeat(np.arange(NUM_CLASSES), 50)
+    params = {'objective': 'multi:softprob', 'num_class': NUM_CLASSES, 'max_depth': 6, 'eta': 0.1,
+              'seed': RANDOM_SEED}
+    return xgb.train(params, xgb.DMatrix(features, label=labels), num_boost_round=num_rounds)
+
+
+def report(name, seconds, rows):
+    print(f"{name:<34} {seconds / rows * 1e6:10.2f} us/row")
+
+
+def run(model_path, repeat, batch_size):
+    rng = np.random.default_rng(RANDOM_SEED)
+
+    if model_path:
+        booster = xgb.Booster()
+        booster.load_model(model_path)
+    else:
+        booster = synthetic_model(rng)
+
+    batch = rng.uniform(-1, 1, size=(batch_size, NUM_FEATURES)).astype(np.float32)
+    row = batch[0]
+    row_list = row.tolist()
+
+    # The baseline uses the booster's default thread settings, like the original Runner
+    baseline = booster.copy()
+    predictor = XGBoostPredictor(booster)
+    trees = FlatTrees.from_booster(booster)
+
+    expected = baseline.predict(xgb.DMatrix([row_list]))
+    if not np.allclose(expected[0], predictor.predict_one(row), atol=1e-6):
+        raise AssertionError("Single row prediction mismatch")
+    if not np.allclose(baseline.predict(xgb.DMatrix(batch)), predictor.predict(batch), atol=1e-6):
+        raise AssertionError("Batch prediction mismatch")
+    check_parity(predictor.booster, trees, batch)
+    print("Parity OK")
+
+    legacy = timeit.timeit(lambda: baseline.predict(xgb.DMatrix([row_list])), number=repeat)
+    single = timeit.timeit(lambda: predictor.predict_one(row), number=repeat)
+    flat_single = timeit.timeit(lambda: trees.predict(batch[:1]), number=repeat)
+    batch_runs = max(repeat // batch_size, 1)
+    legacy_batch = timeit.timeit(lambda: baseline.predict(xgb.DMatrix(batch)), number=batch_runs)
+    fast_batch = timeit.timeit(lambda: predictor.predict(batch), number=batch_runs)
+    flat_batch = timeit.timeit(lambda: trees.predict(batch), number=batch_runs)
+
+    report("DMatrix per frame (original)", legacy, repeat)
+    report("XGBoostPredictor.predict_one", single, repeat)
+    report("FlatTrees.predict single row", flat_single, repeat)
+    report(f"DMatrix batch of {batch_size}", legacy_batch, batch_runs * batch_size)
+    report(f"XGBoostPredictor.predict {batch_size}", fast_batch, batch_runs * batch_size)
+    report(f"FlatTrees.predict {batch_size}", flat_batch, batch_runs * batch_size)
+    print(f"Speed-up single row: {legacy / single:.2f}x, flattened {legacy / flat_single:.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model', default=None, help="Saved XGBoost model, a synthetic one is trained if omitted")
+    parser.add_argument('--repeat', type=int, default=2000, help="Number of timed single-row calls")
+    parser.add_argument('--batch', type=int, default=64, help="Number of rows in the batch benchmark")
+    args = parser.parse_args()
+
+    run(args.model, args.repeat, args.batch)
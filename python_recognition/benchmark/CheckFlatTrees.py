@@ -0,0 +1,117 @@
+"""
+Parity check of the flattened XGBoost models (common/FlatTrees.py) against XGBoost.
+
+Tiny boosters are trained on random synthetic features, so neither a dataset nor a trained
+model is needed. The checks cover:
+- missing values: NaN features follow the default direction of every split,
+- early stopping: the booster keeps the trees trained after best_iteration and inplace_predict
+  (the 'xgb' backend) uses all of them, so the flattened model has to as well. A booster sliced
+  to best_iteration + 1 rounds is flattened like any other, and matches
+  inplace_predict(iteration_range=(0, best_iteration + 1)),
+- the save/load round trip through export_model and the 'xgb-flat' predictor backend,
+- single rows (predict_one) and an empty batch.
+
+Usage: python CheckFlatTrees.py [--rows N] [--rounds N]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+
+import numpy as np
+import xgboost as xgb
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.FlatTrees import FlatTrees, check_parity, export_model
+from common.LandmarkFeatures import NUM_FEATURES
+from common.Predictors import load_predictor
+
+
+NUM_CLASSES = 4
+NAN_FRACTION = 0.1  # Fraction of the features set to NaN
+EARLY_STOPPING_ROUNDS = 5
+RANDOM_SEED = 42
+
+
+def synthetic_data(rng, rows):
+    """Returns random features with NaNs (and some all-NaN rows) and labels depending on a few of the features."""
+    features = rng.normal(size=(rows, NUM_FEATURES)).astype(np.float32)
+    scores = features[:, :NUM_CLASSES] + rng.normal(scale=0.5, size=(rows, NUM_CLASSES))
+    labels = np.argmax(scores, axis=1)
+
+    features[rng.random(features.shape) < NAN_FRACTION] = np.nan
+    features[:rows // 50] = np.nan
+    return features, labels
+
+
+def train(features, labels, rounds, eval_features=None, eval_labels=None):
+    """Trains a small booster like TrainerXGB, with early stopping on the eval rows if given."""
+    params = {'objective': 'multi:softprob', 'num_class': NUM_CLASSES, 'max_depth': 4, 'eta': 0.3,
+              'seed': RANDOM_SEED, 'nthread': 1}
+    dtrain = xgb.DMatrix(features, label=labels)
+    if eval_features is None:
+        return xgb.train(params, dtrain, num_boost_round=rounds)
+
+    deval = xgb.DMatrix(eval_features, label=eval_labels)
+    return xgb.train(params, dtrain, num_boost_round=rounds, evals=[(deval, 'eval')],
+                     early_stopping_rounds=EARLY_STOPPING_ROUNDS, verbose_eval=False)
+
+
+def check_round_trip(booster, features):
+    """Exports the booster to a '.trees.npz' file and compares the reloaded model and the 'xgb-flat' backend."""
+    with tempfile.TemporaryDirectory() as folder:
+        model_path = os.path.join(folder, 'model.xgb')
+        booster.save_model(model_path)
+        flat_path, trees = export_model(model_path)
+
+        loaded = FlatTrees.load(flat_path)
+        if not np.array_equal(loaded.predict(features), trees.predict(features)):
+            raise AssertionError("The reloaded flattened model predicts differently")
+
+        predictor = load_predictor(flat_path)
+        expected = booster.inplace_predict(features)
+        batch = predictor.predict(features)
+        single = np.stack([predictor.predict_one(row) for row in features[:100]])
+        empty = predictor.predict(features[:0])
+
+    if np.abs(batch - expected).max() > 1e-5 or np.abs(single - expected[:100]).max() > 1e-5:
+        raise AssertionError("The 'xgb-flat' backend differs from the booster")
+    if empty.shape != (0, NUM_CLASSES):
+        raise AssertionError(f"An empty batch gives shape {empty.shape}, expected (0, {NUM_CLASSES})")
+
+
+def run(rows, rounds):
+    rng = np.random.default_rng(RANDOM_SEED)
+    features, labels = synthetic_data(rng, rows)
+    split = rows * 3 // 4
+    test_features = features[split:]
+
+    plain = train(features[:split], labels[:split], rounds)
+    difference = check_parity(plain, FlatTrees.from_booster(plain), test_features)
+    print(f"{rounds} rounds, {NAN_FRACTION:.0%} NaN features: max difference {difference:.2e}")
+
+    stopped = train(features[:split], labels[:split], rounds, test_features, labels[split:])
+    best_rounds = stopped.best_iteration + 1
+    difference = check_parity(stopped, FlatTrees.from_booster(stopped), test_features)
+    print(f"Early stopped at {best_rounds} of {stopped.num_boosted_rounds()} rounds, all trees: "
+          f"max difference {difference:.2e}")
+
+    best = FlatTrees.from_booster(stopped[:best_rounds])
+    expected = stopped.inplace_predict(test_features, iteration_range=(0, best_rounds))
+    difference = float(np.abs(best.predict(test_features) - expected).max())
+    if difference > 1e-5:
+        raise AssertionError(f"Booster sliced to the best iteration differs by {difference:.2e}")
+    print(f"Sliced to the best iteration ({best.num_trees} trees): max difference {difference:.2e}")
+
+    check_round_trip(stopped, test_features)
+    print("Save/load round trip, 'xgb-flat' backend, single rows and empty batch: OK")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=2000, help="Number of synthetic rows")
+    parser.add_argument('--rounds', type=int, default=50, help="Boosting rounds")
+    args = parser.parse_args()
+
+    run(args.rows, args.rounds)
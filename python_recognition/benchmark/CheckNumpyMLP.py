@@ -0,0 +1,80 @@
+"""
+Parity check of an exported NumPy MLP (common/NumpyMLP.py) against its Keras model.
+
+Loads an existing Keras model of TrainerNN and its '.mlp.npz' export (next to it by default) and
+compares their class probabilities on:
+- a batch: the held-out rows of the trainers' split if the dataset exists, random rows otherwise,
+  compared with model.predict (check_parity) and with the 'keras' predictor backend,
+- batch size 1: every row of the first --single rows through predict_one of both backends,
+- an empty batch: both backends have to return shape (0, num_classes).
+
+Needs TensorFlow like TrainerNN (keras version 2, tensorflow <= 2.15).
+
+Usage: python CheckNumpyMLP.py [--model model.keras] [--mlp model.mlp.npz] [--dataset dataset.json] [--single N]
+"""
+
+import argparse
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.NumpyMLP import PARITY_TOLERANCE, check_parity, mlp_model_path
+from common.Predictors import load_predictor
+from ModelSelection import DATASET_FILENAME, held_out_split
+
+
+MODEL_FILENAME = 'model.keras'
+RANDOM_ROWS = 1000  # Rows compared when the dataset does not exist
+SINGLE_ROWS = 100
+RANDOM_SEED = 42
+
+
+def compare(name, expected, predicted, tolerance=PARITY_TOLERANCE):
+    """Raises AssertionError if the probabilities differ in shape, above the tolerance or in the argmax."""
+    if expected.shape != predicted.shape:
+        raise AssertionError(f"{name}: NumPy MLP returns shape {predicted.shape}, the Keras model {expected.shape}")
+    difference = float(np.abs(expected - predicted).max()) if expected.size else 0.0
+    if difference > tolerance:
+        raise AssertionError(f"{name}: NumPy MLP differs from the Keras model by {difference:.2e} (> {tolerance:.0e})")
+    if not np.array_equal(np.argmax(expected, axis=1), np.argmax(predicted, axis=1)):
+        raise AssertionError(f"{name}: NumPy MLP predicts other classes than the Keras model")
+    print(f"{name:<14} {len(expected):6d} rows, max difference {difference:.2e}")
+
+
+def run(model_path=MODEL_FILENAME, mlp_path=None, dataset_file=DATASET_FILENAME, single_rows=SINGLE_ROWS):
+    mlp_path = mlp_path or mlp_model_path(model_path)
+    keras = load_predictor(model_path, 'keras')
+    mlp = load_predictor(mlp_path, 'nn-numpy')
+    if mlp.schema.name != keras.schema.name:
+        raise AssertionError(f"Feature schema {mlp.schema.name} of {mlp_path} differs from {keras.schema.name}")
+
+    try:
+        features, _, _ = held_out_split(dataset_file)
+    except FileNotFoundError:
+        print(f"{dataset_file} not found, comparing on {RANDOM_ROWS} random rows")
+        features = np.random.default_rng(RANDOM_SEED).normal(size=(RANDOM_ROWS, mlp.mlp.num_features))
+        features = features.astype(np.float32)
+
+    difference = check_parity(keras.model, mlp.mlp, features)
+    print(f"{'model.predict':<14} {len(features):6d} rows, max difference {difference:.2e}")
+    compare('batch', keras.predict(features), mlp.predict(features))
+
+    rows = features[:single_rows]
+    compare('batch size 1', np.stack([keras.predict_one(row) for row in rows]),
+            np.stack([mlp.predict_one(row) for row in rows]))
+    compare('empty batch', keras.predict(features[:0]), mlp.predict(features[:0]))
+    print(f"{mlp_path} matches {model_path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model', default=MODEL_FILENAME, help=f"Keras model of TrainerNN (default: {MODEL_FILENAME})")
+    parser.add_argument('--mlp', default=None, help="NumPy export of the model (default: next to the model)")
+    parser.add_argument('--dataset', default=DATASET_FILENAME, help=f"Dataset file (default: {DATASET_FILENAME})")
+    parser.add_argument('--single', type=int, default=SINGLE_ROWS,
+                        help=f"Rows compared one at a time (default: {SINGLE_ROWS})")
+    args = parser.parse_args()
+
+    run(args.model, args.mlp, args.dataset, args.single)
@@ -0,0 +1,235 @@
+"""
+Latency-aware model selection: accuracy against inference cost of the trained models.
+
+Every model (TrainerXGB, TrainerNN, TrainerDF artifacts, ONNX exports, ...) is loaded behind
+common.Predictors and measured on the held-out split shared by TrainerXGB, TrainerNN and TrainerDF
+(TRAIN_SIZE and RANDOM_SEED of the trainers), so no model is scored on its training rows.
+For each model the report gives:
+- accuracy on the held-out rows,
+- single-row predict latency (predict_one, the per-frame path of Runner), p50 and p95,
+- batched predict latency per row (--batch rows per call),
+- load time (including the import of the backend library) and memory footprint: the peak RSS
+  while loading and running the model, minus the RSS before loading it. The peak is reset after
+  the dataset is loaded, so the held-out rows are not counted (where the kernel cannot reset it,
+  the RSS sampled after each measured phase is used instead).
+
+Each model is measured in a fresh Python process, so the load time and memory of one backend do
+not hide those of another. The models on the Pareto front of accuracy and single-row latency
+(no other model is both more accurate and faster) are marked, with their accuracy per millisecond.
+
+Usage: python ModelSelection.py MODEL [MODEL ...] [--dataset dataset.json] [--repeat N] [--batch N]
+                                [--output report.json]
+    MODEL is a model path (backend guessed, see common.Predictors.guess_backend) or BACKEND:PATH.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.DatasetFormat import load_dataset, resolve_dataset
+from common.FeatureSchema import dataset_schema
+
+
+DATASET_FILENAME = 'dataset.json'
+RANDOM_SEED = 42  # Split of TrainerXGB, TrainerNN and TrainerDF
+TRAIN_SIZE = 0.75
+REPEAT = 1000  # Timed single-row calls
+BATCH_SIZE = 64
+ACCURACY_BATCH_SIZE = 4096  # Rows per predict call of the accuracy pass
+
+
+def parse_model(model):
+    """Splits 'BACKEND:PATH' into (path, backend), a plain path gets the 'auto' backend."""
+    from common.Predictors import BACKENDS
+
+    backend, separator, path = model.partition(':')
+    if separator and backend in BACKENDS:
+        return path, backend
+    return model, 'auto'
+
+
+def held_out_split(dataset_file):
+    """Returns the held-out (features, labels) of the trainers' split and the dataset schema."""
+    from sklearn.model_selection import train_test_split
+
+    dataset_file = resolve_dataset(dataset_file)
+    features, labels, _ = load_dataset(dataset_file)
+    schema = dataset_schema(dataset_file, features.shape[1])
+    _, features_test, _, labels_test = train_test_split(features, labels.astype('int32'), train_size=TRAIN_SIZE,
+                                                        random_state=RANDOM_SEED)
+    return np.ascontiguousarray(features_test, dtype=np.float32), labels_test - labels.min(), schema
+
+
+def rss_mb():
+    """Current resident set size of the process in MB (Linux)."""
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+
+
+def reset_peak_rss():
+    """Resets the peak RSS (VmHWM) of the process to the current RSS, returns False if the kernel does not allow it."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_mb():
+    """Peak resident set size of the process in MB since the last reset_peak_rss (Linux)."""
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmHWM:'):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def measure(model_path, backend, dataset_file, repeat=REPEAT, batch_size=BATCH_SIZE):
+    """
+        Measures one model in the current process, should run in a fresh one (see measure_isolated).
+
+        Returns:
+            A dict with the accuracy, latencies in ms, load time in seconds and memory in MB.
+    """
+    features, labels, schema = held_out_split(dataset_file)
+    # Only the model counts: the peak starts at the RSS with the held-out rows already loaded
+    rss_before = rss_mb()
+    peak_reset = reset_peak_rss()
+
+    start = time.perf_counter()
+    from common.Predictors import load_predictor
+    model = load_predictor(model_path, backend, num_features=schema.num_features)
+    load_seconds = time.perf_counter() - start
+    rss_loaded = rss_mb()
+
+    predictions = np.concatenate([np.argmax(model.predict(features[i:i + ACCURACY_BATCH_SIZE]), axis=1)
+                                  for i in range(0, len(features), ACCURACY_BATCH_SIZE)])
+    accuracy = float(np.mean(predictions == labels))
+    rss_samples = [rss_loaded, rss_mb()]
+
+    rows = features[np.arange(repeat) % len(features)]
+    model.predict_one(rows[0])  # Warm-up
+    latencies = np.empty(repeat)
+    for i, row in enumerate(rows):
+        row_start = time.perf_counter()
+        model.predict_one(row)
+        latencies[i] = time.perf_counter() - row_start
+    latencies *= 1000
+    rss_samples.append(rss_mb())
+
+    batch = features[np.arange(batch_size) % len(features)]
+    batch_runs = max(repeat // batch_size, 1)
+    model.predict(batch)
+    batch_start = time.perf_counter()
+    for _ in range(batch_runs):
+        model.predict(batch)
+    batch_ms = (time.perf_counter() - batch_start) * 1000 / batch_runs
+    rss_samples.append(rss_mb())
+
+    peak_mb = max(rss_samples + [peak_rss_mb()] if peak_reset else rss_samples)
+    return {
+        'model': model_path,
+        'backend': type(model).__name__,
+        'schema': model.schema.name,
+        'rows': len(features),
+        'accuracy': accuracy,
+        'single_p50_ms': float(np.percentile(latencies, 50)),
+        'single_p95_ms': float(np.percentile(latencies, 95)),
+        'batch_ms': batch_ms,
+        'batch_row_ms': batch_ms / batch_size,
+        'load_s': load_seconds,
+        'load_mb': rss_loaded - rss_before,
+        'memory_mb': peak_mb - rss_before,
+        'size_mb': model_size(model_path) / 2 ** 20,
+    }
+
+
+def model_size(path):
+    """Returns the size of a model file or directory in bytes."""
+    if not os.path.isdir(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(root, file)) for root, _, files in os.walk(path) for file in files)
+
+
+def measure_isolated(model, dataset_file, repeat=REPEAT, batch_size=BATCH_SIZE):
+    """Runs measure in a fresh Python process, returns its result or None if the model failed."""
+    command = [sys.executable, os.path.abspath(__file__), model, '--measure', '--dataset', dataset_file,
+               '--repeat', str(repeat), '--batch', str(batch_size)]
+    process = subprocess.run(command, capture_output=True, text=True)
+    if process.returncode != 0:
+        print(f"{model}: failed\n{process.stderr.strip().splitlines()[-1] if process.stderr.strip() else ''}")
+        return None
+    return json.loads(process.stdout.strip().splitlines()[-1])
+
+
+def pareto_front(results):
+    """Returns the indices of the results not dominated in accuracy (higher) and single-row latency (lower)."""
+    front = []
+    for i, result in enumerate(results):
+        dominated = any(other['accuracy'] >= result['accuracy'] and other['single_p50_ms'] <= result['single_p50_ms']
+                        and (other['accuracy'] > result['accuracy'] or other['single_p50_ms'] < result['single_p50_ms'])
+                        for other in results)
+        if not dominated:
+            front.append(i)
+    return front
+
+
+def report(results):
+    """Formats the results as a table sorted by accuracy, Pareto-optimal models are marked with '*'."""
+    front = set(pareto_front(results))
+    lines = [f"  {'model':<32} {'backend':<18} {'acc %':>6} {'p50 ms':>7} {'p95 ms':>7} {'batch ms/row':>12} "
+             f"{'load s':>7} {'mem MB':>7} {'size MB':>7} {'acc/ms':>8}"]
+    for i in sorted(range(len(results)), key=lambda i: -results[i]['accuracy']):
+        result = results[i]
+        lines.append(f"{'*' if i in front else ' '} {os.path.basename(result['model'].rstrip('/')):<32} "
+                     f"{result['backend']:<18} {result['accuracy'] * 100:6.2f} {result['single_p50_ms']:7.3f} "
+                     f"{result['single_p95_ms']:7.3f} {result['batch_row_ms']:12.4f} {result['load_s']:7.2f} "
+                     f"{result['memory_mb']:7.1f} {result['size_mb']:7.2f} "
+                     f"{result['accuracy'] * 100 / result['single_p50_ms']:8.1f}")
+    lines.append("* Pareto-optimal in accuracy and single-row latency, acc/ms = accuracy % per ms of p50 latency")
+    return '\n'.join(lines)
+
+
+def run(models, dataset_file=DATASET_FILENAME, repeat=REPEAT, batch_size=BATCH_SIZE, output_file=None):
+    results = []
+    for model in models:
+        result = measure_isolated(model, dataset_file, repeat, batch_size)
+        if result is not None:
+            print(f"{model}: accuracy {result['accuracy'] * 100:.2f}%, p50 {result['single_p50_ms']:.3f} ms")
+            results.append(result)
+
+    if not results:
+        print("No model could be measured")
+        return
+
+    print(f"Held-out rows: {results[0]['rows']}")
+    print(report(results))
+
+    if output_file:
+        front = pareto_front(results)
+        with open(output_file, 'w') as f:
+            json.dump([{**result, 'pareto': i in front} for i, result in enumerate(results)], f, indent=2)
+        print(f"Report written to {output_file}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('models', nargs='+', help="Model paths, optionally prefixed with BACKEND:")
+    parser.add_argument('--dataset', default=DATASET_FILENAME, help=f"Dataset file (default: {DATASET_FILENAME})")
+    parser.add_argument('--repeat', type=int, default=REPEAT, help=f"Number of timed single-row calls (default: {REPEAT})")
+    parser.add_argument('--batch', type=int, default=BATCH_SIZE, help=f"Rows per batched call (default: {BATCH_SIZE})")
+    parser.add_argument('--output', default=None, help="Optional JSON file for the report")
+    parser.add_argument('--measure', action='store_true', help=argparse.SUPPRESS)  # Child process of measure_isolated
+    args = parser.parse_args()
+
+    if args.measure:
+        print(json.dumps(measure(*parse_model(args.models[0]), args.dataset, args.repeat, args.batch)))
+    else:
+        run(args.models, args.dataset, args.repeat, args.batch, args.output)
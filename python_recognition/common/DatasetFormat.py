@@ -0,0 +1,289 @@
+"""
+Reading and writing of the processed landmark dataset.
+
+The binary format consists of three files sharing a base name:
+- '<name>.json': metadata header (format version, number of samples and features, label names and
+  optionally the feature schema, see FeatureSchema.py),
+- '<name>.features.npy': float32 matrix of shape (num_samples, num_features),
+- '<name>.labels.npy': uint8 vector of label indices into the label names.
+
+The .npy files are loaded memory-mapped, so the trainers read them without parsing or copying.
+DatasetWriter builds a dataset incrementally with bounded memory: rows are appended to raw
+'.part' files, which are converted to the .npy files once all rows are written.
+The legacy CSV format ('label,f1,...,f42' header, one sample per row) can still be written
+and read.
+"""
+
+import json
+import os
+
+import numpy as np
+
+
+FORMAT_VERSION = 1
+
+COPY_CHUNK_ROWS = 65536  # Rows copied at once when finalizing a DatasetWriter or exporting CSV
+
+
+def base_path(path):
+    """Strips a known dataset extension ('.json', '.csv', '.features.npy', '.labels.npy') from the path."""
+    for extension in ['.json', '.csv', '.features.npy', '.labels.npy']:
+        if path.endswith(extension):
+            return path[:-len(extension)]
+    return path
+
+
+def resolve_dataset(path):
+    """
+        Falls back to the legacy CSV dataset when the binary dataset does not exist.
+        The trainers used to read 'dataset.csv' by default, checkouts with only that file keep working.
+
+        Args:
+            path: Path to the dataset.
+
+        Returns:
+            The path, or the '<name>.csv' file next to it if only that one exists.
+    """
+    if path.endswith('.csv') or os.path.exists(base_path(path) + '.json'):
+        return path
+
+    csv_path = base_path(path) + '.csv'
+    if os.path.exists(csv_path):
+        print(f"{path} not found, using the legacy CSV dataset {csv_path} "
+              f"(LandmarksProcessor writes the faster binary format)")
+        return csv_path
+    return path
+
+
+def write_header(base, num_samples, num_features, label_names, feature_schema=None):
+    """Writes the '<base>.json' metadata header."""
+    metadata = {
+        'format_version': FORMAT_VERSION,
+        'num_samples': int(num_samples),
+        'num_features': int(num_features),
+        'labels': list(label_names),
+    }
+    if feature_schema is not None:
+        metadata['feature_schema'] = feature_schema
+    with open(base + '.json', 'w') as f:
+        json.dump(metadata, f, indent=2)
+
+
+def check_labels(label_names):
+    if len(label_names) > np.iinfo(np.uint8).max + 1:
+        raise ValueError("Too many labels for a uint8 label column")
+
+
+def load_header(path):
+    """
+        Reads the metadata header of a dataset.
+
+        Args:
+            path: Path to the dataset ('<name>.json', '<name>' or '<name>.csv').
+
+        Returns:
+            The header dict, or None for CSV files, which have none.
+    """
+    if path.endswith('.csv'):
+        return None
+    with open(base_path(path) + '.json') as f:
+        return json.load(f)
+
+
+def save_dataset(path, features, labels, label_names, feature_schema=None):
+    """
+        Writes a dataset in the binary format.
+
+        Args:
+            path: Path to the dataset, with or without the '.json' extension.
+            features: Array of shape (num_samples, num_features).
+            labels: Array of shape (num_samples,) with label indices.
+            label_names: List of label names, label index i refers to label_names[i].
+            feature_schema: Optional feature schema description (FeatureSchema.to_header()).
+    """
+    base = base_path(path)
+    features = np.asarray(features, dtype=np.float32).reshape(len(labels), -1)
+
+    check_labels(label_names)
+
+    np.save(base + '.features.npy', features)
+    np.save(base + '.labels.npy', np.asarray(labels, dtype=np.uint8))
+    write_header(base, features.shape[0], features.shape[1], label_names, feature_schema)
+
+
+def load_dataset(path, mmap=True):
+    """
+        Loads a dataset in the binary or the CSV format (chosen by the '.csv' extension).
+
+        Args:
+            path: Path to the dataset ('<name>.json', '<name>' or '<name>.csv').
+            mmap: If True, the binary arrays are memory-mapped read-only instead of read into memory.
+
+        Returns:
+            A tuple (features, labels, label_names). features is a float32 array of shape
+            (num_samples, num_features), labels an integer array of shape (num_samples,) and
+            label_names the list of label names, or None for CSV files, which do not store them.
+    """
+    if path.endswith('.csv'):
+        return load_csv(path) + (None,)
+
+    base = base_path(path)
+    metadata = load_header(path)
+
+    if metadata['format_version'] != FORMAT_VERSION:
+        raise ValueError(f"Unsupported dataset format version {metadata['format_version']}")
+
+    mmap_mode = 'r' if mmap else None
+    features = np.load(base + '.features.npy', mmap_mode=mmap_mode)
+    labels = np.load(base + '.labels.npy', mmap_mode=mmap_mode)
+
+    if features.shape != (metadata['num_samples'], metadata['num_features']) or labels.shape != (metadata['num_samples'],):
+        raise ValueError(f"Dataset arrays do not match the header {base + '.json'}")
+
+    return features, labels, metadata['labels']
+
+
+def load_csv(path):
+    """
+        Loads a dataset from the CSV format. The header row is optional.
+
+        Returns:
+            A tuple (features, labels) with float32 features and int32 labels.
+    """
+    with open(path) as f:
+        has_header = not f.readline()[:1].isdigit()
+
+    data = np.loadtxt(path, delimiter=',', dtype='float32', skiprows=int(has_header), ndmin=2)
+    return np.ascontiguousarray(data[:, 1:]), data[:, 0].astype('int32')
+
+
+def save_csv(path, features, labels):
+    """
+        Writes a dataset to the CSV format with a 'label,f1,...,fN' header.
+
+        Args:
+            path: Path to the CSV file.
+            features: Array of shape (num_samples, num_features).
+            labels: Array of shape (num_samples,) with label indices.
+    """
+    features = np.asarray(features, dtype=np.float32).reshape(len(labels), -1)
+    header = ','.join(['label'] + [f"f{i + 1}" for i in range(features.shape[1])])
+
+    with open(path, 'w') as f:
+        f.write(header + '\n')
+        # Converted in chunks, so memory-mapped datasets are not loaded whole
+        for start in range(0, len(labels), COPY_CHUNK_ROWS):
+            end = start + COPY_CHUNK_ROWS
+            # '%.9g' round-trips float32 exactly
+            rows = np.column_stack([np.asarray(labels[start:end], dtype=np.float64),
+                                    features[start:end].astype(np.float64)])
+            np.savetxt(f, rows, delimiter=',', fmt=['%d'] + ['%.9g'] * features.shape[1])
+
+
+def part_rows(path, num_features):
+    """
+        Returns the number of complete rows in the part files of a DatasetWriter.
+
+        Args:
+            path: Path to the dataset, with or without the '.json' extension.
+            num_features: Number of features of each row.
+
+        Returns:
+            The number of rows both part files hold, or None if a part file is missing.
+    """
+    base = base_path(path)
+    features_file, labels_file = base + '.features.part', base + '.labels.part'
+    if not os.path.exists(features_file) or not os.path.exists(labels_file):
+        return None
+    return min(os.path.getsize(features_file) // (num_features * 4), os.path.getsize(labels_file))
+
+
+class DatasetWriter:
+    """
+        Appends rows to a dataset in the binary format without holding them in memory.
+
+        Rows go to '<name>.features.part' and '<name>.labels.part' (raw float32 / uint8).
+        finalize() converts them to the .npy files and writes the header. A writer can be
+        reopened on existing part files to continue after an interruption.
+    """
+
+    def __init__(self, path, num_features, label_names, resume_rows=0, feature_schema=None):
+        """
+            Args:
+                path: Path to the dataset, with or without the '.json' extension.
+                num_features: Number of features of each row.
+                label_names: List of label names, label index i refers to label_names[i].
+                resume_rows: Number of rows already in the part files to keep. Rows written after
+                             them (by an interrupted run) are dropped. 0 starts a new dataset.
+                             Raises ValueError if the part files hold fewer rows (see part_rows).
+                feature_schema: Optional feature schema description (FeatureSchema.to_header()).
+        """
+        check_labels(label_names)
+        self.base = base_path(path)
+        self.num_features = num_features
+        self.label_names = list(label_names)
+        self.feature_schema = feature_schema
+        self.rows = resume_rows
+
+        if resume_rows:
+            available = part_rows(path, num_features)
+            if available is None or available < resume_rows:
+                raise ValueError(f"Cannot resume {self.base}: the part files hold {available or 0} rows, "
+                                 f"expected at least {resume_rows}")
+
+        mode = 'r+b' if resume_rows else 'wb'
+        self.features_file = open(self.base + '.features.part', mode)
+        self.labels_file = open(self.base + '.labels.part', mode)
+        if resume_rows:
+            self.features_file.truncate(resume_rows * num_features * 4)
+            self.labels_file.truncate(resume_rows)
+            self.features_file.seek(0, os.SEEK_END)
+            self.labels_file.seek(0, os.SEEK_END)
+
+    def write(self, features, labels):
+        """
+            Appends rows.
+
+            Args:
+                features: Array of shape (num_rows, num_features).
+                labels: Array of shape (num_rows,) with label indices.
+        """
+        features = np.ascontiguousarray(features, dtype=np.float32).reshape(len(labels), self.num_features)
+        self.features_file.write(features.tobytes())
+        self.labels_file.write(np.asarray(labels, dtype=np.uint8).tobytes())
+        self.rows += len(labels)
+
+    def flush(self):
+        """Makes the rows written so far durable, called before they are recorded in a checkpoint."""
+        for f in (self.features_file, self.labels_file):
+            f.flush()
+            os.fsync(f.fileno())
+
+    def close(self):
+        self.features_file.close()
+        self.labels_file.close()
+
+    def finalize(self):
+        """
+            Converts the part files into the .npy files, writes the header and removes the part files.
+
+            Returns:
+                The number of rows of the dataset.
+        """
+        self.close()
+
+        for name, dtype, shape in [('features', np.float32, (self.rows, self.num_features)),
+                                   ('labels', np.uint8, (self.rows,))]:
+            part_file = f"{self.base}.{name}.part"
+            out = np.lib.format.open_memmap(f"{self.base}.{name}.npy", mode='w+', dtype=dtype, shape=shape)
+            if self.rows:
+                part = np.memmap(part_file, dtype=dtype, mode='r', shape=shape)
+                for start in range(0, self.rows, COPY_CHUNK_ROWS):
+                    out[start:start + COPY_CHUNK_ROWS] = part[start:start + COPY_CHUNK_ROWS]
+                del part
+            out.flush()
+            del out
+            os.remove(part_file)
+
+        write_header(self.base, self.rows, self.num_features, self.label_names, self.feature_schema)
+        return self.rows
@@ -0,0 +1,211 @@
+"""
+Feature schemas: which channels of a detected hand make up the feature vector.
+
+- 'xy' (42): the original features, see LandmarkFeatures.py,
+- 'xyz' (63): the 'xy' block followed by the 21 landmark depths,
+- 'xy+hand' (43) and 'xyz+hand' (64): the same followed by a handedness bit (1 = right hand, 0 = left).
+
+The depth block uses MediaPipe's landmark z (roughly the scale of x) converted to pixels with the
+image width, made relative to the wrist and divided by the same hand size as the x/y block, so the
+first 42 features of every schema are the 'xy' features.
+
+The schema is recorded in the dataset header and in a '<model>.schema.json' sidecar next to every
+trained model, together with SCHEMA_VERSION. A dataset or model of another schema version is refused,
+so features of one encoding never reach a model trained on another. Datasets and models without
+a recorded schema are the legacy 'xy' ones.
+"""
+
+import collections
+import json
+import os
+
+import numpy as np
+
+from common.DatasetFormat import load_header
+from common.LandmarkFeatures import NUM_COORDINATES, NUM_LANDMARKS, points_to_pixels
+
+
+SCHEMA_VERSION = 1  # Bump when the encoding of any schema changes
+DEFAULT_SCHEMA = 'xy'
+MODEL_SCHEMA_EXTENSION = '.schema.json'
+
+RIGHT_HAND = 'Right'  # MediaPipe handedness label encoded as 1
+
+
+class FeatureSchema(collections.namedtuple('FeatureSchema', ['name', 'depth', 'handedness'])):
+    """A feature schema: its name, whether it has the depth block and the handedness bit."""
+
+    @property
+    def num_features(self):
+        return NUM_LANDMARKS * (NUM_COORDINATES + self.depth) + self.handedness
+
+    def to_header(self):
+        """Returns the JSON-serializable description stored in dataset headers and model sidecars."""
+        return {'name': self.name, 'version': SCHEMA_VERSION, 'num_features': self.num_features}
+
+
+SCHEMAS = {schema.name: schema for schema in [
+    FeatureSchema('xy', False, False),
+    FeatureSchema('xyz', True, False),
+    FeatureSchema('xy+hand', False, True),
+    FeatureSchema('xyz+hand', True, True),
+]}
+
+
+def get_schema(name):
+    """Returns the FeatureSchema of a name, raises ValueError for unknown names."""
+    if name not in SCHEMAS:
+        raise ValueError(f"Unknown feature schema '{name}', expected one of {', '.join(SCHEMAS)}")
+    return SCHEMAS[name]
+
+
+def schema_from_header(header, num_features=None, source="data"):
+    """
+        Returns the FeatureSchema described by a dataset header or model sidecar entry.
+
+        Args:
+            header: The 'feature_schema' dict, or None for legacy data without one.
+            num_features: Number of features of the data to check against the schema, or None.
+            source: Description of the data for error messages.
+
+        Returns:
+            The FeatureSchema.
+    """
+    if header is None:
+        schema = SCHEMAS[DEFAULT_SCHEMA]
+    else:
+        if header.get('version') != SCHEMA_VERSION:
+            raise ValueError(f"{source} uses feature schema version {header.get('version')}, this code uses "
+                             f"version {SCHEMA_VERSION}, rebuild it with the current LandmarksProcessor/trainers")
+        schema = get_schema(header['name'])
+
+    if num_features is not None and num_features != schema.num_features:
+        raise ValueError(f"{source} has {num_features} features, schema '{schema.name}' has {schema.num_features}")
+    return schema
+
+
+def dataset_schema(path, num_features):
+    """
+        Returns the FeatureSchema of a dataset from its header. CSV files have no header,
+        their schema is recognized by the number of features.
+
+        Args:
+            path: Path to the dataset.
+            num_features: Number of feature columns of the loaded dataset.
+
+        Returns:
+            The FeatureSchema.
+    """
+    header = load_header(path)
+    if header is None:
+        for schema in SCHEMAS.values():
+            if schema.num_features == num_features:
+                return schema
+        raise ValueError(f"No feature schema has {num_features} features ({path})")
+    return schema_from_header(header.get('feature_schema'), num_features, source=f"Dataset {path}")
+
+
+def handedness_bits(handedness):
+    """Encodes handedness labels as float32 (1 for a right hand, 0 otherwise)."""
+    return np.array([label == RIGHT_HAND for label in handedness], dtype=np.float32)
+
+
+def relative_coordinates(points, image_width, image_height):
+    """
+        Converts normalized landmark points into pixel coordinates relative to the wrist.
+
+        Args:
+            points: Array of shape (..., 21, 3) with normalized x, y, z.
+            image_width: Width of the image (scalar or array of shape (...)).
+            image_height: Height of the image (scalar or array of shape (...)).
+
+        Returns:
+            A float64 array of shape (..., 21, 3). x and y are whole pixels like in the 'xy' features,
+            z is scaled by the image width.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    coordinates = np.empty(points.shape[:-1] + (3,))
+    coordinates[..., :NUM_COORDINATES] = points_to_pixels(points, image_width, image_height)
+    coordinates[..., 2] = points[..., 2] * np.asarray(image_width, dtype=np.float64)[..., None]
+    coordinates -= coordinates[..., :1, :]
+    return coordinates
+
+
+def relative_to_features(schema, relative, handedness=None):
+    """
+        Builds feature vectors from wrist-relative coordinates.
+
+        Args:
+            schema: The FeatureSchema.
+            relative: Array of shape (N, 21, 3) (or (N, 21, 2) for schemas without depth).
+            handedness: Sequence of N handedness labels, needed by schemas with the handedness bit.
+
+        Returns:
+            A float32 array of shape (N, schema.num_features).
+    """
+    count = relative.shape[0]
+    xy = relative[..., :NUM_COORDINATES].reshape(count, NUM_LANDMARKS * NUM_COORDINATES)
+
+    # The hand size of the 'xy' features, the depth block is divided by it too
+    scale = np.abs(xy).max(axis=-1, keepdims=True)
+    scale[scale == 0] = 1  # Degenerate hand, every landmark on the wrist
+
+    features = np.empty((count, schema.num_features), dtype=np.float32)
+    np.divide(xy, scale, out=features[:, :xy.shape[1]])
+    end = xy.shape[1]
+    if schema.depth:
+        np.divide(relative[..., 2], scale, out=features[:, end:end + NUM_LANDMARKS])
+        end += NUM_LANDMARKS
+    if schema.handedness:
+        features[:, end] = handedness_bits(handedness)
+    return features
+
+
+def compute_features(schema, points, image_width, image_height, handedness=None):
+    """
+        Computes the feature vectors of detected hands.
+
+        Args:
+            schema: The FeatureSchema.
+            points: Array of shape (N, 21, 3) with normalized landmark coordinates.
+            image_width: Width of the images (scalar or array of shape (N,)).
+            image_height: Height of the images (scalar or array of shape (N,)).
+            handedness: Sequence of N handedness labels, needed by schemas with the handedness bit.
+
+        Returns:
+            A float32 array of shape (N, schema.num_features).
+    """
+    return relative_to_features(schema, relative_coordinates(points, image_width, image_height), handedness)
+
+
+def model_schema_path(model_path):
+    """Returns the path of the schema sidecar of a model file or directory."""
+    return model_path.rstrip('/\\') + MODEL_SCHEMA_EXTENSION
+
+
+def save_model_schema(model_path, schema, label_names=None):
+    """
+        Writes the schema sidecar of a trained model.
+
+        Args:
+            model_path: Path of the saved model file or directory.
+            schema: The FeatureSchema the model was trained on.
+            label_names: Optional list of the class names.
+    """
+    with open(model_schema_path(model_path), 'w') as f:
+        json.dump({'feature_schema': schema.to_header(), 'labels': label_names}, f, indent=2)
+
+
+def load_model_schema(model_path):
+    """
+        Reads the schema of a trained model from its sidecar.
+
+        Returns:
+            The FeatureSchema, the legacy 'xy' schema if the model has no sidecar.
+    """
+    path = model_schema_path(model_path)
+    if not os.path.exists(path):
+        return SCHEMAS[DEFAULT_SCHEMA]
+
+    with open(path) as f:
+        return schema_from_header(json.load(f).get('feature_schema'), source=f"Model {model_path}")
@@ -0,0 +1,263 @@
+"""
+Flattened XGBoost ensembles for fast single-row prediction without XGBoost.
+
+The trees of a trained Booster (read from its JSON dump) are stored as contiguous NumPy node
+arrays in one '.trees.npz' file. The prediction walks all trees at once: every step gathers the
+split feature and threshold of the current node of each tree and moves to the left or right
+child, for as many steps as the deepest tree has levels (leaves point to themselves). The leaf
+values are summed per class with the trees grouped by class, and the softmax gives the same
+probabilities as Booster.inplace_predict.
+
+Only numerical splits of 'gbtree' boosters with the multi:softprob / multi:softmax objective are
+supported, which is what TrainerXGB trains. All trees are used, like XGBoostPredictor.
+"""
+
+import json
+import os
+import shutil
+
+import numpy as np
+
+from common.FeatureSchema import model_schema_path
+
+
+FLAT_EXTENSION = '.trees.npz'
+FLAT_VERSION = 1  # Bump when the array layout changes
+PARITY_TOLERANCE = 1e-5  # Max difference of probabilities to Booster.predict
+SUPPORTED_OBJECTIVES = ('multi:softprob', 'multi:softmax')
+
+
+def flat_model_path(model_path):
+    """Returns the path of the flattened export of a model, e.g. 'model.xgb' -> 'model.trees.npz'."""
+    return os.path.splitext(model_path)[0] + FLAT_EXTENSION
+
+
+def parse_base_score(value, num_classes):
+    """Parses the base_score of the JSON dump, a number or a per-class list like '[1E-1,2E-1]'."""
+    scores = np.array([float(score) for score in value.strip('[]').split(',')], dtype=np.float32)
+    return np.broadcast_to(scores, num_classes).copy()
+
+
+def tree_depth(left, right):
+    """Returns the number of levels below the root of one tree."""
+    depth = 0
+    level = [0]
+    while True:
+        level = [child for node in level for child in (left[node], right[node]) if child != -1]
+        if not level:
+            return depth
+        depth += 1
+
+
+def flatten_booster(booster):
+    """
+        Converts a Booster into the node arrays of a FlatTrees.
+
+        Args:
+            booster: A trained xgb.Booster.
+
+        Returns:
+            A dict of NumPy arrays, see FlatTrees.
+    """
+    learner = json.loads(booster.save_raw('json'))['learner']
+    objective = learner['objective']['name']
+    if objective not in SUPPORTED_OBJECTIVES:
+        raise ValueError(f"Objective {objective} is not supported, expected one of {', '.join(SUPPORTED_OBJECTIVES)}")
+    if learner['gradient_booster']['name'] != 'gbtree':
+        raise ValueError(f"Booster {learner['gradient_booster']['name']} is not supported, only gbtree")
+
+    model_param = learner['learner_model_param']
+    num_classes = int(model_param['num_class'])
+    model = learner['gradient_booster']['model']
+    trees = model['trees']
+    tree_class = np.asarray(model['tree_info'], dtype=np.int32)
+
+    # Group the trees by class, so the leaf values of a class are a contiguous slice
+    order = np.argsort(tree_class, kind='stable')
+
+    features, thresholds, children, default_left, values, roots = [], [], [], [], [], []
+    depth = 0
+    offset = 0
+    for index in order:
+        tree = trees[index]
+        if any(tree['split_type']):
+            raise ValueError("Categorical splits are not supported")
+
+        left = np.asarray(tree['left_children'], dtype=np.int64)
+        right = np.asarray(tree['right_children'], dtype=np.int64)
+        conditions = np.asarray(tree['split_conditions'], dtype=np.float32)
+        leaf = left == -1
+        nodes = np.arange(len(left))
+
+        # Leaves point to themselves, so every row can take the same number of steps
+        features.append(np.where(leaf, 0, tree['split_indices']))
+        thresholds.append(np.where(leaf, np.inf, conditions))
+        children.append(np.stack([np.where(leaf, nodes, left), np.where(leaf, nodes, right)], axis=1) + offset)
+        default_left.append(np.asarray(tree['default_left'], dtype=bool))
+        values.append(np.where(leaf, conditions, 0))
+        roots.append(offset)
+
+        depth = max(depth, tree_depth(left, right))
+        offset += len(left)
+
+    class_start = np.searchsorted(tree_class[order], np.arange(num_classes))
+    if len(np.unique(tree_class)) != num_classes:
+        raise ValueError("Every class needs at least one tree")
+
+    return {
+        'version': np.int32(FLAT_VERSION),
+        'feature': np.concatenate(features).astype(np.int32),
+        'threshold': np.concatenate(thresholds).astype(np.float32),
+        'children': np.concatenate(children).reshape(-1).astype(np.int32),
+        'default_left': np.concatenate(default_left),
+        'value': np.concatenate(values).astype(np.float32),
+        'root': np.asarray(roots, dtype=np.int32),
+        'class_start': class_start.astype(np.int64),
+        'base_score': parse_base_score(model_param['base_score'], num_classes),
+        'depth': np.int32(depth),
+        'num_features': np.int32(model_param['num_feature']),
+    }
+
+
+class FlatTrees:
+    """A flattened tree ensemble predicting class probabilities with NumPy only."""
+
+    def __init__(self, arrays):
+        """
+            Args:
+                arrays: Dict of the node arrays made by flatten_booster (or loaded from a '.trees.npz' file):
+                        feature, threshold, default_left and value per node, children (left and right child
+                        of every node, interleaved), root per tree, class_start (first tree of every class),
+                        base_score per class, depth and num_features.
+        """
+        version = int(arrays['version'])
+        if version != FLAT_VERSION:
+            raise ValueError(f"Flattened model version {version}, this code reads version {FLAT_VERSION}")
+
+        self.feature = arrays['feature']
+        self.threshold = arrays['threshold']
+        self.children = arrays['children']
+        self.default_left = arrays['default_left']
+        self.value = arrays['value']
+        self.root = arrays['root']
+        self.class_start = arrays['class_start']
+        self.base_score = arrays['base_score']
+        self.depth = int(arrays['depth'])
+        self.num_features = int(arrays['num_features'])
+
+    @classmethod
+    def from_booster(cls, booster):
+        return cls(flatten_booster(booster))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as arrays:
+            return cls({name: arrays[name] for name in arrays.files})
+
+    def save(self, path):
+        np.savez(path, version=np.int32(FLAT_VERSION), feature=self.feature, threshold=self.threshold,
+                 children=self.children, default_left=self.default_left, value=self.value, root=self.root,
+                 class_start=self.class_start, base_score=self.base_score, depth=np.int32(self.depth),
+                 num_features=np.int32(self.num_features))
+
+    @property
+    def num_trees(self):
+        return len(self.root)
+
+    def leaves(self, batch):
+        """
+            Walks every tree for every row.
+
+            Args:
+                batch: float32 array of shape (N, num_features).
+
+            Returns:
+                An int array of shape (N, num_trees) with the leaf node reached in each tree.
+        """
+        count = batch.shape[0]
+        flat_batch = batch.reshape(-1)
+        nodes = np.broadcast_to(self.root, (count, self.num_trees))
+        row_offset = np.arange(count)[:, None] * batch.shape[1]
+        missing = np.isnan(flat_batch).any()
+
+        for _ in range(self.depth):
+            values = flat_batch.take(row_offset + self.feature.take(nodes))
+            go_right = ~(values < self.threshold.take(nodes))
+            if missing:
+                go_right = np.where(np.isnan(values), ~self.default_left.take(nodes), go_right)
+            nodes = self.children.take(2 * nodes + go_right)
+        return nodes
+
+    def predict_margin(self, batch):
+        """Returns the raw class scores (margins) of shape (N, num_classes)."""
+        batch = np.ascontiguousarray(batch, dtype=np.float32)
+        leaf_values = self.value.take(self.leaves(batch))
+        return np.add.reduceat(leaf_values, self.class_start, axis=1) + self.base_score
+
+    def predict(self, batch):
+        """
+            Predicts class probabilities.
+
+            Args:
+                batch: Array of shape (N, num_features).
+
+            Returns:
+                A float32 array of shape (N, num_classes).
+        """
+        margins = self.predict_margin(batch)
+        margins -= margins.max(axis=1, keepdims=True)
+        np.exp(margins, out=margins)
+        margins /= margins.sum(axis=1, keepdims=True)
+        return margins.astype(np.float32, copy=False)
+
+
+def check_parity(booster, trees, features, tolerance=PARITY_TOLERANCE):
+    """
+        Compares the probabilities of the flattened model with Booster.inplace_predict.
+
+        Args:
+            booster: The original xgb.Booster.
+            trees: Its FlatTrees.
+            features: Feature rows to compare on, shape (N, num_features).
+            tolerance: Max allowed absolute difference.
+
+        Returns:
+            The max absolute difference, raises AssertionError above the tolerance or when the argmax differs.
+    """
+    features = np.ascontiguousarray(features, dtype=np.float32)
+    expected = booster.inplace_predict(features)
+    predicted = trees.predict(features)
+
+    difference = float(np.abs(expected - predicted).max()) if len(features) else 0.0
+    if difference > tolerance:
+        raise AssertionError(f"Flattened model differs from the booster by {difference:.2e} (> {tolerance:.0e})")
+    if not np.array_equal(np.argmax(expected, axis=1), np.argmax(predicted, axis=1)):
+        raise AssertionError("Flattened model predicts other classes than the booster")
+    return difference
+
+
+def export_model(model_path, output_path=None, booster=None):
+    """
+        Flattens a saved XGBoost model and writes it next to it with its schema sidecar.
+
+        Args:
+            model_path: Path of the saved XGBoost model.
+            output_path: Path of the '.trees.npz' file, None for flat_model_path(model_path).
+            booster: The loaded xgb.Booster, None loads it from model_path.
+
+        Returns:
+            A tuple (output_path, trees).
+    """
+    if booster is None:
+        import xgboost as xgb
+
+        booster = xgb.Booster()
+        booster.load_model(model_path)
+
+    output_path = output_path or flat_model_path(model_path)
+    trees = FlatTrees.from_booster(booster)
+    trees.save(output_path)
+
+    if os.path.exists(model_schema_path(model_path)):
+        shutil.copyfile(model_schema_path(model_path), model_schema_path(output_path))
+    return output_path, trees
@@ -0,0 +1,52 @@
+"""
+Bounding boxes around detected hands, shared by the collector (image crops) and the runner (tracking ROI).
+"""
+
+import numpy as np
+
+from common.LandmarkFeatures import points_to_pixels
+
+
+def hand_box(points, frame_width, frame_height, padding):
+    """
+        Calculates a square bounding box around the hand landmarks,
+        including padding, while staying within the frame boundaries.
+
+        Args:
+            points: Array of shape (21, 2 or more) with normalized landmark coordinates.
+            frame_width: Width of the frame in pixels.
+            frame_height: Height of the frame in pixels.
+            padding: Padding around the hand in pixels.
+
+        Returns:
+            A tuple containing the coordinates (x_min, y_min, x_max, y_max)
+            of the calculated square bounding box.
+    """
+    pixels = points_to_pixels(points, frame_width, frame_height).astype(int)
+    (x_low, y_low), (x_high, y_high) = pixels.min(axis=0), pixels.max(axis=0)
+
+    # Calculate bounding box with padding
+    x_min = max(int(x_low) - padding, 0)
+    x_max = min(int(x_high) + padding, frame_width)
+    y_min = max(int(y_low) - padding, 0)
+    y_max = min(int(y_high) + padding, frame_height)
+
+    # Make the crop square
+    size = max(x_max - x_min, y_max - y_min)
+
+    # Adjust coordinates to make square crop
+    x_center = (x_min + x_max) // 2
+    y_center = (y_min + y_max) // 2
+
+    x_min = max(x_center - size // 2, 0)
+    x_max = min(x_center + size // 2, frame_width)
+    y_min = max(y_center - size // 2, 0)
+    y_max = min(y_center + size // 2, frame_height)
+
+    return x_min, y_min, x_max, y_max
+
+
+def hand_extent(points, frame_width, frame_height):
+    """Returns the larger side of the tight bounding box of the hand landmarks in pixels."""
+    pixels = np.asarray(points)[:, :2] * (frame_width, frame_height)
+    return float((pixels.max(axis=0) - pixels.min(axis=0)).max())
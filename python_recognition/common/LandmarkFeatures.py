@@ -0,0 +1,169 @@
+"""
+Converts MediaPipe hand landmarks into the normalized feature vectors used by the classifiers.
+
+The feature layout is [x0, y0, x1, y1, ..., x20, y20] where every point is first converted
+to integer pixel coordinates, then made relative to the wrist (landmark 0) and finally
+divided by the maximum absolute value of the whole vector. This is the same layout that
+the web app computes in src/lib/handlers/LandmarksProcessor.ts.
+
+All functions work on NumPy arrays, so a single hand (21, 3) and a batch of hands
+(N, 21, 3) go through the same vectorized code path.
+"""
+
+import collections
+import itertools
+
+import numpy as np
+
+
+# --- Feature Layout Constants ---
+NUM_LANDMARKS = 21
+NUM_COORDINATES = 2  # x, y
+NUM_FEATURES = NUM_LANDMARKS * NUM_COORDINATES
+
+# A detected hand: normalized (21, 3) landmark points, MediaPipe handedness label ('Left'/'Right') and its score
+Detection = collections.namedtuple('Detection', ['points', 'handedness', 'score'])
+
+
+def landmarks_to_points(landmarks, out=None):
+    """
+        Copies the normalized coordinates of a MediaPipe LandmarkList into an array.
+
+        Args:
+            landmarks: The LandmarkList object from MediaPipe results.
+            out: Optional preallocated float64 array of shape (21, 3).
+
+        Returns:
+            An array of shape (21, 3) with the normalized x, y, z of each landmark.
+    """
+    values = np.fromiter(
+        itertools.chain.from_iterable((landmark.x, landmark.y, landmark.z) for landmark in landmarks.landmark),
+        dtype=np.float64,
+        count=NUM_LANDMARKS * 3,
+    ).reshape(NUM_LANDMARKS, 3)
+
+    if out is None:
+        return values
+    out[...] = values
+    return out
+
+
+def results_to_detections(results):
+    """
+        Converts MediaPipe Hands results into Detection tuples.
+
+        Args:
+            results: The MediaPipe Hands results object.
+
+        Returns:
+            A list with one Detection per detected hand (empty if no hand is detected).
+    """
+    if not results.multi_hand_landmarks:
+        return []
+
+    handedness = results.multi_handedness or [None] * len(results.multi_hand_landmarks)
+    detections = []
+    for hand_landmarks, hand_class in zip(results.multi_hand_landmarks, handedness):
+        label, score = (hand_class.classification[0].label, hand_class.classification[0].score) if hand_class else ('', 0.0)
+        detections.append(Detection(landmarks_to_points(hand_landmarks), label, score))
+    return detections
+
+
+def points_to_pixels(points, image_width, image_height):
+    """
+        Converts normalized landmark coordinates into integer pixel coordinates,
+        clamped to the image like the original per-landmark implementation.
+
+        Args:
+            points: Array of shape (..., 21, 2 or more) with normalized coordinates.
+            image_width: Width of the image the landmarks were detected on. An array of shape (...)
+                         gives every hand of a batch its own image size.
+            image_height: Height of the image the landmarks were detected on, like image_width.
+
+        Returns:
+            A float64 array of shape (..., 21, 2) holding whole pixel values.
+    """
+    if np.ndim(image_width) == 0 and np.ndim(image_height) == 0:
+        size = np.array((image_width, image_height), dtype=np.float64)
+    else:
+        # Shape (..., 1, 2), broadcasts over the landmarks
+        size = np.stack(np.broadcast_arrays(image_width, image_height), axis=-1).astype(np.float64)[..., None, :]
+
+    pixels = np.trunc(np.asarray(points, dtype=np.float64)[..., :NUM_COORDINATES] * size)
+    np.minimum(pixels, size - 1, out=pixels)
+    return pixels
+
+
+def pixels_to_features(pixels, out=None):
+    """
+        Makes pixel coordinates relative to the wrist, flattens them and normalizes
+        them by the maximum absolute value.
+
+        Args:
+            pixels: Array of shape (..., 21, 2) with pixel coordinates.
+            out: Optional preallocated float32 array of shape (..., 42).
+
+        Returns:
+            A float32 array of shape (..., 42) with the normalized feature vectors.
+    """
+    relative = pixels - pixels[..., :1, :]
+    flat = relative.reshape(relative.shape[:-2] + (NUM_FEATURES,))
+
+    max_value = np.abs(flat).max(axis=-1, keepdims=True)
+    max_value[max_value == 0] = 1  # Degenerate hand, every landmark on the wrist
+
+    if out is None:
+        out = np.empty(flat.shape, dtype=np.float32)
+    np.divide(flat, max_value, out=out)
+    return out
+
+
+def points_to_features(points, image_width, image_height, out=None):
+    """
+        Converts normalized landmark coordinates into feature vectors.
+
+        Args:
+            points: Array of shape (..., 21, 2 or more) with normalized coordinates.
+            image_width: Width of the image the landmarks were detected on (scalar or array of shape (...)).
+            image_height: Height of the image the landmarks were detected on (scalar or array of shape (...)).
+            out: Optional preallocated float32 array of shape (..., 42).
+
+        Returns:
+            A float32 array of shape (..., 42) with the normalized feature vectors.
+    """
+    return pixels_to_features(points_to_pixels(points, image_width, image_height), out=out)
+
+
+def landmarks_to_features(landmarks, image_width, image_height, out=None):
+    """
+        Converts a single MediaPipe LandmarkList into a feature vector.
+
+        Args:
+            landmarks: The LandmarkList object from MediaPipe results.
+            image_width: Width of the image the landmarks were detected on.
+            image_height: Height of the image the landmarks were detected on.
+            out: Optional preallocated float32 array of shape (42,).
+
+        Returns:
+            A float32 array of shape (42,) with the normalized feature vector.
+    """
+    return points_to_features(landmarks_to_points(landmarks), image_width, image_height, out=out)
+
+
+def landmarks_to_feature_batch(landmark_lists, image_width, image_height, out=None):
+    """
+        Converts several MediaPipe LandmarkLists from the same image into a feature matrix.
+
+        Args:
+            landmark_lists: Sequence of LandmarkList objects.
+            image_width: Width of the image the landmarks were detected on.
+            image_height: Height of the image the landmarks were detected on.
+            out: Optional preallocated float32 array of shape (N, 42).
+
+        Returns:
+            A float32 array of shape (N, 42), one row per hand.
+    """
+    points = np.empty((len(landmark_lists), NUM_LANDMARKS, 3), dtype=np.float64)
+    for index, landmarks in enumerate(landmark_lists):
+        landmarks_to_points(landmarks, out=points[index])
+    return points_to_features(points, image_width, image_height, out=out)
@@ -0,0 +1,97 @@
+"""
+Landmark sidecar files stored next to the collected images.
+
+The collector already runs MediaPipe on every image it saves, so it writes the raw detection next
+to the image ('12.jpg' -> '12.landmarks.npz'): the 21 normalized (x, y, z) landmarks, the
+handedness label and score, and the image size. LandmarksProcessor builds the features of such
+images from the sidecar instead of decoding the JPEG and running MediaPipe again.
+
+The sidecar also stores the SHA-1 of the image content. An image that was edited, replaced or
+moved under another name after the sidecar was written does not match it, and is detected again.
+"""
+
+import hashlib
+import os
+
+import numpy as np
+
+from common.LandmarkFeatures import NUM_LANDMARKS, Detection
+
+
+SIDECAR_EXTENSION = '.landmarks.npz'
+SIDECAR_VERSION = 2  # Version 1 sidecars have no image digest and are ignored
+
+
+def sidecar_path(image_path):
+    """Returns the path of the sidecar file belonging to an image."""
+    return os.path.splitext(image_path)[0] + SIDECAR_EXTENSION
+
+
+def content_digest(data):
+    """Returns the hexadecimal SHA-1 digest of bytes."""
+    return hashlib.sha1(data).hexdigest()
+
+
+def file_digest(file_path):
+    """
+        Calculates the SHA-1 digest of a file content.
+
+        Args:
+            file_path: The path to the file.
+
+        Returns:
+            The hexadecimal digest string.
+    """
+    with open(file_path, "rb") as f:
+        return content_digest(f.read())
+
+
+def save_sidecar(image_path, detection, image_width, image_height, digest=None):
+    """
+        Writes the sidecar file of an image.
+
+        Args:
+            image_path: Path of the saved image.
+            detection: The Detection of the hand in the saved image (landmarks normalized to that image).
+            image_width: Width of the saved image.
+            image_height: Height of the saved image.
+            digest: SHA-1 digest of the image file content, None reads it from image_path.
+    """
+    if digest is None:
+        digest = file_digest(image_path)
+
+    with open(sidecar_path(image_path), 'wb') as f:
+        np.savez(f,
+                 version=SIDECAR_VERSION,
+                 digest=np.array(digest),
+                 points=np.asarray(detection.points, dtype=np.float32).reshape(NUM_LANDMARKS, 3),
+                 handedness=np.array(detection.handedness),
+                 score=np.float32(detection.score),
+                 image_size=np.array([image_width, image_height], dtype=np.int32))
+
+
+def load_sidecar(image_path, digest=None):
+    """
+        Reads the sidecar file of an image.
+
+        Args:
+            image_path: Path of the image.
+            digest: SHA-1 digest of the image file content, None reads it from image_path.
+
+        Returns:
+            A tuple (detection, image_width, image_height), or None if the image has no valid sidecar
+            or the sidecar was written for other image content.
+    """
+    path = sidecar_path(image_path)
+    if not os.path.exists(path):
+        return None
+
+    with np.load(path) as data:
+        if int(data['version']) != SIDECAR_VERSION:
+            return None
+        if str(data['digest']) != (digest or file_digest(image_path)):
+            return None
+        detection = Detection(data['points'].astype(np.float64), str(data['handedness']), float(data['score']))
+        image_width, image_height = (int(value) for value in data['image_size'])
+
+    return detection, image_width, image_height
@@ -0,0 +1,189 @@
+"""
+Pure-NumPy inference of the MLP trained by TrainerNN.
+
+The Dense layers of the Keras model (kernels, biases and activations) are exported to one
+compact '.mlp.npz' file; Dropout and Input layers do nothing at inference and are skipped.
+NumpyMLP runs the forward pass with float32 matrix products, so the runner can use the model
+without importing TensorFlow (seconds of startup and hundreds of MB for ~3k parameters).
+
+The export reads the layers through get_config/get_weights only, so this module never imports
+TensorFlow itself.
+"""
+
+import os
+import shutil
+
+import numpy as np
+
+from common.FeatureSchema import model_schema_path
+
+
+MLP_EXTENSION = '.mlp.npz'
+MLP_VERSION = 1  # Bump when the file layout changes
+PARITY_TOLERANCE = 1e-5  # Max difference of probabilities to model.predict
+SKIPPED_LAYERS = ('InputLayer', 'Dropout')  # Identity at inference
+
+
+def relu(x):
+    return np.maximum(x, 0, out=x)
+
+
+def softmax(x):
+    x -= x.max(axis=1, keepdims=True)
+    np.exp(x, out=x)
+    x /= x.sum(axis=1, keepdims=True)
+    return x
+
+
+def sigmoid(x):
+    return 1 / (1 + np.exp(-x))
+
+
+ACTIVATIONS = {
+    'linear': lambda x: x,
+    'relu': relu,
+    'softmax': softmax,
+    'sigmoid': sigmoid,
+    'tanh': np.tanh,
+}
+
+
+def mlp_model_path(model_path):
+    """Returns the path of the NumPy export of a model, e.g. 'model.keras' -> 'model.mlp.npz'."""
+    return os.path.splitext(model_path.rstrip('/\\'))[0] + MLP_EXTENSION
+
+
+def model_layers(model):
+    """
+        Extracts the Dense layers of a Keras model.
+
+        Args:
+            model: A Sequential Keras model of Dense (and Dropout) layers.
+
+        Returns:
+            A list of (kernel, bias, activation) tuples with float32 arrays.
+    """
+    layers = []
+    for layer in model.layers:
+        kind = type(layer).__name__
+        if kind in SKIPPED_LAYERS:
+            continue
+        if kind != 'Dense':
+            raise ValueError(f"Layer {layer.name} ({kind}) is not supported, only Dense and Dropout layers")
+
+        config = layer.get_config()
+        activation = config['activation']
+        if activation not in ACTIVATIONS:
+            raise ValueError(f"Activation {activation} of layer {layer.name} is not supported")
+
+        weights = layer.get_weights()
+        kernel = np.asarray(weights[0], dtype=np.float32)
+        bias = np.asarray(weights[1], dtype=np.float32) if config.get('use_bias', True) else np.zeros(kernel.shape[1], np.float32)
+        layers.append((kernel, bias, activation))
+    return layers
+
+
+class NumpyMLP:
+    """A stack of Dense layers evaluated with NumPy."""
+
+    def __init__(self, layers):
+        """
+            Args:
+                layers: List of (kernel, bias, activation) tuples, kernel of shape (inputs, units).
+        """
+        self.layers = [(np.ascontiguousarray(kernel, dtype=np.float32), np.asarray(bias, dtype=np.float32),
+                        activation) for kernel, bias, activation in layers]
+        self.functions = [ACTIVATIONS[activation] for _, _, activation in self.layers]
+
+    @classmethod
+    def from_keras(cls, model):
+        return cls(model_layers(model))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as arrays:
+            version = int(arrays['version'])
+            if version != MLP_VERSION:
+                raise ValueError(f"NumPy MLP version {version}, this code reads version {MLP_VERSION}")
+            activations = [str(activation) for activation in arrays['activations']]
+            return cls([(arrays[f'kernel{i}'], arrays[f'bias{i}'], activation)
+                        for i, activation in enumerate(activations)])
+
+    def save(self, path):
+        arrays = {'version': np.int32(MLP_VERSION),
+                  'activations': np.array([activation for _, _, activation in self.layers])}
+        for i, (kernel, bias, _) in enumerate(self.layers):
+            arrays[f'kernel{i}'] = kernel
+            arrays[f'bias{i}'] = bias
+        np.savez(path, **arrays)
+
+    @property
+    def num_features(self):
+        return self.layers[0][0].shape[0]
+
+    @property
+    def num_parameters(self):
+        return sum(kernel.size + bias.size for kernel, bias, _ in self.layers)
+
+    def predict(self, batch):
+        """
+            Runs the forward pass.
+
+            Args:
+                batch: Array of shape (N, num_features).
+
+            Returns:
+                A float32 array of shape (N, units of the last layer), the class probabilities for TrainerNN's model.
+        """
+        x = np.asarray(batch, dtype=np.float32)
+        for (kernel, bias, _), function in zip(self.layers, self.functions):
+            x = x @ kernel
+            x += bias
+            x = function(x)
+        return x
+
+
+def check_parity(model, mlp, features, tolerance=PARITY_TOLERANCE):
+    """
+        Compares the NumPy forward pass with model.predict of the Keras model.
+
+        Args:
+            model: The Keras model.
+            mlp: Its NumpyMLP.
+            features: Feature rows to compare on, shape (N, num_features).
+            tolerance: Max allowed absolute difference.
+
+        Returns:
+            The max absolute difference, raises AssertionError above the tolerance or when the argmax differs.
+    """
+    features = np.ascontiguousarray(features, dtype=np.float32)
+    expected = np.asarray(model.predict(features, verbose=0), dtype=np.float32)
+    predicted = mlp.predict(features)
+
+    difference = float(np.abs(expected - predicted).max()) if len(features) else 0.0
+    if difference > tolerance:
+        raise AssertionError(f"NumPy MLP differs from the Keras model by {difference:.2e} (> {tolerance:.0e})")
+    if not np.array_equal(np.argmax(expected, axis=1), np.argmax(predicted, axis=1)):
+        raise AssertionError("NumPy MLP predicts other classes than the Keras model")
+    return difference
+
+
+def export_model(model, model_path, output_path=None):
+    """
+        Exports the Dense weights of a saved Keras model next to it with its schema sidecar.
+
+        Args:
+            model: The loaded Keras model.
+            model_path: Path the Keras model was saved to.
+            output_path: Path of the '.mlp.npz' file, None for mlp_model_path(model_path).
+
+        Returns:
+            A tuple (output_path, mlp).
+    """
+    output_path = output_path or mlp_model_path(model_path)
+    mlp = NumpyMLP.from_keras(model)
+    mlp.save(output_path)
+
+    if os.path.exists(model_schema_path(model_path)):
+        shutil.copyfile(model_schema_path(model_path), model_schema_path(output_path))
+    return output_path, mlp
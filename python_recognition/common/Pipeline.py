@@ -0,0 +1,106 @@
+"""
+Building blocks for the pipelined (multi-threaded) live runner.
+
+- LatestQueue: bounded hand-off between threads that drops the oldest frames, so a slow
+  consumer always works on the newest frame instead of falling behind.
+- StageStats: thread-safe latency and throughput statistics per pipeline stage.
+"""
+
+import collections
+import contextlib
+import threading
+import time
+
+import numpy as np
+
+
+class LatestQueue:
+    """Bounded queue that drops the oldest item when full; the consumer only takes the newest item."""
+
+    def __init__(self, maxsize=2):
+        self.items = collections.deque(maxlen=maxsize)
+        self.condition = threading.Condition()
+        self.dropped = 0
+
+    def put(self, item):
+        """
+            Adds an item, dropping the oldest one if the queue is full.
+
+            Returns:
+                The dropped item, so the producer can reuse its buffer, or None.
+        """
+        with self.condition:
+            dropped = None
+            if len(self.items) == self.items.maxlen:
+                self.dropped += 1
+                dropped = self.items[0]
+            self.items.append(item)
+            self.condition.notify()
+            return dropped
+
+    def get_latest(self, timeout=None):
+        """
+            Waits for an item and returns the newest one, discarding the older ones.
+
+            Args:
+                timeout: Maximum time to wait in seconds, None waits forever.
+
+            Returns:
+                The newest item, or None if the timeout expired.
+        """
+        with self.condition:
+            if not self.condition.wait_for(lambda: self.items, timeout):
+                return None
+            item = self.items.pop()
+            self.dropped += len(self.items)
+            self.items.clear()
+            return item
+
+
+class StageStats:
+    """Collects per-stage latencies (rolling window) and event counts for FPS reporting."""
+
+    def __init__(self, window=300):
+        self.window = window
+        self.lock = threading.Lock()
+        self.samples = collections.defaultdict(lambda: collections.deque(maxlen=self.window))
+        self.counts = collections.Counter()
+        self.since = time.perf_counter()
+
+    def record(self, stage, seconds):
+        """Records one execution of a stage that took the given number of seconds."""
+        with self.lock:
+            self.samples[stage].append(seconds)
+            self.counts[stage] += 1
+
+    @contextlib.contextmanager
+    def timer(self, stage):
+        """Context manager recording the duration of the enclosed block as one execution of the stage."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def report(self, reset=True):
+        """
+            Formats the statistics of every stage since the last report.
+
+            Args:
+                reset: If True, the FPS counters start over.
+
+            Returns:
+                A multi-line string with FPS, mean, p50 and p95 latency of every stage.
+        """
+        with self.lock:
+            now = time.perf_counter()
+            elapsed = max(now - self.since, 1e-9)
+            lines = [f"{'stage':<12} {'fps':>7} {'mean ms':>8} {'p50 ms':>8} {'p95 ms':>8}"]
+            for stage, samples in self.samples.items():
+                latencies = np.asarray(samples) * 1000
+                lines.append(f"{stage:<12} {self.counts[stage] / elapsed:7.1f} {latencies.mean():8.2f} "
+                             f"{np.percentile(latencies, 50):8.2f} {np.percentile(latencies, 95):8.2f}")
+            if reset:
+                self.counts.clear()
+                self.since = now
+        return '\n'.join(lines)
@@ -0,0 +1,263 @@
+"""
+Prediction backends around the trained classifiers.
+
+Every predictor takes float32 feature rows and returns class probabilities of shape (N, num_classes)
+from predict(batch); predict_one is the per-frame path used by the live runner. The backend libraries
+are imported only when their predictor is created, so e.g. the XGBoost runner does not need TensorFlow.
+
+Backends:
+- 'xgb': XGBoost Booster saved by TrainerXGB (model.xgb),
+- 'xgb-flat': the same model flattened into NumPy node arrays (model.trees.npz, see FlatTrees.py),
+- 'keras': Keras MLP saved by TrainerNN (model.keras),
+- 'nn-numpy': the same MLP exported to NumPy weights (model.mlp.npz, see NumpyMLP.py), no TensorFlow needed,
+- 'tfdf': TensorFlow Decision Forests SavedModel directory saved by TrainerDF (model/),
+- 'tflite': TensorFlow Lite variants of the Keras MLP exported by ExportNN (model.dynamic.tflite, ...),
+- 'onnx': any of the above exported to ONNX, run with onnxruntime.
+
+load_predictor reads the feature schema of the model from its '<model>.schema.json' sidecar
+(see FeatureSchema.py) and attaches it to the predictor, so the runner builds matching features.
+"""
+
+import os
+
+import numpy as np
+
+from common.FeatureSchema import DEFAULT_SCHEMA, SCHEMAS, load_model_schema
+from common.LandmarkFeatures import NUM_FEATURES
+
+
+class Predictor:
+    """Base class of the backends. Subclasses implement predict, predict_one reuses a row buffer."""
+
+    def __init__(self, num_features=NUM_FEATURES):
+        self.row = np.empty((1, num_features), dtype=np.float32)
+        self.schema = SCHEMAS[DEFAULT_SCHEMA]  # Feature schema of the model, set by load_predictor
+
+    def predict_one(self, features):
+        """
+            Predicts a single feature vector.
+
+            Args:
+                features: Array of shape (num_features,).
+
+            Returns:
+                A float32 array of shape (num_classes,) with class probabilities.
+        """
+        self.row[0] = features
+        return self.predict(self.row)[0]
+
+    def predict(self, batch):
+        """
+            Predicts a batch of feature vectors.
+
+            Args:
+                batch: Array of shape (N, num_features).
+
+            Returns:
+                A float32 array of shape (N, num_classes) with class probabilities.
+        """
+        raise NotImplementedError
+
+
+class XGBoostPredictor(Predictor):
+    """
+        Predicts with an xgb.Booster through inplace_predict, which reads NumPy arrays directly
+        instead of building a DMatrix. Single rows are copied into a reused float32 buffer.
+    """
+
+    def __init__(self, model, num_features=NUM_FEATURES, nthread=1):
+        """
+            Args:
+                model: Path to a saved XGBoost model, or a loaded xgb.Booster.
+                num_features: Number of features per row.
+                nthread: Number of prediction threads, one is fastest for single rows. None keeps the model setting.
+        """
+        super().__init__(num_features)
+        import xgboost as xgb
+
+        if isinstance(model, xgb.Booster):
+            self.booster = model
+        else:
+            self.booster = xgb.Booster()
+            self.booster.load_model(model)
+
+        if nthread is not None:
+            self.booster.set_param({'nthread': nthread})
+
+    def predict(self, batch):
+        batch = np.ascontiguousarray(batch, dtype=np.float32)
+        return self.booster.inplace_predict(batch)
+
+
+class FlatTreesPredictor(Predictor):
+    """Predicts with a flattened XGBoost model (FlatTrees.py), needs NumPy only and is fastest for single rows."""
+
+    def __init__(self, model_path, num_features=NUM_FEATURES):
+        super().__init__(num_features)
+        from common.FlatTrees import FlatTrees
+
+        self.trees = FlatTrees.load(model_path)
+
+    def predict(self, batch):
+        return self.trees.predict(batch)
+
+
+class KerasPredictor(Predictor):
+    """Predicts with a Keras model (TrainerNN). The model is called directly, which avoids model.predict overhead."""
+
+    def __init__(self, model_path, num_features=NUM_FEATURES):
+        super().__init__(num_features)
+        import tensorflow as tf
+
+        self.model = tf.keras.models.load_model(model_path)
+
+    def predict(self, batch):
+        batch = np.ascontiguousarray(batch, dtype=np.float32)
+        return np.asarray(self.model(batch, training=False), dtype=np.float32)
+
+
+class NumpyMLPPredictor(Predictor):
+    """Predicts with the NumPy forward pass of the exported MLP (NumpyMLP.py)."""
+
+    def __init__(self, model_path, num_features=NUM_FEATURES):
+        super().__init__(num_features)
+        from common.NumpyMLP import NumpyMLP
+
+        self.mlp = NumpyMLP.load(model_path)
+
+    def predict(self, batch):
+        return self.mlp.predict(batch)
+
+
+class TFDFPredictor(Predictor):
+    """Predicts with a TensorFlow Decision Forests SavedModel (TrainerDF), which takes one input per feature column."""
+
+    def __init__(self, model_path, num_features=NUM_FEATURES):
+        super().__init__(num_features)
+        # Keep using Keras 2 - TFDF models are saved with it
+        os.environ.setdefault('TF_USE_LEGACY_KERAS', '1')
+        import tensorflow as tf
+        import tensorflow_decision_forests  # noqa: F401 - registers the TFDF ops needed to load the model
+
+        self.tf = tf
+        self.model = tf.keras.models.load_model(model_path)
+        self.columns = [f"f{i + 1}" for i in range(num_features)]
+
+    def predict(self, batch):
+        batch = np.ascontiguousarray(batch, dtype=np.float32)
+        inputs = {column: self.tf.constant(batch[:, i]) for i, column in enumerate(self.columns)}
+        return np.asarray(self.model(inputs, training=False), dtype=np.float32)
+
+
+class TFLitePredictor(Predictor):
+    """
+        Predicts with a TensorFlow Lite model through the standalone LiteRT / tflite_runtime
+        interpreter when one is installed, else through TensorFlow. The input is resized to the batch size when it changes.
+    """
+
+    def __init__(self, model_path, num_features=NUM_FEATURES, threads=1):
+        super().__init__(num_features)
+        try:
+            from ai_edge_litert.interpreter import Interpreter
+        except ImportError:
+            try:
+                from tflite_runtime.interpreter import Interpreter
+            except ImportError:
+                import tensorflow as tf
+                Interpreter = tf.lite.Interpreter
+
+        self.interpreter = Interpreter(model_path=model_path, num_threads=threads)
+        self.input_index = self.interpreter.get_input_details()[0]['index']
+        self.output_index = self.interpreter.get_output_details()[0]['index']
+        self.batch_size = None
+
+    def predict(self, batch):
+        batch = np.ascontiguousarray(batch, dtype=np.float32)
+        if len(batch) != self.batch_size:
+            self.interpreter.resize_tensor_input(self.input_index, batch.shape)
+            self.interpreter.allocate_tensors()
+            self.batch_size = len(batch)
+
+        self.interpreter.set_tensor(self.input_index, batch)
+        self.interpreter.invoke()
+        return self.interpreter.get_tensor(self.output_index).astype(np.float32, copy=False)
+
+
+class ONNXPredictor(Predictor):
+    """Predicts with an ONNX graph through onnxruntime. The probabilities are the first 2D float output."""
+
+    def __init__(self, model_path, num_features=NUM_FEATURES, threads=1):
+        super().__init__(num_features)
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = threads
+        self.session = ort.InferenceSession(model_path, options, providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def predict(self, batch):
+        batch = np.ascontiguousarray(batch, dtype=np.float32)
+        for output in self.session.run(None, {self.input_name: batch}):
+            if isinstance(output, np.ndarray) and output.ndim == 2 and output.dtype.kind == 'f':
+                return output.astype(np.float32, copy=False)
+        raise ValueError("The ONNX model has no 2D float probability output")
+
+
+BACKENDS = {
+    'xgb': XGBoostPredictor,
+    'xgb-flat': FlatTreesPredictor,
+    'keras': KerasPredictor,
+    'nn-numpy': NumpyMLPPredictor,
+    'tfdf': TFDFPredictor,
+    'tflite': TFLitePredictor,
+    'onnx': ONNXPredictor,
+}
+
+
+def guess_backend(model_path):
+    """
+        Guesses the backend from the model path: '.onnx' files are ONNX, '.keras'/'.h5' files Keras,
+        '.tflite' files TensorFlow Lite, '.trees.npz' files flattened XGBoost models, '.mlp.npz' files
+        NumPy MLPs, directories TFDF SavedModels and anything else an XGBoost model.
+    """
+    if model_path.lower().endswith('.trees.npz'):
+        return 'xgb-flat'
+    if model_path.lower().endswith('.mlp.npz'):
+        return 'nn-numpy'
+    extension = os.path.splitext(model_path)[1].lower()
+    if extension == '.onnx':
+        return 'onnx'
+    if extension == '.tflite':
+        return 'tflite'
+    if extension in ['.keras', '.h5']:
+        return 'keras'
+    if os.path.isdir(model_path):
+        return 'tfdf'
+    return 'xgb'
+
+
+def load_predictor(model_path, backend='auto', num_features=None):
+    """
+        Loads a trained model behind the common predictor interface.
+
+        Args:
+            model_path: Path to the model file or directory.
+            backend: One of BACKENDS, or 'auto' to guess it from the path.
+            num_features: Number of features per row, None takes it from the feature schema of the model.
+
+        Returns:
+            A Predictor with the feature schema of the model in its schema attribute.
+    """
+    if backend == 'auto':
+        backend = guess_backend(model_path)
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend '{backend}', expected one of {', '.join(BACKENDS)}")
+
+    schema = load_model_schema(model_path)
+    if num_features is not None and num_features != schema.num_features:
+        raise ValueError(f"Model {model_path} expects {schema.num_features} features ({schema.name}), not {num_features}")
+
+    predictor = BACKENDS[backend](model_path, num_features=schema.num_features)
+    predictor.schema = schema
+    return predictor
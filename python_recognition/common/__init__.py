@@ -0,0 +1 @@
+"""Code shared by the dataset, training and runner scripts."""
@@ -9,15 +9,34 @@ Features:
 - Real-time webcam feed display.
 - Hand detection using MediaPipe Hands.
 - Frame buffering to capture the most recent usable frame upon key press.
-- Optional cropping and resizing of the hand region.
-- Saving images into 'dataset/{label}/' directories.
-- Key bindings: A-Z for letters, '+' for 'ch', '-' for 'none', ESC to quit.
+  Hands are detected on a worker thread, always on the newest captured frame (frames arriving
+  while it is busy are dropped, see common/Pipeline.py LatestQueue), so the preview never waits
+  for MediaPipe. The detected frames are buffered, a key press is only a buffer lookup.
+- Optional cropping and resizing of the hand region, verified on a worker thread.
+- Saving images into 'dataset/{label}/' directories on a background writer thread.
+  Each image gets a landmark sidecar ('12.jpg' -> '12.landmarks.npz') with the detection made on
+  it, so LandmarksProcessor does not need to run MediaPipe on it again.
+- Burst capture: SPACE toggles saving every Nth distinct frame of the last pressed label,
+  up to a target count per label. Cropping and verification run on a thread pool.
+- Key bindings: A-Z for letters, '+' for 'ch', '-' for 'none', SPACE for burst, ESC to quit.
 """
 
 import os
+import queue
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 
 import cv2
 import mediapipe as mp
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.HandCrop import hand_box
+from common.LandmarkFeatures import NUM_LANDMARKS, Detection, points_to_features, results_to_detections
+from common.LandmarkSidecar import content_digest, save_sidecar
+from common.Pipeline import LatestQueue
 
 
 # --- MediaPipe Hands Configuration Constants ---
@@ -28,7 +47,12 @@ MIN_TRACKING_CONFIDENCE = 0.6
 
 # --- Frame Buffer Configuration Constants ---
 FRAME_BUFFER_SIZE = 5  # Capacity of buffer, when key is pressed the most recent usable frame is used
-frame_buffer = []
+CAPTURE_BUFFERS = 3  # Flipped frames in flight: shown by the loop, queued and detected by the worker
+frame_buffer = None  # FrameRing of the recent detected frames and their detection results, created by loop()
+buffer_lock = threading.Lock()  # Guards frame_buffer, written by the detection worker
+
+# --- Output Configuration Constants ---
+DATASET_DIR = "dataset"  # Images are saved to DATASET_DIR/{label}/{number}.jpg
 
 # --- Cropping Configuration Constants ---
 CROP = True  # If True, crop the hand region and resize to target size. If False, use the whole frame
@@ -36,9 +60,39 @@ TARGET_SIZE = (250, 250)  # Target size for cropped image
 PADDING = 50  # Padding around hand in pixels
 
 
+# --- Burst Capture Configuration Constants ---
+BURST_KEY = 32  # SPACE toggles burst capture of the last pressed label
+BURST_EVERY_N = 3  # Only every Nth detected frame is considered
+BURST_MIN_DIFFERENCE = 0.05  # Min max-abs change of the normalized landmarks from the last burst image
+BURST_TARGET_PER_LABEL = 100  # Burst stops when the label directory holds this many images
+BURST_MAX_PENDING = 4  # Frames waiting in the crop pool, further frames are skipped to keep the preview fluent
+
+# --- Worker Configuration Constants ---
+CROP_WORKERS = 2  # Threads cropping and verifying frames, each with its own MediaPipe Hands
+
+
 # --- Global Variables ---
-# MediaPipe Hands solution instance
+# MediaPipe Hands solution instance, runs on every captured frame
 hands = None
+# Per-thread MediaPipe Hands instances verifying crops (crops are unrelated images), see get_crop_hands
+crop_local = threading.local()
+# Pool cropping, verifying and saving keypress and burst frames, created at startup
+crop_pool = None
+# Images waiting to be encoded and written, see writer_worker
+write_queue = queue.Queue()
+# Last used file number of every label, seeded from disk once by seed_counters
+label_counters = {}
+# Number of images of every label, numbers can have gaps (deleted images), so it is counted separately
+label_images = {}
+counters_lock = threading.Lock()  # Also guards label_images and the burst image features and pending count
+
+# Burst capture state, burst_label is None when burst capture is off
+last_label = None
+burst_label = None
+burst_frame_index = 0
+burst_last_features = None  # Features of the last saved burst image
+burst_pending_features = []  # Features of the burst frames in the crop pool, not saved yet
+burst_pending = 0
 
 
 def setup_mediapipe():
@@ -52,18 +106,31 @@ def setup_mediapipe():
     )
 
     if hands is None:
-        raise "Error: Could not initialize MediaPipe Hands"
+        raise RuntimeError("Error: Could not initialize MediaPipe Hands")
+
+
+def get_crop_hands():
+    """Returns the MediaPipe Hands instance of the current crop worker thread, creating it on first use."""
+    if getattr(crop_local, 'hands', None) is None:
+        crop_local.hands = mp.solutions.hands.Hands(
+            static_image_mode=True,
+            max_num_hands=MAX_NUM_HANDS,
+            min_detection_confidence=MIN_DETECTION_CONFIDENCE,
+        )
+    return crop_local.hands
 
 
 def keydown(key):
     """
-        Handles key press events. Finds the most recent valid frame from the buffer,
-        optionally crops it, and saves it to the dataset with the corresponding label.
+        Handles key press events. Looks up the buffered frames with a detected hand
+        (most recent first) and either saves the newest one, or hands them to the crop
+        pool, which crops, verifies and saves the first usable one.
+        During burst capture, the key only switches the burst label.
 
         Args:
             key: The character corresponding to the pressed key.
     """
-    global hands
+    global last_label, burst_label
 
     try:
         label = key_to_label(key)
@@ -71,98 +138,190 @@ def keydown(key):
     except ValueError as e:
         return
 
-    # Find most recent frame where hands are detected
-    best_frame = None
+    last_label = label
+    if burst_label is not None:
+        burst_label = label
+        reset_burst_features()
+        print(f"Burst capture switched to {label}")
+        return
+
+    # Buffered frames where hands were detected, most recent first. The ring slots are
+    # overwritten by the next frames, so the candidates are copied
+    with buffer_lock:
+        candidates = [(frame_buffer.frames[slot].copy(), frame_buffer.detection(slot))
+                      for slot in frame_buffer.newest_first() if frame_buffer.has_hand[slot]]
 
-    for frame in reversed(frame_buffer):  # Reverse to get the most recent frame
-        results = process_frame(frame)
-        if results.multi_hand_landmarks:
-            best_frame = frame
+    if not candidates:
+        print("No hand detected in the buffered frames")
+        return
 
-            if CROP:
-                best_frame = crop_frame(best_frame, results)
-                if best_frame is None:
-                    continue  # Skip this frame if hand is not in cropped image
-                print("Hand detected in cropped image")
+    if CROP:
+        crop_pool.submit(crop_and_save, candidates, label)
+    else:
+        # Save image
+        save(candidates[0][0], label, candidates[0][1])
 
-            break
 
-    if best_frame is None:
+def crop_and_save(candidates, label):
+    """
+        Runs on the crop pool: crops the candidate frames until the hand is detected
+        in the crop and saves that crop. Keeps hand detection on crops off the capture loop.
+
+        Args:
+            candidates: List of (frame, detection) pairs, the preferred one first.
+            label: The label for this gesture/character.
+
+        Returns:
+            True if an image was saved.
+    """
+    for frame, detection in candidates:
+        cropped = crop_frame(frame, detection.points)
+        if cropped is None:
+            continue  # Skip this frame if hand is not in cropped image
+        print("Hand detected in cropped image")
+
+        # Save image together with the landmarks detected in the crop
+        best_frame, crop_detection = cropped
+        save(best_frame, label, crop_detection)
+        return True
+
+    return False
+
+
+def toggle_burst():
+    """Turns burst capture of the last pressed label on or off."""
+    global burst_label, burst_frame_index
+
+    if burst_label is not None:
+        print(f"Burst capture of {burst_label} stopped")
+        burst_label = None
+        return
+
+    if last_label is None:
+        print("Press a label key first, then toggle burst capture")
+        return
+
+    burst_label = last_label
+    burst_frame_index = 0
+    reset_burst_features()
+    print(f"Burst capture of {burst_label} started (target {BURST_TARGET_PER_LABEL} images)")
+
+
+def burst_due():
+    """Counts a newly detected frame during burst capture, returns True for every BURST_EVERY_N-th one."""
+    global burst_frame_index
+    burst_frame_index += 1
+    return burst_frame_index % BURST_EVERY_N == 0
+
+
+def burst_step(frame, detection):
+    """
+        Called for the due frames of burst capture (see burst_due) with a detected hand, on copies
+        made outside of the frame buffer. A frame that differs enough from the last saved burst image
+        and from the frames still in the crop pool is sent to the crop pool (or saved directly without
+        cropping), until the label reaches BURST_TARGET_PER_LABEL images.
+
+        Args:
+            frame: Copy of the frame, it is saved or cropped without copying again.
+            detection: The Detection of the hand in the frame.
+    """
+    global burst_label, burst_last_features, burst_pending
+
+    with counters_lock:
+        if label_images.get(burst_label, 0) + burst_pending >= BURST_TARGET_PER_LABEL:
+            print(f"Burst capture of {burst_label} reached {BURST_TARGET_PER_LABEL} images")
+            burst_label = None
+            return
+        if burst_pending >= BURST_MAX_PENDING:
+            return  # The pool is busy, skip this frame
+
+    # Skip near-duplicates of the last saved burst image and of the frames still being cropped
+    features = points_to_features(detection.points, frame.shape[1], frame.shape[0])
+    with counters_lock:
+        references = burst_pending_features + ([burst_last_features] if burst_last_features is not None else [])
+        if any(np.abs(features - reference).max() < BURST_MIN_DIFFERENCE for reference in references):
+            return
+
+        if not CROP:
+            burst_last_features = features
+        else:
+            burst_pending += 1
+            burst_pending_features.append(features)
+
+    if not CROP:
+        save(frame, burst_label, detection)
         return
 
-    # Save image
-    save(best_frame, label)
+    crop_pool.submit(crop_and_save, [(frame, detection)], burst_label).add_done_callback(partial(burst_done, burst_label, features))
 
 
-def crop_frame(frame, best_results):
+def burst_done(label, features, future):
+    """
+        Callback of a finished burst crop task. Only a saved crop becomes the reference of the
+        near-duplicate check, a frame whose crop failed does not block similar frames.
+
+        Args:
+            label: The burst label the frame was captured for.
+            features: The features of the frame, see burst_step.
+            future: The finished crop_and_save task.
+    """
+    global burst_pending, burst_last_features
+    with counters_lock:
+        burst_pending -= 1
+        burst_pending_features[:] = [pending for pending in burst_pending_features if pending is not features]
+        if future.exception() is None and future.result() and label == burst_label:
+            burst_last_features = features
+
+
+def reset_burst_features():
+    """Forgets the burst reference images, called when burst capture starts or switches the label."""
+    global burst_last_features
+    with counters_lock:
+        burst_last_features = None
+        burst_pending_features.clear()
+
+
+def crop_frame(frame, points):
     """
         Crops the input frame around the detected hand, resizes it, and verifies
         if the hand is still detectable in the cropped image.
 
         Args:
             frame: The original image frame (NumPy array).
-            results: The MediaPipe Hands results containing landmarks for the frame.
+            points: The normalized landmark coordinates detected in the frame.
 
         Returns:
-            The resized cropped image (NumPy array) if the hand is still detected
-            within it, otherwise None.
+            A tuple (resized cropped image, Detection of the hand in it) if the hand
+            is still detected within it, otherwise None.
     """
-    x_min, y_min, x_max, y_max = get_box(frame, best_results)
+    x_min, y_min, x_max, y_max = get_box(frame, points)
     cropped = frame[y_min:y_max, x_min:x_max]
     resized = cv2.resize(cropped, TARGET_SIZE)
 
     # Check if hand is detected in the cropped image
-    result = hands.process(resized)
-    if not result.multi_hand_landmarks:
+    detections = results_to_detections(get_crop_hands().process(cv2.cvtColor(resized, cv2.COLOR_BGR2RGB)))
+    if not detections:
         print("Hand detected, but not in the cropped image")
         return None
 
-    return resized
+    return resized, detections[0]
 
 
-def get_box(frame, results):
+def get_box(frame, points):
     """
         Calculates a square bounding box around the detected hand landmarks,
         including padding, while staying within the frame boundaries.
 
         Args:
             frame: The image frame (NumPy array).
-            results: The MediaPipe Hands results containing landmarks.
+            points: The normalized landmark coordinates of the hand.
 
         Returns:
             A tuple containing the coordinates (x_min, y_min, x_max, y_max)
             of the calculated square bounding box.
     """
     frame_height, frame_width, _ = frame.shape
-    x_coordinates = []
-    y_coordinates = []
-
-    # Get all landmark coordinates
-    for landmark in results.multi_hand_landmarks[0].landmark:
-        x_coordinates.append(min(int(landmark.x * frame_width), frame_width - 1))
-        y_coordinates.append(min(int(landmark.y * frame_height), frame_height - 1))
-
-    # Calculate bounding box with padding
-    x_min = max(min(x_coordinates) - PADDING, 0)
-    x_max = min(max(x_coordinates) + PADDING, frame_width)
-    y_min = max(min(y_coordinates) - PADDING, 0)
-    y_max = min(max(y_coordinates) + PADDING, frame_height)
-
-    # Make the crop square
-    width = x_max - x_min
-    height = y_max - y_min
-    size = max(width, height)
-
-    # Adjust coordinates to make square crop
-    x_center = (x_min + x_max) // 2
-    y_center = (y_min + y_max) // 2
-
-    x_min = max(x_center - size // 2, 0)
-    x_max = min(x_center + size // 2, frame_width)
-    y_min = max(y_center - size // 2, 0)
-    y_max = min(y_center + size // 2, frame_height)
-
-    return x_min, y_min, x_max, y_max
+    return hand_box(points, frame_width, frame_height, PADDING)
 
 
 def key_to_label(key):
@@ -190,24 +349,67 @@ def key_to_label(key):
     return key
 
 
-def save(frame, label):
+def seed_counters():
+    """
+        Initializes the per-label file counters and image counts from the files already in the
+        dataset directory. Called once at startup, afterwards both are kept in memory.
+    """
+    label_counters.clear()
+    label_images.clear()
+    if not os.path.isdir(DATASET_DIR):
+        return
+
+    for label in os.listdir(DATASET_DIR):
+        directory = os.path.join(DATASET_DIR, label)
+        if not os.path.isdir(directory):
+            continue
+
+        numbers = [int(name[:-4]) for name in os.listdir(directory) if name.endswith('.jpg') and name[:-4].isdigit()]
+        label_counters[label] = max(numbers, default=0)
+        label_images[label] = len(numbers)
+
+
+def save(frame, label, detection=None):
     """
-       Saves the given frame to a subdirectory named after the label within 'dataset'.
-       Files are named sequentially (1.jpg, 2.jpg, ...).
+       Queues the given frame to be saved to a subdirectory named after the label within 'dataset'.
+       Files are named sequentially (1.jpg, 2.jpg, ...), the numbers are assigned immediately
+       and the JPEG is encoded and written by the writer thread.
 
        Args:
-           frame: The image frame (NumPy array) to save.
+           frame: The image frame (NumPy array) to save. It must not be modified afterwards.
            label: The label (directory name) for this gesture/character.
+           detection: The Detection of the hand in the frame, written to the landmark sidecar.
+                      None saves the image without a sidecar.
+
+       Returns:
+           The path the image will be written to.
     """
-    directory = f"dataset/{label}"
-    os.makedirs(directory, exist_ok=True)
+    with counters_lock:
+        label_counters[label] = label_counters.get(label, 0) + 1
+        label_images[label] = label_images.get(label, 0) + 1
+        file_path = f"{DATASET_DIR}/{label}/{label_counters[label]}.jpg"
 
-    file_count = len([name for name in os.listdir(directory)
-                      if os.path.isfile(os.path.join(directory, name))])
+    write_queue.put((file_path, frame, detection))
+    return file_path
 
-    cv2.imwrite(f"{directory}/{file_count + 1}.jpg", frame)
 
-    print(f"Saved image to {directory}/{file_count + 1}.jpg")
+def writer_worker():
+    """Worker thread: encodes and writes the queued images and their sidecars. Stops when it receives None."""
+    while True:
+        item = write_queue.get()
+        if item is None:
+            break
+
+        file_path, frame, detection = item
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        encoded = cv2.imencode('.jpg', frame)[1].tobytes()
+        with open(file_path, 'wb') as f:
+            f.write(encoded)
+        if detection is not None:
+            # The digest ties the sidecar to exactly these JPEG bytes
+            save_sidecar(file_path, detection, frame.shape[1], frame.shape[0], content_digest(encoded))
+
+        print(f"Saved image to {file_path}")
 
 
 def process_frame(frame):
@@ -218,38 +420,86 @@ def process_frame(frame):
            frame: The input frame (NumPy array in BGR format).
 
        Returns:
-           The MediaPipe Hands results object, or None if processing fails.
+           The Detection of the first detected hand, or None if no hand is detected.
     """
     global hands
     # Convert frame to RGB for mediapipe
     frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
 
-    results = hands.process(frame_rgb)
-    print(results.multi_hand_landmarks)
-    return results
+    detections = results_to_detections(hands.process(frame_rgb))
+    return detections[0] if detections else None
+
+
+def detection_worker(frames, free_buffers):
+    """
+        Worker thread: detects the hand in the newest captured frame and buffers the frame with
+        the result. Stops when it receives None.
+
+        Args:
+            frames: LatestQueue of the captured frames.
+            free_buffers: Queue the frames are returned to once they are copied into the ring.
+    """
+    while True:
+        frame = frames.get_latest()
+        if frame is None:
+            break
+
+        detection = process_frame(frame)
+        with buffer_lock:
+            np.copyto(frame_buffer.next_slot(frame.shape), frame)
+            frame_buffer.commit(detection)
+        free_buffers.put(frame)
 
 
 def loop():
     """The main application loop for webcam capture, display, and key handling."""
+    global frame_buffer
     cap = cv2.VideoCapture(0)
 
     if not cap.isOpened():
         print("Error: Could not open webcam.")
         return
 
+    frame_buffer = FrameRing(FRAME_BUFFER_SIZE)
+    raw_frame = None  # Reused by cap.read
+    seen_commits = 0  # Detected frames already handled by burst capture
+
+    # Hand detection runs on a worker on the newest frame, the preview does not wait for it.
+    # The flipped frames cycle through CAPTURE_BUFFERS arrays, allocated on the first frames
+    frames = LatestQueue(maxsize=1)
+    free_buffers = queue.SimpleQueue()
+    for _ in range(CAPTURE_BUFFERS):
+        free_buffers.put(None)
+    detector = threading.Thread(target=detection_worker, args=(frames, free_buffers), daemon=True)
+    detector.start()
+
     while True:
         # Read a frame from the webcam
-        ret, frame = cap.read()
-
-        # Flip frame
-        frame = cv2.flip(frame, 1)
+        ret, raw_frame = cap.read(raw_frame)
 
         if not ret:
             print("Error: Could not read frame.")
             break
 
-        # Add the current frame to the buffer
-        add_to_buffer(frame)
+        # Flip into a free buffer, the detection worker may still hold the previous ones
+        frame = free_buffers.get()
+        if frame is None or frame.shape != raw_frame.shape:
+            frame = np.empty_like(raw_frame)
+        cv2.flip(raw_frame, 1, dst=frame)
+        dropped = frames.put(frame)
+        if dropped is not None:
+            free_buffers.put(dropped)  # Superseded before the worker took it
+
+        # Burst capture considers the newest frame the worker finished since the last iteration.
+        # It is copied out, so the worker is not blocked while burst_step processes it
+        burst_frame = None
+        with buffer_lock:
+            if frame_buffer.commits != seen_commits:
+                seen_commits = frame_buffer.commits
+                if burst_label is not None and burst_due():
+                    burst_frame = frame_buffer.newest_copy()
+        if burst_frame is not None:
+            burst_step(*burst_frame)
 
         # Display the current frame
         cv2.imshow('Webcam Feed', frame)
@@ -263,30 +513,96 @@ def loop():
         # Check for valid capture keys (A-Z, a-z, +, -)
         elif (65 <= key <= 90) or (97 <= key <= 122) or key == 43 or key == 45:  # A-Z, a-z, +, -
             keydown(chr(key))
+        elif key == BURST_KEY:
+            toggle_burst()
 
     # Release resources when the loop ends
+    frames.put(None)
+    detector.join()
     cap.release()
     cv2.destroyAllWindows()
 
 
-def add_to_buffer(frame):
+class FrameRing:
     """
-        Adds a copy of the frame to the end of the frame buffer and removes
-        the oldest frame if the buffer exceeds its maximum size.
-
-        Args:
-            frame: The frame (NumPy array) to add.
+        Fixed-capacity ring buffer of frames and their detection results. The frames live in one
+        (capacity, H, W, 3) uint8 array allocated on the first frame and are written in place.
     """
-    global frame_buffer
-    frame_buffer.append(frame.copy())
-    if len(frame_buffer) > FRAME_BUFFER_SIZE:
-        frame_buffer = frame_buffer[1:]
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.frames = None
+        self.points = np.zeros((capacity, NUM_LANDMARKS, 3))
+        self.handedness = [''] * capacity
+        self.scores = np.zeros(capacity)
+        self.has_hand = np.zeros(capacity, dtype=bool)
+        self.newest = -1  # Slot of the most recent frame
+        self.count = 0  # Number of valid slots
+        self.commits = 0  # Number of frames committed so far
+
+    def next_slot(self, shape):
+        """
+            Returns the slot the next frame is written into. The buffer is (re)allocated
+            on the first frame and when the frame size changes.
+
+            Args:
+                shape: Shape (H, W, 3) of the frames.
+
+            Returns:
+                A view of the slot (NumPy array of the given shape).
+        """
+        if self.frames is None or self.frames.shape[1:] != shape:
+            self.frames = np.empty((self.capacity,) + tuple(shape), dtype=np.uint8)
+            self.newest = -1
+            self.count = 0
+        return self.frames[(self.newest + 1) % self.capacity]
+
+    def commit(self, detection):
+        """
+            Marks the frame written into next_slot as the most recent one.
+
+            Args:
+                detection: The Detection of the hand in the frame, or None.
+        """
+        self.newest = (self.newest + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+        self.commits += 1
+        self.has_hand[self.newest] = detection is not None
+        if detection is not None:
+            self.points[self.newest] = detection.points
+            self.handedness[self.newest] = detection.handedness
+            self.scores[self.newest] = detection.score
+
+    def detection(self, slot):
+        """Returns a copy of the Detection stored in a slot, it stays valid when the slot is overwritten."""
+        return Detection(self.points[slot].copy(), self.handedness[slot], float(self.scores[slot]))
+
+    def newest_copy(self):
+        """Returns copies (frame, Detection) of the most recent frame, or None if no hand was detected in it."""
+        if self.count == 0 or not self.has_hand[self.newest]:
+            return None
+        return self.frames[self.newest].copy(), self.detection(self.newest)
+
+    def newest_first(self):
+        """Generator function to yield the valid slot indices from the most recent frame to the oldest."""
+        for age in range(self.count):
+            yield (self.newest - age) % self.capacity
 
 
 if __name__ == "__main__":
+    crop_pool = ThreadPoolExecutor(max_workers=CROP_WORKERS)
+    writer = threading.Thread(target=writer_worker, daemon=True)
     try:
         setup_mediapipe() # Initialize MediaPipe
+        seed_counters()   # Continue the file numbering of the existing dataset
+        writer.start()    # Start the image writer
         loop()            # Start the main webcam loop
     except Exception as e:
         print(f"An unhandled error occurred: {e}")
+    finally:
+        # Let the workers finish the pending keypresses and images
+        crop_pool.shutdown(wait=True)
+        write_queue.put(None)
+        if writer.is_alive():
+            writer.join()
 
@@ -0,0 +1,96 @@
+"""
+Persistent on-disk cache of hand detections.
+
+Entries are keyed by the SHA-1 of the image file content and a configuration string (MediaPipe
+settings and version). Renaming or moving an image keeps its entry, editing it or changing the
+configuration makes it a miss. Images without a detected hand are cached too, so they are not
+re-run through MediaPipe either.
+
+The raw detection (landmarks, handedness, image size) is stored rather than the features, so
+changing the feature computation or the augmentation does not invalidate the cache.
+
+The cache is a single SQLite file, so it can be updated incrementally and survives crashes
+up to the last commit.
+"""
+
+import hashlib
+import os
+import sqlite3
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.LandmarkFeatures import NUM_LANDMARKS, Detection
+from common.LandmarkSidecar import file_digest  # noqa: F401 - the cache key, re-exported for LandmarksProcessor
+
+
+# Returned by LandmarkCache.get when the entry is not cached (None means "no hand detected")
+MISS = object()
+
+COMMIT_INTERVAL = 256  # Number of new entries written before committing to disk
+
+
+class LandmarkCache:
+    """SQLite-backed mapping (content digest, config) -> (detection, image_width, image_height) or None."""
+
+    def __init__(self, path, config):
+        """
+            Opens (or creates) the cache file.
+
+            Args:
+                path: Path to the SQLite cache file.
+                config: String describing everything besides the image that affects the detection.
+        """
+        self.config = hashlib.sha1(config.encode()).hexdigest()
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("CREATE TABLE IF NOT EXISTS detections (key TEXT PRIMARY KEY, points BLOB, "
+                                "handedness TEXT, score REAL, width INTEGER, height INTEGER)")
+        self.pending = 0
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, digest):
+        return f"{digest}:{self.config}"
+
+    def get(self, digest):
+        """
+            Looks up the detection of an image.
+
+            Returns:
+                The cached tuple (detection, image_width, image_height), None if no hand was detected, or MISS.
+        """
+        row = self.connection.execute("SELECT points, handedness, score, width, height FROM detections WHERE key = ?",
+                                      (self.key(digest),)).fetchone()
+        if row is None:
+            self.misses += 1
+            return MISS
+
+        self.hits += 1
+        points, handedness, score, width, height = row
+        if points is None:
+            return None
+        points = np.frombuffer(points, dtype=np.float32).reshape(NUM_LANDMARKS, 3).astype(np.float64)
+        return Detection(points, handedness, score), width, height
+
+    def put(self, digest, sample):
+        """Stores the detection of an image, a tuple (detection, image_width, image_height) or None if no hand was detected."""
+        if sample is None:
+            values = (None, None, None, None, None)
+        else:
+            detection, width, height = sample
+            values = (np.asarray(detection.points, dtype=np.float32).tobytes(), detection.handedness,
+                      float(detection.score), int(width), int(height))
+        self.connection.execute("INSERT OR REPLACE INTO detections (key, points, handedness, score, width, height) "
+                                "VALUES (?, ?, ?, ?, ?, ?)", (self.key(digest),) + values)
+        self.pending += 1
+        if self.pending >= COMMIT_INTERVAL:
+            self.commit()
+
+    def commit(self):
+        self.connection.commit()
+        self.pending = 0
+
+    def close(self):
+        self.commit()
+        self.connection.close()
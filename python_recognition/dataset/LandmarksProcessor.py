@@ -4,23 +4,57 @@ Processes image datasets of hand gestures to extract and normalize MediaPipe lan
 This script iterates through specified dataset directories, reads image files,
 detects hand landmarks using MediaPipe Hands, preprocesses these landmarks
 (calculates relative coordinates, normalizes), and saves the resulting feature
-vectors along with their corresponding labels into a single CSV file suitable
+vectors along with their corresponding labels into a single dataset suitable
 for training machine learning models.
 
 Input: Image files (.jpg) organized in subdirectories named after labels (e.g., 'a', 'b', 'ch').
-Output: A CSV file ('processed_dataset.csv') with columns: 'label' (numeric index), 'f1'...'f42' (normalized landmark features).
+       Any number of such dataset roots can be given with --dataset, for example the merged
+       directory written by training/MPGestureReco/Sorter.py ('dataset/merged').
+Output: A binary dataset ('processed_dataset.json' header + 'processed_dataset.features.npy' float32
+        features + 'processed_dataset.labels.npy' uint8 label indices into LABELS), see common/DatasetFormat.py.
+        With --csv, also a CSV file with columns: 'label' (numeric index), 'f1'...'f42' (normalized landmark features).
+        --schema selects the feature channels (xy, xyz, xy+hand, xyz+hand, see common/FeatureSchema.py),
+        the schema is recorded in the dataset header.
+
+Usage: python LandmarksProcessor.py [--dataset DIR ...] [--output PATH] [--workers N] [--cache PATH | --no-cache]
+                                    [--csv PATH] [--schema NAME] [--augment N] [--seed S] [--no-mirror] [--restart]
+    --workers N spreads the images across N processes, the output is identical to a serial run.
+    Detections of unchanged images are reused from the landmark cache ('landmarks_cache.sqlite'),
+    so a re-run only runs MediaPipe on new or modified images.
+    Images saved by Collector.py come with a landmark sidecar ('12.landmarks.npz', see
+    common/LandmarkSidecar.py); their detection is read from it without decoding the image,
+    as long as the image content still matches the digest stored in the sidecar.
+    Each image is detected once. The mirrored sample and --augment N randomly rotated, scaled and
+    jittered copies are generated from the landmarks (see common/Augmentation.py), --seed makes them reproducible.
+
+The images are streamed in chunks of CHUNK_SIZE: discover -> detect -> augment -> append to the output,
+so memory use does not grow with the dataset. After every chunk a checkpoint ('<output>.checkpoint.json')
+is written. An interrupted run started again with the same arguments resumes after the last completed
+chunk and produces the same dataset as an uninterrupted run. --restart ignores the checkpoint.
 """
 
-import os
-import copy
+import argparse
 import itertools
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
 
 import cv2
 import mediapipe as mp
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.Augmentation import JITTER, ROTATION_DEGREES, SCALE_RANGE, augment
+from common.DatasetFormat import DatasetWriter, base_path, load_dataset, part_rows, save_csv
+from common.FeatureSchema import DEFAULT_SCHEMA, SCHEMAS, get_schema
+from common.LandmarkFeatures import NUM_LANDMARKS, results_to_detections
+from common.LandmarkSidecar import load_sidecar
+from LandmarkCache import MISS, LandmarkCache, file_digest
 
 
 # --- MediaPipe Hands Configuration Constants ---
-STATIC_IMAGE_MODE = False
+STATIC_IMAGE_MODE = True  # Images are unrelated, tracking between them would make results depend on processing order
 MAX_NUM_HANDS = 1
 MIN_DETECTION_CONFIDENCE = 0.6
 MIN_TRACKING_CONFIDENCE = 0.6
@@ -29,181 +63,435 @@ MIN_TRACKING_CONFIDENCE = 0.6
 LABELS = ['a', 'b', 'c', 'd', 'e', 'f', 'g', 'h', 'ch', 'i', 'j', 'k', 'l', 'm', 'n', 'o', 'p', 'q', 'r', 's', 't', 'u',
           'v', 'w', 'x', 'y', 'z', 'none']
 
+# --- Dataset Configuration Constants ---
+# Default list of directories containing the input image datasets (--dataset overrides it)
+DATASETS = ["./dataset_f_left_100perSign/",
+            "./dataset_f_right_100perSign/",
+            "./dataset_m_left_25perSign/",
+            "./dataset_m_right_25perSign/"]
+
+# Output dataset path (binary format, see common/DatasetFormat.py)
+OUTPUT_FILE = "./processed_dataset.json"
+
+# Landmark cache file path, unchanged images reuse their detections from it
+CACHE_FILE = "./landmarks_cache.sqlite"
+CACHE_VERSION = 2  # Bump when the stored detections change
 
-def run():
+# --- Streaming Constants ---
+CHUNK_SIZE = 512  # Images per chunk, a checkpoint is written after each chunk
+CHECKPOINT_SUFFIX = ".checkpoint.json"
+
+# --- Parallel Processing Constants ---
+WORKER_CHUNK_SIZE = 16  # Number of jobs sent to a worker process at once
+
+# MediaPipe Hands instance of a worker process (set by init_worker)
+worker_hands = None
+
+
+def run(workers=1, cache_file=CACHE_FILE, csv_file=None, copies=0, seed=None, mirror=True,
+        rotation=ROTATION_DEGREES, scale=SCALE_RANGE, jitter=JITTER, datasets=None, output_file=OUTPUT_FILE,
+        restart=False, schema_name=DEFAULT_SCHEMA):
     """
        Main function to orchestrate the dataset processing pipeline.
-       Iterates through datasets, processes images, and writes features to CSV.
-    """
-     # List of directories containing the input image datasets
-    datasets = ["./dataset_f_left_100perSign/",
-                "./dataset_f_right_100perSign/",
-                "./dataset_m_left_25perSign/",
-                "./dataset_m_right_25perSign/"]
-
-    # Output CSV file path
-    output_file = "./processed_dataset.csv"
-
-    # Initialize MediaPipe Hands
-    hands = setup()
-
-    # Open the output file in write mode
-    with open(output_file, "w") as f:
-        # Write the CSV header row (label + 42 features)
-        f.write("label,f1,f2,f3,f4,f5,f6,f7,f8,f9,f10,f11,f12,f13,f14,f15,f16,f17,f18,f19,f20,f21,f22,f23,f24,f25,f26,f27,f28,f29,f30,f31,f32,f33,f34,f35,f36,f37,f38,f39,f40,f41,f42\n")
-
-        # Iterate through each dataset directory path
-        for offset_path in datasets:
-             # Iterate through each label
-            for i, letter in enumerate(LABELS):
-                if not os.path.exists(offset_path + letter):
-                    continue
-
-                # Process each image file found in the label subdirectory
-                for file in get_files(offset_path + letter):
-                    # Extract and preprocess landmarks from the image
-                    for flip in [False, True]:
-                        data = process_image(hands, offset_path + letter + '/' + file, flip)
-                        print(data)
-                        if data:
-                            # Write the label index and the 42 features to the CSV
-                            f.write(f"{i},")
-                            for index, num in enumerate(data):
-                                if(index == len(data) - 1):
-                                    f.write(f"{num}")
-                                else:
-                                    f.write(f"{num},")
-                            f.write("\n")
-                        print(f"Processed {letter}/{file}")
+       Streams the images of the datasets in chunks, detects the hand in every image once, augments
+       the detections and appends the features to the binary dataset, resuming from a checkpoint if present.
+
+       Args:
+           workers: Number of worker processes. 1 processes everything in this process.
+           cache_file: Path to the landmark cache, None disables caching.
+           csv_file: Path to additionally export the dataset as CSV, None skips the export.
+           copies: Number of randomly transformed copies of each (and each mirrored) detection.
+           seed: Seed of the random transforms, None for a random seed.
+           mirror: Also add the mirrored hand of every detection.
+           rotation, scale, jitter: Ranges of the random transforms, see common/Augmentation.py.
+           datasets: List of dataset directories, None uses DATASETS.
+           output_file: Path of the output dataset.
+           restart: Ignore an existing checkpoint and start from the first image.
+           schema_name: Name of the feature schema, see common/FeatureSchema.py.
+    """
+    datasets = DATASETS if datasets is None else datasets
+    schema = get_schema(schema_name)
+    settings = {
+        'datasets': [os.path.abspath(path) for path in datasets],
+        'labels': LABELS,
+        'detection': cache_config(),
+        'chunk_size': CHUNK_SIZE,
+        'feature_schema': schema.to_header(),
+        'augmentation': {'copies': copies, 'seed': seed, 'mirror': mirror,
+                         'rotation': rotation, 'scale': scale, 'jitter': jitter},
+    }
+
+    checkpoint_file = base_path(output_file) + CHECKPOINT_SUFFIX
+    state = None if restart else load_checkpoint(checkpoint_file, settings, datasets, output_file,
+                                                 schema.num_features)
+    if state is None:
+        state = {'files': 0, 'detections': 0, 'rows': 0, 'last_file': None}
+    else:
+        print(f"Resuming after {state['files']} images ({state['rows']} samples) from {checkpoint_file}")
+
+    cache = LandmarkCache(cache_file, cache_config()) if cache_file else None
+    detector = ImageDetector(workers, cache)
+    writer = DatasetWriter(output_file, schema.num_features, LABELS, resume_rows=state['rows'],
+                           feature_schema=schema.to_header())
+
+    try:
+        files = itertools.islice(get_labeled_files(datasets), state['files'], None)
+        for chunk in chunked(files, CHUNK_SIZE):
+            chunk_index = state['files'] // CHUNK_SIZE
+            features, labels, detections = process_chunk(chunk, detector, chunk_index, settings['augmentation'],
+                                                         schema)
+            writer.write(features, labels)
+
+            state['files'] += len(chunk)
+            state['detections'] += detections
+            state['rows'] = writer.rows
+            state['last_file'] = chunk[-1][1]
+
+            # Rows first, then the checkpoint that refers to them
+            writer.flush()
+            if cache is not None:
+                cache.commit()
+            save_checkpoint(checkpoint_file, settings, state)
+            print(f"Processed {state['files']} images, {state['detections']} detections, {state['rows']} samples")
+    finally:
+        detector.close()
+        writer.close()
+        if cache is not None:
+            cache.close()
+
+    print(f"{detector.sidecars} images loaded from landmark sidecars")
+    if cache is not None:
+        print(f"Landmark cache: {cache.hits} reused, {cache.misses} extracted")
+    print(f"{state['detections']} detections -> {state['rows']} samples of schema {schema.name} "
+          f"(mirror={mirror}, copies={copies}, seed={seed})")
+
+    count = writer.finalize()
+    if os.path.exists(checkpoint_file):
+        os.remove(checkpoint_file)
+    print(f"Saved {count} samples to {output_file}")
+
+    if csv_file:
+        features, labels, _ = load_dataset(output_file)
+        save_csv(csv_file, features, labels)
+        print(f"Exported {count} samples to {csv_file}")
+
+
+def process_chunk(chunk, detector, chunk_index, augmentation, schema):
+    """
+        Detects, augments and featurizes one chunk of images.
 
+        Args:
+            chunk: List of tuples (label_index, file_path).
+            detector: The ImageDetector.
+            chunk_index: Position of the chunk in the whole run, seeds the random transforms of the chunk,
+                         so the rows do not depend on where a run was interrupted.
+            augmentation: Dict with the arguments of augment (copies, seed, mirror, rotation, scale, jitter).
+            schema: The FeatureSchema of the rows.
 
-def setup():
+        Returns:
+            A tuple (features, labels, number of detections).
     """
-        Initializes and returns the MediaPipe Hands solution object.
-        Uses constants defined at the module level for configuration.
+    results = detector.detect([file_path for _, file_path in chunk])
+
+    points = np.empty((len(chunk), NUM_LANDMARKS, 3))
+    sizes = np.empty((len(chunk), 2), dtype=np.int64)
+    handedness = []
+    detection_labels = np.empty(len(chunk), dtype=np.uint8)
+    count = 0
+
+    for (label_index, file_path), data in zip(chunk, results):
+        if data is not None:
+            detection, image_width, image_height = data
+            points[count] = detection.points
+            sizes[count] = image_width, image_height
+            handedness.append(detection.handedness)
+            detection_labels[count] = label_index
+            count += 1
+
+    seed = augmentation['seed']
+    features, _, source = augment(points[:count], sizes[:count, 0], sizes[:count, 1], handedness,
+                                  augmentation['copies'], augmentation['mirror'],
+                                  None if seed is None else [seed, chunk_index],
+                                  augmentation['rotation'], augmentation['scale'], augmentation['jitter'], schema)
+    return features, detection_labels[source], count
+
+
+def chunked(iterable, size):
     """
-    mp_hands = mp.solutions.hands
-    hands = mp_hands.Hands(
-        static_image_mode=STATIC_IMAGE_MODE,
-        max_num_hands=MAX_NUM_HANDS,
-        min_detection_confidence=MIN_DETECTION_CONFIDENCE,
-        min_tracking_confidence=MIN_TRACKING_CONFIDENCE,
-    )
-    return hands
+        Generator function to split an iterable into lists of at most size items.
+
+        Yields:
+            Lists of consecutive items.
+    """
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
 
 
-def get_files(directory):
+def load_checkpoint(checkpoint_file, settings, datasets, output_file, num_features):
     """
-        Generator function to yield filenames ending with '.jpg' from a given directory.
+        Reads the checkpoint of an interrupted run.
 
         Args:
-            directory: The path to the directory to scan.
+            checkpoint_file: Path to the checkpoint file.
+            settings: Settings of this run, the checkpoint is only used if it was written with the same ones.
+            datasets: List of dataset directories of this run.
+            output_file: Path of the output dataset, its part files must hold the checkpointed rows.
+            num_features: Number of features of each row.
+
+        Returns:
+            The saved state dict, or None if there is no usable checkpoint.
+    """
+    if not os.path.exists(checkpoint_file):
+        return None
+
+    with open(checkpoint_file) as f:
+        checkpoint = json.load(f)
+
+    if checkpoint.get('settings') != json.loads(json.dumps(settings)):
+        print(f"Ignoring {checkpoint_file}, it was written with different settings")
+        return None
+
+    # The files before the resume point must not have changed
+    state = checkpoint['state']
+    if state['files']:
+        last = next(itertools.islice(get_labeled_files(datasets), state['files'] - 1, None), None)
+        if last is None or last[1] != state['last_file']:
+            print(f"Ignoring {checkpoint_file}, the dataset files changed")
+            return None
+
+    # The rows recorded in the checkpoint must still be in the part files
+    available = part_rows(output_file, num_features)
+    if state['rows'] and (available is None or available < state['rows']):
+        print(f"Ignoring {checkpoint_file}, the part files of {output_file} are missing or hold fewer than "
+              f"{state['rows']} samples, starting over")
+        return None
+
+    return state
+
+
+def save_checkpoint(checkpoint_file, settings, state):
+    """Atomically replaces the checkpoint file."""
+    temp_file = checkpoint_file + '.tmp'
+    with open(temp_file, 'w') as f:
+        json.dump({'settings': settings, 'state': state}, f, indent=2)
+    os.replace(temp_file, checkpoint_file)
+
+
+def get_labeled_files(datasets):
+    """
+        Generator function to yield every image of the datasets together with its label index.
+        The order is deterministic: datasets as listed, labels in LABELS order, files sorted by name.
+
+        Args:
+            datasets: List of dataset directories containing one subdirectory per label.
 
         Yields:
-            Filenames ending with '.jpg'.
+            Tuples (label_index, file_path) where label_index is the position of the label in LABELS.
     """
-    for dir_file in os.listdir(directory):
-        if dir_file.endswith(".jpg"):
-            yield dir_file
+    # Iterate through each dataset directory path
+    for offset_path in datasets:
+        # Iterate through each label
+        for i, letter in enumerate(LABELS):
+            label_path = os.path.join(offset_path, letter)
+            if not os.path.exists(label_path):
+                continue
+
+            for file in get_files(label_path):
+                yield i, os.path.join(label_path, file)
 
 
-def calc_landmark_list(image, landmarks):
+class ImageDetector:
     """
-        Converts MediaPipe landmarks into
-        absolute pixel coordinates based on the image dimensions.
+        Resolves the hand detection of images: from the landmark sidecar, from the landmark cache,
+        or by running MediaPipe (serially or on a process pool that lives across chunks).
+        MediaPipe and the pool are only started once an image actually needs them.
+    """
+
+    def __init__(self, workers=1, cache=None):
+        """
+            Args:
+                workers: Number of worker processes.
+                cache: The LandmarkCache to read from and write to, or None.
+        """
+        self.workers = workers
+        self.cache = cache
+        self.hands = None
+        self.executor = None
+        self.sidecars = 0
+
+    def detect(self, file_paths):
+        """
+            Detects the hands of a list of images.
+
+            Args:
+                file_paths: List of image paths.
+
+            Returns:
+                List with the result of process_image for every image, in the same order.
+        """
+        # The content digest validates the sidecar and keys the cache, the image is read once for both
+        digests = [file_digest(file_path) for file_path in file_paths]
+        results = [from_sidecar(file_path, digest) for file_path, digest in zip(file_paths, digests)]
+        self.sidecars += sum(data is not MISS for data in results)
+
+        missing = [index for index, data in enumerate(results) if data is MISS]
+        if self.cache is not None:
+            for index in missing:
+                results[index] = self.cache.get(digests[index])
+            missing = [index for index in missing if results[index] is MISS]
+
+        for index, data in zip(missing, self.extract([file_paths[index] for index in missing])):
+            results[index] = data
+            if self.cache is not None:
+                self.cache.put(digests[index], data)
+
+        return results
+
+    def extract(self, file_paths):
+        """Runs MediaPipe on the images, returns the results of process_image in the same order."""
+        if not file_paths:
+            return []
+
+        if self.workers <= 1:
+            if self.hands is None:
+                # Initialize MediaPipe Hands
+                self.hands = setup()
+            return [process_image(self.hands, file_path) for file_path in file_paths]
+
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=init_worker)
+        return list(self.executor.map(process_job, file_paths, chunksize=WORKER_CHUNK_SIZE))
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+
+def from_sidecar(file_path, digest=None):
+    """
+        Reads the detection of an image from its landmark sidecar.
 
         Args:
-            image: The input image (NumPy array).
-            landmarks: The LandmarkList object from MediaPipe results.
+            file_path: The path to the image file.
+            digest: SHA-1 digest of the image content, None reads it from the file.
 
         Returns:
-            A list of [x, y] coordinates for each landmark in pixels.
+            The tuple (detection, image_width, image_height), or MISS if the image has to go through MediaPipe.
     """
-    image_width, image_height = image.shape[1], image.shape[0]
+    sidecar = load_sidecar(file_path, digest)
+    return MISS if sidecar is None else sidecar
 
-    landmark_point = []
 
-    # Keypoint
-    for _, landmark in enumerate(landmarks.landmark):
-        landmark_x = min(int(landmark.x * image_width), image_width - 1)
-        landmark_y = min(int(landmark.y * image_height), image_height - 1)
-        # landmark_z = landmark.z
+def cache_config():
+    """Returns the string identifying everything besides the image content that affects the detection."""
+    return (f"v{CACHE_VERSION};mediapipe={mp.__version__};static={STATIC_IMAGE_MODE};hands={MAX_NUM_HANDS};"
+            f"detection={MIN_DETECTION_CONFIDENCE};tracking={MIN_TRACKING_CONFIDENCE}")
 
-        landmark_point.append([landmark_x, landmark_y])
 
-    return landmark_point
+def init_worker():
+    """Initializes the MediaPipe Hands object of a worker process."""
+    global worker_hands
+    worker_hands = setup()
 
 
-def pre_process_landmark(landmark_list):
+def process_job(file_path):
     """
-        Preprocesses the list of landmark pixel coordinates.
-        1. Calculates coordinates relative to the wrist (landmark 0) for translation invariance.
-        2. Flattens the list of [x, y] pairs into a single vector [x0, y0, x1, y1, ...].
-        3. Normalizes the vector by dividing all values by the maximum absolute value
+        Processes one image inside a worker process.
 
         Args:
-            landmark_list: A list of [x, y] pixel coordinates for the hand landmarks.
+            file_path: The path to the image file.
 
         Returns:
-            A list of 42 floating-point numbers representing the normalized feature vector.
+            The result of process_image.
     """
-    temp_landmark_list = copy.deepcopy(landmark_list)
+    return process_image(worker_hands, file_path)
 
-    # Convert to relative coordinates
-    base_x, base_y = 0, 0
-    for index, landmark_point in enumerate(temp_landmark_list):
-        if index == 0:
-            base_x, base_y = landmark_point[0], landmark_point[1]
 
-        temp_landmark_list[index][0] = temp_landmark_list[index][0] - base_x
-        temp_landmark_list[index][1] = temp_landmark_list[index][1] - base_y
-
-    # Convert to a one-dimensional list
-    temp_landmark_list = list(
-        itertools.chain.from_iterable(temp_landmark_list))
+def setup():
+    """
+        Initializes and returns the MediaPipe Hands solution object.
+        Uses constants defined at the module level for configuration.
+    """
+    mp_hands = mp.solutions.hands
+    hands = mp_hands.Hands(
+        static_image_mode=STATIC_IMAGE_MODE,
+        max_num_hands=MAX_NUM_HANDS,
+        min_detection_confidence=MIN_DETECTION_CONFIDENCE,
+        min_tracking_confidence=MIN_TRACKING_CONFIDENCE,
+    )
+    return hands
 
-    # Normalization
-    max_value = max(list(map(abs, temp_landmark_list)))
 
-    def normalize_(n):
-        return n / max_value
+def get_files(directory):
+    """
+        Generator function to yield filenames ending with '.jpg' from a given directory, sorted by name.
 
-    temp_landmark_list = list(map(normalize_, temp_landmark_list))
+        Args:
+            directory: The path to the directory to scan.
 
-    return temp_landmark_list
+        Yields:
+            Filenames ending with '.jpg'.
+    """
+    for dir_file in sorted(os.listdir(directory)):
+        if dir_file.endswith(".jpg"):
+            yield dir_file
 
 
-def process_image(hands_arg, file_path, flip=False):
+def process_image(hands_arg, file_path):
     """
-        Loads an image file, detects hand landmarks using MediaPipe, calculates
-        pixel coordinates, preprocesses them (relative coords, normalization),
-        and returns the final feature vector.
+        Loads an image file and detects the hand landmarks using MediaPipe.
 
         Args:
             hands_arg: The initialized MediaPipe Hands object.
             file_path: The path to the image file.
-            flip: Flips the image if True.
 
         Returns:
-            A list of 42 normalized landmark features if a hand is detected,
-            otherwise None.
+            A tuple (detection, image_width, image_height) with the Detection of the first hand,
+            or None if no hand is detected.
     """
     img = cv2.imread(file_path)
-    if flip:
-        img = cv2.flip(img, 1)
     img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
 
-    results = hands_arg.process(img)
+    detections = results_to_detections(hands_arg.process(img))
 
-    if not results.multi_hand_landmarks:
+    if not detections:
         print(f"No hand landmarks detected: {file_path}")
         return None
 
-    for hand_landmarks, handedness in zip(results.multi_hand_landmarks, results.multi_handedness):
-        landmark_list = calc_landmark_list(img, hand_landmarks)
-        return pre_process_landmark(landmark_list)
+    return detections[0], img.shape[1], img.shape[0]
 
 
 if __name__ == "__main__":
-    run()
-
+    parser = argparse.ArgumentParser(description="Extracts normalized hand landmarks from the image datasets.")
+    parser.add_argument('--dataset', action='append', default=None, metavar='DIR',
+                        help="Dataset directory with one subdirectory per label, can be repeated "
+                             "(default: the DATASETS list, e.g. --dataset dataset/merged for the Sorter output)")
+    parser.add_argument('--output', default=OUTPUT_FILE, help=f"Output dataset (default: {OUTPUT_FILE})")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Number of worker processes, each with its own MediaPipe Hands (default: 1)")
+    parser.add_argument('--cache', default=CACHE_FILE, help=f"Landmark cache file (default: {CACHE_FILE})")
+    parser.add_argument('--no-cache', action='store_true', help="Run MediaPipe on every image, ignore the cache")
+    parser.add_argument('--csv', nargs='?', const="./processed_dataset.csv", default=None,
+                        help="Also export the dataset as CSV (default path: ./processed_dataset.csv)")
+    parser.add_argument('--schema', default=DEFAULT_SCHEMA, choices=list(SCHEMAS),
+                        help=f"Feature channels of the samples (default: {DEFAULT_SCHEMA})")
+    parser.add_argument('--augment', type=int, default=0, metavar='N',
+                        help="Randomly transformed copies of each (and each mirrored) detection (default: 0)")
+    parser.add_argument('--seed', type=int, default=None, help="Seed of the random transforms (default: random)")
+    parser.add_argument('--no-mirror', action='store_true', help="Do not add the mirrored hands")
+    parser.add_argument('--rotation', type=float, default=ROTATION_DEGREES,
+                        help=f"Max rotation in degrees (default: {ROTATION_DEGREES})")
+    parser.add_argument('--scale', type=float, default=SCALE_RANGE,
+                        help=f"Max relative change of the x/y scale (default: {SCALE_RANGE})")
+    parser.add_argument('--jitter', type=float, default=JITTER,
+                        help=f"Landmark noise relative to the hand size (default: {JITTER})")
+    parser.add_argument('--restart', action='store_true', help="Ignore the checkpoint of an interrupted run")
+    args = parser.parse_args()
+
+    run(args.workers, None if args.no_cache else args.cache, args.csv, args.augment, args.seed, not args.no_mirror,
+        args.rotation, args.scale, args.jitter, args.dataset, args.output, args.restart, args.schema)
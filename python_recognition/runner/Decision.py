@@ -0,0 +1,159 @@
+"""
+Streaming decision layer for live recognition.
+
+Instead of printing the argmax of every frame, the probability vectors of the last frames are
+kept in a ring buffer and a letter is emitted only once it is stable: the averaged probability
+of the winning class reaches a confidence threshold and it won in enough of the buffered frames.
+The same letter is not emitted again until a different decision (or no hand) interrupts it.
+
+The layer can also tell the runner to skip the model entirely when the wrist-normalized features
+barely moved since the last classified frame; the previous probabilities are reused instead.
+
+With several hands in the frame, HandDecisions keeps one layer per hand.
+"""
+
+import numpy as np
+
+
+# --- Decision Configuration Constants ---
+WINDOW_SIZE = 8  # Number of recent probability vectors kept
+MIN_STABLE_FRAMES = 5  # Frames in the window in which the winning class must be the argmax
+MIN_CONFIDENCE = 0.6  # Minimal averaged probability of the winning class
+MOTION_THRESHOLD = 0.02  # Max absolute feature change below which the model is not run again
+
+
+class DecisionLayer:
+    """Ring buffer of recent probability vectors with stability, confidence and motion gating."""
+
+    def __init__(self, num_classes, window_size=WINDOW_SIZE, min_stable_frames=MIN_STABLE_FRAMES,
+                 min_confidence=MIN_CONFIDENCE, motion_threshold=MOTION_THRESHOLD):
+        """
+            Args:
+                num_classes: Length of the probability vectors.
+                window_size: Number of recent probability vectors kept.
+                min_stable_frames: Number of buffered frames the winning class must win.
+                min_confidence: Minimal averaged probability of the winning class.
+                motion_threshold: Max absolute feature change to skip inference, 0 disables skipping.
+        """
+        self.window = np.zeros((window_size, num_classes), dtype=np.float32)
+        self.min_stable_frames = min(min_stable_frames, window_size)
+        self.min_confidence = min_confidence
+        self.motion_threshold = motion_threshold
+
+        self.index = 0  # Next slot of the ring buffer
+        self.filled = 0
+        self.last_features = None
+        self.last_probabilities = None
+        self.emitted = None
+
+        self.inferences = 0
+        self.skipped = 0
+
+    def should_infer(self, features):
+        """
+            Checks whether the features moved enough since the last classified frame to run the model.
+
+            Args:
+                features: The normalized feature vector of the current frame.
+
+            Returns:
+                False if the previous probabilities can be reused (call reuse()), True otherwise.
+        """
+        if self.last_features is None or self.motion_threshold <= 0:
+            return True
+        return np.abs(features - self.last_features).max() > self.motion_threshold
+
+    def update(self, features, probabilities):
+        """
+            Adds the model output of a classified frame.
+
+            Args:
+                features: The feature vector the model was run on.
+                probabilities: The predicted class probabilities.
+
+            Returns:
+                The newly decided class index, or None if nothing new is decided.
+        """
+        self.inferences += 1
+        self.last_features = np.array(features, dtype=np.float32)
+        self.last_probabilities = probabilities
+        return self._push(probabilities)
+
+    def reuse(self):
+        """
+            Repeats the probabilities of the last classified frame for a frame that was skipped.
+
+            Returns:
+                The newly decided class index, or None if nothing new is decided.
+        """
+        self.skipped += 1
+        return self._push(self.last_probabilities)
+
+    def reset(self):
+        """Clears the buffer, e.g. when the hand is lost. The next stable letter is emitted even if repeated."""
+        self.index = 0
+        self.filled = 0
+        self.last_features = None
+        self.last_probabilities = None
+        self.emitted = None
+
+    def _push(self, probabilities):
+        self.window[self.index] = probabilities
+        self.index = (self.index + 1) % len(self.window)
+        self.filled = min(self.filled + 1, len(self.window))
+
+        if self.filled < self.min_stable_frames:
+            return None
+
+        window = self.window[:self.filled]
+        mean = window.mean(axis=0)
+        winner = int(np.argmax(mean))
+        votes = int(np.count_nonzero(np.argmax(window, axis=1) == winner))
+
+        if mean[winner] < self.min_confidence or votes < self.min_stable_frames or winner == self.emitted:
+            return None
+
+        self.emitted = winner
+        return winner
+
+
+class HandDecisions:
+    """
+        One DecisionLayer per hand for frames with several hands. Hands are keyed by their handedness
+        label ('Left', 'Right'; repeated labels get a '#2', '#3' suffix in detection order).
+    """
+
+    def __init__(self, num_classes, **options):
+        """
+            Args:
+                num_classes: Length of the probability vectors.
+                options: Keyword arguments of DecisionLayer.
+        """
+        self.num_classes = num_classes
+        self.options = options
+        self.layers = {}
+
+    def get(self, key):
+        """Returns the DecisionLayer of a hand, created on first use."""
+        if key not in self.layers:
+            self.layers[key] = DecisionLayer(self.num_classes, **self.options)
+        return self.layers[key]
+
+    def keep(self, keys):
+        """Resets the layers of the hands that are not in the current frame."""
+        for key, layer in self.layers.items():
+            if key not in keys:
+                layer.reset()
+
+    def reset(self):
+        """Resets every layer, e.g. when no hand is detected."""
+        for layer in self.layers.values():
+            layer.reset()
+
+    @property
+    def inferences(self):
+        return sum(layer.inferences for layer in self.layers.values())
+
+    @property
+    def skipped(self):
+        return sum(layer.skipped for layer in self.layers.values())
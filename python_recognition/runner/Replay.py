@@ -0,0 +1,136 @@
+"""
+Headless replay of a video file or a directory of frames through the live recognition path.
+
+Every frame goes through the same detect -> featurize -> classify code as Runner.py (including
+the horizontal flip of the webcam loop, unless --no-flip), without any window. The per-frame
+predictions are written to a CSV file and the throughput and latency percentiles are printed,
+so the script doubles as a repeatable end-to-end benchmark.
+
+Usage: python Replay.py SOURCE [--output predictions.csv] [--smoothing] [--no-flip] [--limit N]
+                         [--model PATH] [--backend xgb|xgb-flat|keras|nn-numpy|tfdf|tflite|onnx]
+                         [--roi] [--max-hands N]
+    SOURCE is a video file or a directory of .jpg/.png frames (processed in file name order).
+"""
+
+import argparse
+import os
+import time
+
+import cv2
+import numpy as np
+
+from Decision import HandDecisions
+from Runner import (LABELS, MAX_NUM_HANDS, MODEL_BACKEND, MODEL_PATH, add_model_arguments, classify, detect,
+                    format_predictions, setup)
+
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+PERCENTILES = [50, 90, 95, 99]
+
+
+def read_frames(source):
+    """
+        Generator function to yield the frames of a video file or a directory of images.
+
+        Args:
+            source: Path to a video file or a directory of images.
+
+        Yields:
+            Frames as BGR NumPy arrays.
+    """
+    if os.path.isdir(source):
+        for file in sorted(os.listdir(source)):
+            if file.lower().endswith(IMAGE_EXTENSIONS):
+                frame = cv2.imread(os.path.join(source, file))
+                if frame is not None:
+                    yield frame
+        return
+
+    cap = cv2.VideoCapture(source)
+    if not cap.isOpened():
+        raise IOError(f"Could not open video {source}")
+
+    try:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            yield frame
+    finally:
+        cap.release()
+
+
+def format_latencies(name, seconds):
+    latencies = np.asarray(seconds) * 1000
+    values = ' '.join(f"p{p}={np.percentile(latencies, p):.2f}" for p in PERCENTILES)
+    return f"{name:<10} mean={latencies.mean():.2f} {values} ms"
+
+
+def run(source, output_file, smoothing=False, flip=True, limit=None, model_path=MODEL_PATH, backend=MODEL_BACKEND,
+        roi=False, max_hands=MAX_NUM_HANDS):
+    hands, model = setup(model_path, backend, roi, max_hands)
+    decision = HandDecisions(len(LABELS)) if smoothing else None
+
+    timings = {'decode': [], 'detect': [], 'classify': [], 'total': []}
+    frames_with_hand = 0
+
+    with open(output_file, 'w') as f:
+        f.write("frame,hands,labels,latency_ms\n")
+
+        start = time.perf_counter()
+        frames = read_frames(source)
+        index = 0
+        while limit is None or index < limit:
+            frame_start = time.perf_counter()
+            frame = next(frames, None)
+            if frame is None:
+                break
+            if flip:
+                frame = cv2.flip(frame, 1)
+            detect_start = time.perf_counter()
+
+            results = detect(frame, hands)
+            classify_start = time.perf_counter()
+
+            predicted = classify(frame, results, model, decision)
+            end = time.perf_counter()
+
+            timings['decode'].append(detect_start - frame_start)
+            timings['detect'].append(classify_start - detect_start)
+            timings['classify'].append(end - classify_start)
+            timings['total'].append(end - frame_start)
+
+            num_hands = len(results.multi_hand_landmarks or [])
+            frames_with_hand += num_hands > 0
+            f.write(f"{index},{num_hands},{format_predictions(predicted)},{(end - frame_start) * 1000:.3f}\n")
+            index += 1
+
+        elapsed = time.perf_counter() - start
+
+    if index == 0:
+        print(f"No frames read from {source}")
+        return
+
+    print(f"Frames: {index} ({frames_with_hand} with a hand) in {elapsed:.2f} s -> {index / elapsed:.1f} FPS")
+    for name, seconds in timings.items():
+        print(format_latencies(name, seconds))
+    if decision is not None:
+        print(f"Model calls: {decision.inferences}, skipped (static hand): {decision.skipped}")
+    if roi:
+        print(f"Detections on ROI: {hands.roi_frames}, on full frame: {hands.full_frames}")
+    print(f"Predictions written to {output_file}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('source', help="Video file or directory of frames")
+    parser.add_argument('--output', default='predictions.csv', help="Per-frame predictions CSV (default: predictions.csv)")
+    parser.add_argument('--smoothing', action='store_true',
+                        help="Report stable decisions of the decision layer instead of every frame's prediction")
+    parser.add_argument('--no-flip', action='store_true', help="Do not mirror the frames like the webcam loop does")
+    parser.add_argument('--limit', type=int, default=None, help="Process at most N frames")
+    add_model_arguments(parser)
+    args = parser.parse_args()
+
+    run(args.source, args.output, args.smoothing, not args.no_flip, args.limit, args.model, args.backend, args.roi,
+        args.max_hands)
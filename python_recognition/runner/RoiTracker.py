@@ -0,0 +1,101 @@
+"""
+Region-of-interest hand tracking for the live loop.
+
+Once a hand is found, the next frame is not fed to MediaPipe in full: only a padded square
+around the previous landmarks (of all detected hands) is cropped and downscaled to at most ROI_SIZE pixels. The landmarks
+found in the crop are mapped back to full-frame coordinates, so the rest of the pipeline does not
+notice the difference. When the hand is lost in the crop, the same frame is processed in full.
+
+RoiTracker.process has the same interface as mediapipe Hands.process and can replace it.
+"""
+
+import cv2
+import numpy as np
+
+from common.HandCrop import hand_box, hand_extent
+from common.LandmarkFeatures import landmarks_to_points
+
+
+# --- ROI Configuration Constants ---
+ROI_SIZE = 256  # Max side of the downscaled crop in pixels
+ROI_PADDING_RATIO = 0.35  # Padding around the hand relative to its size, leaves room for movement
+
+
+class RoiTracker:
+    """Runs hand detection on a crop around the previous hand, falling back to the full frame."""
+
+    def __init__(self, full_hands, roi_hands, roi_size=ROI_SIZE, padding_ratio=ROI_PADDING_RATIO):
+        """
+            Args:
+                full_hands: MediaPipe Hands used on full frames (to acquire the hand).
+                roi_hands: MediaPipe Hands used on crops. A separate instance keeps the tracking
+                           state of each one consistent with the images it sees.
+                roi_size: Max side of the downscaled crop in pixels.
+                padding_ratio: Padding around the hand relative to its size.
+        """
+        self.full_hands = full_hands
+        self.roi_hands = roi_hands
+        self.roi_size = roi_size
+        self.padding_ratio = padding_ratio
+
+        self.box = None  # (x_min, y_min, x_max, y_max) of the next crop, None when not tracking
+        self.roi_frames = 0
+        self.full_frames = 0
+
+    def process(self, frame_rgb):
+        """
+            Detects hands in an RGB frame.
+
+            Args:
+                frame_rgb: The full frame (NumPy array in RGB format).
+
+            Returns:
+                MediaPipe Hands results with landmarks normalized to the full frame.
+        """
+        frame_height, frame_width = frame_rgb.shape[:2]
+
+        if self.box is not None:
+            results = self._process_roi(frame_rgb)
+            if results.multi_hand_landmarks:
+                self._update_box(results, frame_width, frame_height)
+                return results
+            self.box = None  # Tracking lost
+
+        self.full_frames += 1
+        results = self.full_hands.process(frame_rgb)
+        if results.multi_hand_landmarks:
+            self._update_box(results, frame_width, frame_height)
+        return results
+
+    def _process_roi(self, frame_rgb):
+        x_min, y_min, x_max, y_max = self.box
+        crop = frame_rgb[y_min:y_max, x_min:x_max]
+        crop_height, crop_width = crop.shape[:2]
+
+        # Downscale with a uniform scale, the normalized landmarks do not depend on it
+        scale = self.roi_size / max(crop_width, crop_height)
+        if scale < 1:
+            crop = cv2.resize(crop, (max(round(crop_width * scale), 1), max(round(crop_height * scale), 1)),
+                              interpolation=cv2.INTER_AREA)
+
+        self.roi_frames += 1
+        results = self.roi_hands.process(crop)
+
+        if results.multi_hand_landmarks:
+            frame_height, frame_width = frame_rgb.shape[:2]
+            for hand_landmarks in results.multi_hand_landmarks:
+                for landmark in hand_landmarks.landmark:
+                    landmark.x = (landmark.x * crop_width + x_min) / frame_width
+                    landmark.y = (landmark.y * crop_height + y_min) / frame_height
+                    landmark.z = landmark.z * crop_width / frame_width
+
+        return results
+
+    def _update_box(self, results, frame_width, frame_height):
+        # One box around all hands, a hand entering the frame is found once tracking falls back to the full frame
+        points = np.concatenate([landmarks_to_points(hand_landmarks) for hand_landmarks in results.multi_hand_landmarks])
+        padding = int(hand_extent(points, frame_width, frame_height) * self.padding_ratio)
+        box = hand_box(points, frame_width, frame_height, padding)
+
+        # A degenerate box (hand at the border) cannot be cropped
+        self.box = box if box[2] - box[0] > 1 and box[3] - box[1] > 1 else None
@@ -1,95 +1,189 @@
-import copy
-import itertools
+import argparse
+import os
+import sys
+import threading
+import time
 
 import cv2
 import mediapipe as mp
-import xgboost as xgb
 import numpy as np
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.FeatureSchema import compute_features
+from common.LandmarkFeatures import results_to_detections
+from common.Pipeline import LatestQueue, StageStats
+from common.Predictors import BACKENDS, load_predictor
+from Decision import HandDecisions
+from RoiTracker import RoiTracker
+
 # MediaPipe Hands constants
 STATIC_IMAGE_MODE = False
-MAX_NUM_HANDS = 1
+MAX_NUM_HANDS = 1  # Default of --max-hands, all hands of a frame are classified in one model call
 MIN_DETECTION_CONFIDENCE = 0.6
 MIN_TRACKING_CONFIDENCE = 0.6
 
 MODEL_PATH = "model"
+MODEL_BACKEND = "auto"  # One of common.Predictors.BACKENDS, 'auto' guesses it from MODEL_PATH
+
+# Pipelined mode constants
+CAPTURE_QUEUE_SIZE = 2  # Frames waiting for inference, older frames are dropped
+REPORT_INTERVAL = 5.0  # Seconds between statistics reports
 
 LABELS = ['a', 'b', 'c', 'd', 'e', 'f', 'g', 'h', 'ch', 'i', 'j', 'k', 'l', 'm', 'n', 'o', 'p', 'q', 'r', 's', 't', 'u',
           'v', 'w', 'x', 'y', 'z', 'none']
 
-def calc_landmark_list(image, landmarks):
-    image_width, image_height = image.shape[1], image.shape[0]
 
-    landmark_point = []
+def detect(frame, hands):
+    frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    return hands.process(frame_rgb)
 
-    # Keypoint
-    for _, landmark in enumerate(landmarks.landmark):
-        landmark_x = min(int(landmark.x * image_width), image_width - 1)
-        landmark_y = min(int(landmark.y * image_height), image_height - 1)
-        # landmark_z = landmark.z
 
-        landmark_point.append([landmark_x, landmark_y])
+def classify(frame, results, model, decision=None):
+    """
+        Classifies the detected hands of a frame. All hands are featurized into one (k, num_features)
+        matrix and classified in a single batched model call.
 
-    return landmark_point
+        Without decision layers every hand yields its argmax label. With them (HandDecisions, one layer
+        per hand), the model is skipped for hands that barely moved and a label is only returned once
+        the decision of that hand becomes stable. The features follow the feature schema of the model (model.schema).
 
+        Returns:
+            List of (handedness, label) tuples to report for this frame.
+    """
+    return classify_batch([(frame, results, decision)], model)[0]
 
-def pre_process_landmark(landmark_list):
-    temp_landmark_list = copy.deepcopy(landmark_list)
 
-    # Convert to relative coordinates
-    base_x, base_y = 0, 0
-    for index, landmark_point in enumerate(temp_landmark_list):
-        if index == 0:
-            base_x, base_y = landmark_point[0], landmark_point[1]
+def classify_batch(items, model):
+    """
+        Classifies the detected hands of several frames (e.g. of several streams) in a single model call.
 
-        temp_landmark_list[index][0] = temp_landmark_list[index][0] - base_x
-        temp_landmark_list[index][1] = temp_landmark_list[index][1] - base_y
+        Args:
+            items: List of tuples (frame, results, decision) where decision is the HandDecisions of
+                   the stream the frame comes from, or None.
+            model: The Predictor.
 
-    # Convert to a one-dimensional list
-    temp_landmark_list = list(
-        itertools.chain.from_iterable(temp_landmark_list))
+        Returns:
+            A list with the (handedness, label) tuples of every item, see classify.
+    """
+    plans = []
+    rows = []
+    num_rows = 0
 
-    # Normalization
-    max_value = max(list(map(abs, temp_landmark_list)))
+    for frame, results, decision in items:
+        detections = results_to_detections(results)
+        if not detections:
+            if decision is not None:
+                decision.reset()
+            plans.append(None)
+            continue
 
-    def normalize_(n):
-        return n / max_value
+        points = np.stack([detection.points for detection in detections])
+        handedness = [detection.handedness for detection in detections]
+        features = compute_features(model.schema, points, frame.shape[1], frame.shape[0], handedness)
 
-    temp_landmark_list = list(map(normalize_, temp_landmark_list))
+        if decision is None:
+            layers = None
+            infer = list(range(len(detections)))
+        else:
+            keys = hand_keys(handedness)
+            decision.keep(keys)
+            layers = [decision.get(key) for key in keys]
+            # Only the hands that moved are run through the model
+            infer = [i for i, layer in enumerate(layers) if layer.should_infer(features[i])]
 
-    return temp_landmark_list
+        plans.append((handedness, features, layers, infer, num_rows))
+        rows.append(features[infer])
+        num_rows += len(infer)
 
+    probabilities = model.predict(np.concatenate(rows)) if num_rows else None
 
-def process(frame, hands, model):
-    frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    results = hands.process(frame_rgb)
+    predictions = []
+    for plan in plans:
+        if plan is None:
+            predictions.append([])
+            continue
 
-    if results.multi_hand_landmarks:
-        for hand_landmarks in results.multi_hand_landmarks:
-            landmark_list = calc_landmark_list(frame, hand_landmarks)
-            lndmrks = pre_process_landmark(landmark_list)
-            prediction = model.predict(xgb.DMatrix([lndmrks]))
-            predicted_labels = np.argmax(prediction, axis=1)
-            # Display predictions
-            #print("Predicted Probabilities:\n", prediction)
-            print("Predicted Classes:\n", LABELS[predicted_labels[0]])
+        handedness, features, layers, infer, offset = plan
+        hand_probabilities = dict(zip(infer, probabilities[offset:offset + len(infer)])) if infer else {}
 
+        if layers is None:
+            predictions.append([(hand, LABELS[np.argmax(hand_probabilities[i])]) for i, hand in enumerate(handedness)])
+            continue
 
-def run():
-    cap = cv2.VideoCapture(0)
-    if not cap.isOpened():
-        print("Error: Could not open webcam.")
-        return
+        predicted = []
+        for i, (hand, layer) in enumerate(zip(handedness, layers)):
+            decided = layer.update(features[i], hand_probabilities[i]) if i in hand_probabilities else layer.reuse()
+            if decided is not None:
+                predicted.append((hand, LABELS[decided]))
+        predictions.append(predicted)
+
+    return predictions
+
+
+def hand_keys(handedness):
+    """Returns a key per hand: its handedness label, repeated labels get a '#2', '#3' suffix."""
+    keys = []
+    for hand in handedness:
+        key = hand or 'Hand'
+        count = sum(existing.split('#')[0] == key for existing in keys)
+        keys.append(key if count == 0 else f"{key}#{count + 1}")
+    return keys
+
+
+def format_predictions(predicted):
+    """Formats (handedness, label) tuples as 'Right:a Left:b'."""
+    return ' '.join(f"{hand}:{label}" if hand else label for hand, label in predicted)
+
+
+def process(frame, hands, model, decision=None):
+    results = detect(frame, hands)
 
-    hands = mp.solutions.hands.Hands(
+    for hand, label in classify(frame, results, model, decision):
+        # Display predictions
+        print(f"Predicted Classes ({hand}):\n", label)
+
+
+def create_hands(max_num_hands=MAX_NUM_HANDS):
+    return mp.solutions.hands.Hands(
         static_image_mode=STATIC_IMAGE_MODE,
-        max_num_hands=MAX_NUM_HANDS,
+        max_num_hands=max_num_hands,
         min_detection_confidence=MIN_DETECTION_CONFIDENCE,
         min_tracking_confidence=MIN_TRACKING_CONFIDENCE,
     )
 
-    model = xgb.Booster()
-    model.load_model(MODEL_PATH)
+
+def setup(model_path=MODEL_PATH, backend=MODEL_BACKEND, roi=False, max_hands=MAX_NUM_HANDS):
+    """
+        Creates the hand detector and loads the model.
+
+        Args:
+            model_path: Trained model file or directory.
+            backend: Model backend, see common.Predictors.load_predictor.
+            roi: If True, hands are tracked on a downscaled crop around the previous detection (see RoiTracker.py).
+            max_hands: Maximum number of hands detected per frame.
+
+        Returns:
+            A tuple (hands, model) where hands has the interface of mediapipe Hands.
+    """
+    if roi:
+        hands = RoiTracker(create_hands(max_hands), create_hands(max_hands))
+    else:
+        hands = create_hands(max_hands)
+
+    model = load_predictor(model_path, backend)
+    print(f"Model {model_path}: feature schema {model.schema.name} ({model.schema.num_features} features)")
+
+    return hands, model
+
+
+def run(smoothing=False, model_path=MODEL_PATH, backend=MODEL_BACKEND, roi=False, max_hands=MAX_NUM_HANDS):
+    cap = cv2.VideoCapture(0)
+    if not cap.isOpened():
+        print("Error: Could not open webcam.")
+        return
+
+    hands, model = setup(model_path, backend, roi, max_hands)
+    decision = HandDecisions(len(LABELS)) if smoothing else None
 
     while True:
         ret, frame = cap.read()
@@ -98,7 +192,7 @@ def run():
             break
         frame = cv2.flip(frame, 1)
 
-        process(frame, hands, model)
+        process(frame, hands, model, decision)
 
         cv2.imshow('Webcam Feed', frame)
         key = cv2.waitKey(1)
@@ -109,4 +203,125 @@ def run():
     cv2.destroyAllWindows()
 
 
-run()
+def run_pipelined(smoothing=False, model_path=MODEL_PATH, backend=MODEL_BACKEND, roi=False, max_hands=MAX_NUM_HANDS):
+    """
+        Runs capture, inference and display concurrently.
+
+        A capture thread reads and flips frames into a bounded drop-oldest queue, an inference
+        thread always takes the newest frame from it, and the main thread displays the newest
+        captured frame with the latest prediction. Per-stage latency and FPS, the end-to-end
+        latency (capture to prediction) and the number of dropped frames are printed periodically.
+    """
+    cap = cv2.VideoCapture(0)
+    if not cap.isOpened():
+        print("Error: Could not open webcam.")
+        return
+
+    hands, model = setup(model_path, backend, roi, max_hands)
+    decision = HandDecisions(len(LABELS)) if smoothing else None
+
+    frames = LatestQueue(CAPTURE_QUEUE_SIZE)
+    stats = StageStats()
+    stop = threading.Event()
+
+    # Newest captured frame and newest prediction, shown by the display loop
+    display_lock = threading.Lock()
+    display = {'frame': None, 'frame_id': 0, 'labels': []}
+
+    def capture():
+        while not stop.is_set():
+            with stats.timer('capture'):
+                ret, frame = cap.read()
+            if not ret:
+                print("Error: Could not read frame.")
+                stop.set()
+                break
+            with stats.timer('flip'):
+                frame = cv2.flip(frame, 1)
+
+            frames.put((time.perf_counter(), frame))
+            with display_lock:
+                display['frame'] = frame
+                display['frame_id'] += 1
+
+    def inference():
+        while not stop.is_set():
+            item = frames.get_latest(timeout=0.1)
+            if item is None:
+                continue
+            captured_at, frame = item
+
+            with stats.timer('detect'):
+                results = detect(frame, hands)
+            with stats.timer('classify'):
+                predicted = classify(frame, results, model, decision)
+            stats.record('end-to-end', time.perf_counter() - captured_at)
+
+            # An empty prediction clears the overlay once the hand leaves the frame
+            with display_lock:
+                display['labels'] = predicted
+            for hand, label in predicted:
+                print(f"Predicted Classes ({hand}):\n", label)
+
+    threads = [threading.Thread(target=capture, daemon=True), threading.Thread(target=inference, daemon=True)]
+    for thread in threads:
+        thread.start()
+
+    last_report = time.perf_counter()
+    shown_id = 0
+    while not stop.is_set():
+        with display_lock:
+            frame, frame_id, labels = display['frame'], display['frame_id'], display['labels']
+
+        if frame_id != shown_id:
+            shown_id = frame_id
+            with stats.timer('display'):
+                shown = frame.copy()
+                if labels:
+                    cv2.putText(shown, format_predictions(labels), (10, 40), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0, 255, 0), 2)
+                cv2.imshow('Webcam Feed', shown)
+
+        key = cv2.waitKey(1)
+        if key == 27:  # ESC key
+            stop.set()
+
+        if time.perf_counter() - last_report >= REPORT_INTERVAL:
+            last_report = time.perf_counter()
+            print(stats.report())
+            print(f"Dropped frames: {frames.dropped}")
+            if decision is not None:
+                print(f"Model calls: {decision.inferences}, skipped (static hand): {decision.skipped}")
+            if roi:
+                print(f"Detections on ROI: {hands.roi_frames}, on full frame: {hands.full_frames}")
+
+    for thread in threads:
+        thread.join()
+
+    cap.release()
+    cv2.destroyAllWindows()
+
+
+def add_model_arguments(parser):
+    """Adds the model and detection command line options shared by the runner scripts."""
+    parser.add_argument('--model', default=MODEL_PATH, help=f"Trained model file or directory (default: {MODEL_PATH})")
+    parser.add_argument('--backend', default=MODEL_BACKEND, choices=['auto'] + list(BACKENDS),
+                        help="Model backend, 'auto' guesses it from the model path (default: auto)")
+    parser.add_argument('--roi', action='store_true',
+                        help="Track the hand on a downscaled crop around the previous detection")
+    parser.add_argument('--max-hands', type=int, default=MAX_NUM_HANDS,
+                        help=f"Maximum number of hands classified per frame (default: {MAX_NUM_HANDS})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Live hand sign recognition from the webcam.")
+    parser.add_argument('--pipelined', action='store_true',
+                        help="Run capture, inference and display in separate threads and report per-stage statistics")
+    parser.add_argument('--smoothing', action='store_true',
+                        help="Print stable decisions (see Decision.py) instead of the prediction of every frame")
+    add_model_arguments(parser)
+    args = parser.parse_args()
+
+    if args.pipelined:
+        run_pipelined(args.smoothing, args.model, args.backend, args.roi, args.max_hands)
+    else:
+        run(args.smoothing, args.model, args.backend, args.roi, args.max_hands)
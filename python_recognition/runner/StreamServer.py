@@ -0,0 +1,349 @@
+"""
+Headless multi-stream server: one process recognizes hand signs on several video sources at once.
+
+Every source gets a reader thread feeding a drop-oldest queue (see common/Pipeline.py) and its own hand
+tracker (MediaPipe Hands or RoiTracker) and decision layers, so the streams do not disturb each
+other's tracking. The main loop works in ticks: it takes the newest frame of every stream that has
+one, runs the hand detection of each stream (optionally on --detect-workers threads) and classifies
+the hands of all streams in a single batched model call (Runner.classify_batch).
+
+Aggregate and per-stream throughput, dropped frames and the model batch sizes are reported
+periodically and at the end, to measure how many concurrent signers one CPU node can serve.
+
+Usage: python StreamServer.py SOURCE [SOURCE ...] [--fps 30] [--loop] [--duration S] [--limit N]
+                              [--tick S] [--detect-workers N] [--smoothing] [--no-flip] [--output predictions.csv]
+                              [--model PATH] [--backend xgb|xgb-flat|keras|nn-numpy|tfdf|tflite|onnx]
+                              [--roi] [--max-hands N]
+    SOURCE is a webcam index (0), a video file, a directory of frames, a stream URL (rtsp://...)
+    or replay:PATH - the frames of PATH decoded once up front and served like a live camera
+    (a stand-in frame producer without decoding cost).
+"""
+
+import argparse
+import concurrent.futures
+import itertools
+import os
+import sys
+import threading
+import time
+
+import cv2
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.Pipeline import LatestQueue, StageStats
+from common.Predictors import load_predictor
+from Decision import HandDecisions
+from Replay import read_frames
+from RoiTracker import RoiTracker
+from Runner import (LABELS, MAX_NUM_HANDS, MODEL_BACKEND, MODEL_PATH, add_model_arguments, classify_batch,
+                    create_hands, detect, format_predictions)
+
+
+# --- Server Configuration Constants ---
+SOURCE_FPS = 30.0  # Frame rate of file and replay sources, 0 reads them as fast as possible
+STREAM_QUEUE_SIZE = 2  # Frames waiting per stream, older frames are dropped
+DETECT_WORKERS = 1  # Threads running the per-stream hand detection
+IDLE_WAIT = 0.01  # Max seconds the tick loop waits for a new frame
+TICK_INTERVAL = 0.0  # Min seconds between ticks, longer ticks batch more streams per model call at some latency
+REPORT_INTERVAL = 5.0  # Seconds between statistics reports
+READER_JOIN_TIMEOUT = 2.0  # Max seconds to wait for a reader thread at shutdown, a camera read can block
+
+REPLAY_PREFIX = 'replay:'
+
+
+class CountingPredictor:
+    """Wraps a Predictor and counts its model calls and predicted rows."""
+
+    def __init__(self, model):
+        self.model = model
+        self.schema = model.schema
+        self.calls = 0
+        self.rows = 0
+
+    def predict(self, batch):
+        self.calls += 1
+        self.rows += len(batch)
+        return self.model.predict(batch)
+
+
+class Stream:
+    """One video source with its reader thread, frame queue, hand tracker and decision layers."""
+
+    def __init__(self, name, source, hands, decision=None, fps=SOURCE_FPS, loop=False, flip=True,
+                 queue_size=STREAM_QUEUE_SIZE):
+        """
+            Args:
+                name: Name of the stream in reports.
+                source: Webcam index, video file, directory of frames, stream URL or replay:PATH.
+                hands: Hand detector of this stream (interface of mediapipe Hands).
+                decision: HandDecisions of this stream, None reports every frame's prediction.
+                fps: Frame rate of file and replay sources, 0 for as fast as possible. Live sources
+                     (webcams, stream URLs) deliver frames at their own rate.
+                loop: Restart file and replay sources at their end.
+                flip: Mirror the frames like the webcam loop does.
+                queue_size: Frames waiting for the tick loop, older frames are dropped.
+        """
+        self.name = name
+        self.source = source
+        self.hands = hands
+        self.decision = decision
+        self.loop = loop
+        self.flip = flip
+        self.frames = LatestQueue(queue_size)
+
+        self.live = isinstance(source, int) or '://' in source
+        self.interval = 1 / fps if fps > 0 and not self.live else 0
+        self.replay = None
+        if not self.live and source.startswith(REPLAY_PREFIX):
+            self.replay = [self._prepare(frame) for frame in read_frames(source[len(REPLAY_PREFIX):])]
+            if not self.replay:
+                raise IOError(f"No frames read from {source}")
+
+        self.finished = threading.Event()
+        self.thread = None
+        self.captured = 0
+        self.processed = 0
+        self.with_hand = 0
+
+    def start(self, stop, notify):
+        """
+            Starts the reader thread.
+
+            Args:
+                stop: Event ending the reader.
+                notify: Event set whenever a new frame is queued.
+        """
+        self.thread = threading.Thread(target=self._read, args=(stop, notify), daemon=True)
+        self.thread.start()
+
+    def _prepare(self, frame):
+        return cv2.flip(frame, 1) if self.flip else frame
+
+    def _frames(self):
+        if self.replay is not None:
+            return itertools.cycle(self.replay) if self.loop else iter(self.replay)
+
+        if self.live:
+            return self._capture()
+
+        if not self.loop:
+            return (self._prepare(frame) for frame in read_frames(self.source))
+        return (self._prepare(frame) for _ in itertools.count() for frame in read_frames(self.source))
+
+    def _capture(self):
+        cap = cv2.VideoCapture(self.source)
+        if not cap.isOpened():
+            raise IOError(f"Could not open {self.source}")
+        try:
+            while True:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                yield self._prepare(frame)
+        finally:
+            cap.release()
+
+    def _read(self, stop, notify):
+        try:
+            next_frame = time.perf_counter()
+            for frame in self._frames():
+                if stop.is_set():
+                    break
+                if self.interval:
+                    # Pace the source like a camera, without drifting when a frame comes late
+                    next_frame += self.interval
+                    delay = next_frame - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                    else:
+                        next_frame = time.perf_counter()
+
+                self.frames.put((self.captured, time.perf_counter(), frame))
+                self.captured += 1
+                notify.set()
+        except IOError as e:
+            print(f"Error ({self.name}): {e}")
+        finally:
+            self.finished.set()
+            notify.set()
+
+    def done(self):
+        """Returns True once the source has ended and every queued frame was taken."""
+        return self.finished.is_set() and not self.frames.items
+
+
+def create_stream_hands(roi=False, max_hands=MAX_NUM_HANDS):
+    """Creates the hand detector of one stream, see Runner.setup."""
+    if roi:
+        return RoiTracker(create_hands(max_hands), create_hands(max_hands))
+    return create_hands(max_hands)
+
+
+def parse_source(source):
+    """Webcam indices are given as integers, anything else is a path or URL."""
+    return int(source) if source.isdigit() else source
+
+
+def report_streams(streams, elapsed, model):
+    """Formats the per-stream and aggregate throughput since the start."""
+    lines = []
+    for stream in streams:
+        lines.append(f"{stream.name:<10} frames={stream.processed:<7} ({stream.with_hand} with a hand) "
+                     f"fps={stream.processed / elapsed:6.1f} dropped={stream.frames.dropped}")
+    processed = sum(stream.processed for stream in streams)
+    lines.append(f"Aggregate: {processed} frames in {elapsed:.1f} s -> {processed / elapsed:.1f} FPS, "
+                 f"{processed / elapsed / len(streams):.1f} FPS per stream")
+    if model.calls:
+        lines.append(f"Model calls: {model.calls}, mean batch {model.rows / model.calls:.2f} rows")
+    return '\n'.join(lines)
+
+
+def serve(sources, fps=SOURCE_FPS, loop=False, duration=None, limit=None, tick_interval=TICK_INTERVAL,
+          detect_workers=DETECT_WORKERS, smoothing=False, flip=True, output_file=None, model_path=MODEL_PATH, backend=MODEL_BACKEND, roi=False,
+          max_hands=MAX_NUM_HANDS):
+    """
+        Serves several video sources in one process until they end, the duration expires or the limit is reached.
+
+        Args:
+            sources: List of sources, see Stream.
+            fps: Frame rate of file and replay sources, 0 for as fast as possible.
+            loop: Restart file and replay sources at their end.
+            duration: Stop after this many seconds, None runs until the sources end (or Ctrl+C).
+            limit: Stop after this many processed frames in total, None for no limit.
+            tick_interval: Min seconds between ticks, 0 starts a tick as soon as any stream has a new frame.
+            detect_workers: Threads running the hand detection of the streams of a tick.
+            smoothing: Report stable decisions of the decision layers instead of every frame's prediction.
+            flip: Mirror the frames like the webcam loop does.
+            output_file: Optional CSV file for the per-frame predictions of all streams.
+            model_path: Trained model file or directory.
+            backend: Model backend, see common.Predictors.load_predictor.
+            roi: Track the hands of each stream on a crop around the previous detection.
+            max_hands: Maximum number of hands detected per frame.
+    """
+    model = CountingPredictor(load_predictor(model_path, backend))
+    print(f"Model {model_path}: feature schema {model.schema.name} ({model.schema.num_features} features)")
+
+    streams = [Stream(f"stream{i}", parse_source(source), create_stream_hands(roi, max_hands),
+                      HandDecisions(len(LABELS)) if smoothing else None, fps, loop, flip)
+               for i, source in enumerate(sources)]
+
+    stats = StageStats()
+    stop = threading.Event()
+    notify = threading.Event()
+    executor = concurrent.futures.ThreadPoolExecutor(detect_workers) if detect_workers > 1 else None
+    output = open(output_file, 'w') if output_file else None
+    if output:
+        output.write("stream,frame,hands,labels,latency_ms\n")
+
+    def detect_stream(stream, frame):
+        with stats.timer('detect'):
+            return detect(frame, stream.hands)
+
+    for stream in streams:
+        stream.start(stop, notify)
+
+    start = time.perf_counter()
+    last_report = start
+    last_tick = start
+    processed = 0
+    try:
+        while not all(stream.done() for stream in streams):
+            if duration is not None and time.perf_counter() - start >= duration:
+                break
+            if limit is not None and processed >= limit:
+                break
+
+            notify.wait(IDLE_WAIT)
+            if tick_interval:
+                # Let the frames of more streams arrive before the tick
+                delay = last_tick + tick_interval - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            notify.clear()
+
+            ready = []
+            for stream in streams:
+                item = stream.frames.get_latest(timeout=0)
+                if item is not None:
+                    ready.append((stream, item))
+            if not ready:
+                continue
+
+            tick_start = time.perf_counter()
+            last_tick = tick_start
+            if executor is not None:
+                results = list(executor.map(lambda entry: detect_stream(entry[0], entry[1][2]), ready))
+            else:
+                results = [detect_stream(stream, frame) for stream, (_, _, frame) in ready]
+
+            with stats.timer('classify'):
+                predictions = classify_batch([(frame, result, stream.decision)
+                                              for (stream, (_, _, frame)), result in zip(ready, results)], model)
+            end = time.perf_counter()
+            stats.record('tick', end - tick_start)
+
+            for (stream, (index, captured_at, _)), result, predicted in zip(ready, results, predictions):
+                stats.record('end-to-end', end - captured_at)
+                num_hands = len(result.multi_hand_landmarks or [])
+                stream.processed += 1
+                stream.with_hand += num_hands > 0
+                if output:
+                    output.write(f"{stream.name},{index},{num_hands},{format_predictions(predicted)},"
+                                 f"{(end - captured_at) * 1000:.3f}\n")
+            processed += len(ready)
+
+            if end - last_report >= REPORT_INTERVAL:
+                last_report = end
+                print(stats.report())
+                print(report_streams(streams, end - start, model))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        elapsed = time.perf_counter() - start
+        stop.set()
+        for stream in streams:
+            # A live camera can block in cap.read, the reader is a daemon thread and is left behind
+            stream.thread.join(READER_JOIN_TIMEOUT)
+            if stream.thread.is_alive():
+                print(f"Reader of {stream.name} did not stop within {READER_JOIN_TIMEOUT} s, not waiting for it")
+        if executor is not None:
+            executor.shutdown()
+        if output:
+            output.close()
+
+    if processed == 0:
+        print("No frames processed")
+        return
+
+    print(stats.report(reset=False))
+    print(report_streams(streams, elapsed, model))
+    if smoothing:
+        print(f"Skipped model rows (static hand): {sum(stream.decision.skipped for stream in streams)}")
+    if roi:
+        print(f"Detections on ROI: {sum(stream.hands.roi_frames for stream in streams)}, "
+              f"on full frame: {sum(stream.hands.full_frames for stream in streams)}")
+    if output_file:
+        print(f"Predictions written to {output_file}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('sources', nargs='+', help="Webcam index, video file, directory of frames, URL or replay:PATH")
+    parser.add_argument('--fps', type=float, default=SOURCE_FPS,
+                        help=f"Frame rate of file and replay sources, 0 for as fast as possible (default: {SOURCE_FPS})")
+    parser.add_argument('--loop', action='store_true', help="Restart file and replay sources at their end")
+    parser.add_argument('--duration', type=float, default=None, help="Stop after this many seconds")
+    parser.add_argument('--limit', type=int, default=None, help="Stop after N processed frames in total")
+    parser.add_argument('--tick', type=float, default=TICK_INTERVAL,
+                        help=f"Min seconds between ticks, batches more streams per model call (default: {TICK_INTERVAL})")
+    parser.add_argument('--detect-workers', type=int, default=DETECT_WORKERS,
+                        help=f"Threads running the per-stream hand detection (default: {DETECT_WORKERS})")
+    parser.add_argument('--smoothing', action='store_true',
+                        help="Report stable decisions of the decision layers instead of every frame's prediction")
+    parser.add_argument('--no-flip', action='store_true', help="Do not mirror the frames like the webcam loop does")
+    parser.add_argument('--output', default=None, help="Optional CSV file for the per-frame predictions")
+    add_model_arguments(parser)
+    args = parser.parse_args()
+
+    serve(args.sources, args.fps, args.loop, args.duration, args.limit, args.tick, args.detect_workers, args.smoothing,
+          not args.no_flip, args.output, args.model, args.backend, args.roi, args.max_hands)
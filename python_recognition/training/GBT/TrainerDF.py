@@ -5,7 +5,7 @@ Trains a Gradient Boosted Trees model using TensorFlow Decision Forests (TFDF)
 for hand gesture classification based on landmark data.
 
 This script performs the following steps:
-1. Loads landmark data from a CSV file.
+1. Loads landmark data from the binary dataset (or a CSV file).
 2. Splits the data into training and testing sets.
 3. Converts the data into TensorFlow Datasets suitable for TFDF.
 4. Initializes and trains a GradientBoostedTreesModel.
@@ -15,50 +15,58 @@ This script performs the following steps:
 """
 
 import os
+import sys
 # Keep using Keras 2 - Required for compatibility with certain TF/TFJS versions
 os.environ['TF_USE_LEGACY_KERAS'] = '1'
 
-import numpy as np
 import pandas as pd
 import tensorflow_decision_forests as tfdf
 import tensorflowjs as tfjs
+from sklearn.model_selection import train_test_split
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from common.DatasetFormat import load_dataset, resolve_dataset
+from common.FeatureSchema import dataset_schema, save_model_schema
 
 # --- Configuration Constants ---
-DATASET_FILENAME = 'dataset.csv'
+DATASET_FILENAME = 'dataset.json'  # Binary dataset from LandmarksProcessor, falls back to a legacy 'dataset.csv'
 OUTPUT_TFDF_MODEL_PATH = 'model' # Directory to save the trained TFDF SavedModel
 OUTPUT_TFJS_MODEL_PATH = 'tfjs' # Directory to save the converted TensorFlow.js model
-RANDOM_SEED = 42
-TRAIN_SIZE = 0.9
-
-# Set the random seed for NumPy operations (like dataset splitting
-np.random.seed(RANDOM_SEED)
+RANDOM_SEED = 42  # Same split as TrainerXGB and TrainerNN, so all models share the held-out rows
+TRAIN_SIZE = 0.75
 
 
-def split_dataset(dataset, test_ratio=0.10):
+def split_dataset(dataset, train_size=TRAIN_SIZE):
     """
-        Splits a Pandas DataFrame into training and testing sets based on a ratio.
+        Splits a Pandas DataFrame into training and testing sets like TrainerXGB and TrainerNN
+        (train_test_split with RANDOM_SEED), so benchmark/ModelSelection scores every model on
+        rows it was not trained on.
 
         Args:
             dataset: The input Pandas DataFrame.
-            test_ratio: The proportion of the dataset to allocate to the test set.
+            train_size: The proportion of the dataset to allocate to the training set.
 
         Returns:
             A tuple containing the training DataFrame and the testing DataFrame.
         """
 
-    test_indices = np.random.rand(len(dataset)) < test_ratio
-    return dataset[~test_indices], dataset[test_indices]
+    return train_test_split(dataset, train_size=train_size, random_state=RANDOM_SEED)
 
 
 def run():
     """Loads data, trains, evaluates, saves, and converts the TFDF model."""
 
-    # Load the dataset from the specified CSV file
-    dataset_df = pd.read_csv(DATASET_FILENAME)
+    # Load the dataset, the DataFrame wraps the memory-mapped features without copying
+    dataset_file = resolve_dataset(DATASET_FILENAME)
+    features, labels, label_names = load_dataset(dataset_file)
+    schema = dataset_schema(dataset_file, features.shape[1])
+    print(f"Feature schema: {schema.name} ({schema.num_features} features)")
+    dataset_df = pd.DataFrame(features, columns=[f"f{i + 1}" for i in range(features.shape[1])], copy=False)
+    dataset_df.insert(0, 'label', labels.astype('int64'))
     print(dataset_df.head(3))
 
     # Split the dataset into training and testing sets
-    train_ds_pd, test_ds_pd = split_dataset(dataset_df, 1-TRAIN_SIZE)
+    train_ds_pd, test_ds_pd = split_dataset(dataset_df)
     print("{} examples in training, {} examples for testing.".format(
         len(train_ds_pd), len(test_ds_pd)))
 
@@ -102,6 +110,7 @@ def run():
 
     # Save the trained model in TensorFlow's SavedModel format
     model.save(OUTPUT_TFDF_MODEL_PATH)
+    save_model_schema(OUTPUT_TFDF_MODEL_PATH, schema, label_names)
 
     # Convert the SavedModel to TensorFlow.js format
     tfjs.converters.tf_saved_model_conversion_v2.convert_tf_saved_model(OUTPUT_TFDF_MODEL_PATH, OUTPUT_TFJS_MODEL_PATH)
@@ -26,10 +26,15 @@ for dataset_folder in root_path.glob("dataset*"):
         # For each file in the label folder
         for file in label_folder.glob("*.jpg"):
             # Generate a new unique name with same extension
-            new_file_name = f"{uuid.uuid4()}{file.suffix}"
-            target_file_path = target_label_path / new_file_name
+            new_name = str(uuid.uuid4())
+            target_file_path = target_label_path / f"{new_name}{file.suffix}"
 
             # Copy the file
             shutil.copy2(file, target_file_path)
 
+            # Copy the landmark sidecar written by the collector under the new name
+            sidecar = file.with_name(file.stem + ".landmarks.npz")
+            if sidecar.exists():
+                shutil.copy2(sidecar, target_label_path / f"{new_name}.landmarks.npz")
+
 print("Merging complete.")
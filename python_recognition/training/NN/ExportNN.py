@@ -0,0 +1,300 @@
+"""
+    Post-training optimization of the MLP trained by TrainerNN.
+
+    Exports TensorFlow Lite variants of the Keras model:
+    - 'float32': plain conversion, the reference for the latency of the interpreter,
+    - 'dynamic': dynamic-range quantization, int8 weights with float activations,
+    - 'int8': full-integer quantization, activations calibrated on a representative dataset
+      drawn from the training split (float input and output, so it is a drop-in replacement),
+    - 'pruned': magnitude pruning of the Dense kernels to PRUNE_SPARSITY, a short fine-tune
+      keeping the pruned weights at zero, then dynamic-range quantization. The zeros only pay
+      off compressed, so the gzip size is reported next to the file size.
+
+    Every variant is evaluated on the test split of TrainerNN through the 'tflite' predictor
+    backend: accuracy delta to the Keras model and single-row latency. The smallest variant
+    (compressed size) losing at most MAX_ACCURACY_DROP percentage points is selected, and with
+    --ship it is converted to TF.js for the web app (static/models/tfjsmodel). TF.js quantizes
+    weights only, so the quantized variants are shipped with uint8 weights. That is another model
+    than the measured TFLite file: its accuracy is measured on the dequantized uint8 weights with
+    the NumPy forward pass (common/NumpyMLP.py) before it is written, and if it loses more than
+    MAX_ACCURACY_DROP the float32 weights are shipped instead.
+
+    Use keras version 2, tensorflow <= 2.15 (linux only), like TrainerNN.
+
+    Usage: python ExportNN.py [--model model.keras] [--dataset dataset.json] [--ship ../../../static/models/tfjsmodel]
+"""
+
+import argparse
+import gzip
+import os
+import shutil
+import sys
+import time
+
+import numpy as np
+import tensorflow as tf
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from common.FeatureSchema import model_schema_path
+from common.NumpyMLP import NumpyMLP, model_layers
+from common.Predictors import TFLitePredictor
+from TrainerNN import DATASET_FILENAME, OUTPUT_KERAS_FILE, RANDOM_SEED, load_training_data
+
+
+# --- Export Configuration Constants ---
+VARIANTS = ['float32', 'dynamic', 'int8', 'pruned']
+REPRESENTATIVE_SAMPLES = 500  # Training rows calibrating the int8 activations
+PRUNE_SPARSITY = 0.5  # Fraction of the Dense kernel weights set to zero
+PRUNE_EPOCHS = 10  # Fine-tune epochs after pruning
+PRUNE_LEARNING_RATE = 1e-4
+MAX_ACCURACY_DROP = 0.5  # Max accuracy loss (percentage points) of a shippable variant
+LATENCY_REPEAT = 1000  # Timed single-row calls per variant
+
+
+def representative_dataset(features, samples=REPRESENTATIVE_SAMPLES, seed=RANDOM_SEED):
+    """Returns a generator function yielding random single training rows for the int8 calibration."""
+    rng = np.random.default_rng(seed)
+    rows = np.asarray(features, dtype=np.float32)[rng.choice(len(features), min(samples, len(features)), replace=False)]
+
+    def generator():
+        for row in rows:
+            yield [row[None]]
+
+    return generator
+
+
+def prune_model(model, features_train, labels_train, sparsity=PRUNE_SPARSITY, epochs=PRUNE_EPOCHS):
+    """
+        Prunes the smallest weights of every Dense kernel and fine-tunes the rest.
+
+        Args:
+            model: The trained Keras model, left unchanged.
+            features_train: Training features for the fine-tune.
+            labels_train: Training labels.
+            sparsity: Fraction of each kernel set to zero.
+            epochs: Fine-tune epochs, the pruned weights are reset to zero after every batch.
+
+        Returns:
+            A pruned copy of the model.
+    """
+    pruned = tf.keras.models.clone_model(model)
+    pruned.set_weights(model.get_weights())
+
+    masks = []
+    for layer in pruned.layers:
+        if isinstance(layer, tf.keras.layers.Dense):
+            kernel = layer.kernel.numpy()
+            mask = np.abs(kernel) > np.quantile(np.abs(kernel), sparsity)
+            layer.kernel.assign(kernel * mask)
+            masks.append((layer, mask.astype(np.float32)))
+
+    class KeepPruned(tf.keras.callbacks.Callback):
+        def on_train_batch_end(self, batch, logs=None):
+            for layer, mask in masks:
+                layer.kernel.assign(layer.kernel * mask)
+
+    pruned.compile(
+        optimizer=tf.keras.optimizers.Adam(PRUNE_LEARNING_RATE),
+        loss='sparse_categorical_crossentropy',
+        metrics=['accuracy']
+    )
+    pruned.fit(features_train, labels_train, epochs=epochs, batch_size=32, callbacks=[KeepPruned()], verbose=0)
+    return pruned
+
+
+def convert(model, variant, features_train=None):
+    """
+        Converts a Keras model to TensorFlow Lite.
+
+        Args:
+            model: The Keras model.
+            variant: 'float32', 'dynamic' or 'int8' (see the module docstring).
+            features_train: Training features, needed for the int8 calibration.
+
+        Returns:
+            The TFLite flatbuffer as bytes.
+    """
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    if variant != 'float32':
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if variant == 'int8':
+        converter.representative_dataset = representative_dataset(features_train)
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    return converter.convert()
+
+
+def evaluate(model_path, features_test, labels_test, repeat=LATENCY_REPEAT):
+    """
+        Evaluates a TFLite model with the 'tflite' predictor backend.
+
+        Returns:
+            A tuple (accuracy in %, median single-row latency in ms).
+    """
+    predictor = TFLitePredictor(model_path)
+    features_test = np.ascontiguousarray(features_test, dtype=np.float32)
+    accuracy = np.mean(np.argmax(predictor.predict(features_test), axis=1) == labels_test) * 100
+
+    rows = features_test[np.arange(repeat) % len(features_test)]
+    predictor.predict_one(rows[0])  # Warm-up, resizes the input to a single row
+    latencies = np.empty(repeat)
+    for i, row in enumerate(rows):
+        start = time.perf_counter()
+        predictor.predict_one(row)
+        latencies[i] = time.perf_counter() - start
+    return accuracy, np.median(latencies) * 1000
+
+
+def compressed_size(path):
+    """Returns the gzip size of a file in bytes."""
+    with open(path, 'rb') as f:
+        return len(gzip.compress(f.read()))
+
+
+def quantize_uint8(weights):
+    """
+        Emulates the uint8 weight quantization of the TF.js converter: affine per tensor over its
+        min/max range, with the range nudged so that zero is exactly representable.
+
+        Args:
+            weights: float32 array.
+
+        Returns:
+            The dequantized float32 weights the web app computes with.
+    """
+    weights = np.asarray(weights, dtype=np.float32)
+    low, high = min(float(weights.min()), 0.0), max(float(weights.max()), 0.0)
+    if high == low:
+        return weights.copy()
+
+    scale = (high - low) / 255
+    zero_point = round(-low / scale)
+    quantized = np.clip(np.round(weights / scale) + zero_point, 0, 255)
+    return ((quantized - zero_point) * scale).astype(np.float32)
+
+
+def tfjs_accuracy(model, quantization, features_test, labels_test):
+    """
+        Measures the accuracy of a model as the TF.js converter ships it.
+
+        Args:
+            model: The Keras model.
+            quantization: None for float32 weights, 'uint8' for quantized weights (kernels and biases).
+
+        Returns:
+            The accuracy in %.
+    """
+    layers = model_layers(model)
+    if quantization == 'uint8':
+        layers = [(quantize_uint8(kernel), quantize_uint8(bias), activation) for kernel, bias, activation in layers]
+    predictions = np.argmax(NumpyMLP(layers).predict(features_test), axis=1)
+    return np.mean(predictions == labels_test) * 100
+
+
+def ship_tfjs(model, pruned, selected, reference, features_test, labels_test, ship_folder):
+    """
+        Saves the selected variant as a TF.js model, in the smallest form within MAX_ACCURACY_DROP.
+
+        The candidates are tried in order: the selected model with uint8 weights (quantized variants
+        only), with float32 weights, and for 'pruned' the unpruned model with float32 weights, the
+        Keras model itself. The last candidate is shipped if none qualifies.
+
+        Returns:
+            The shipped (model name, quantization) pair.
+    """
+    import tensorflowjs as tfjs
+
+    name, shipped = ('pruned', pruned) if selected == 'pruned' else ('keras', model)
+    candidates = [(name, shipped, 'uint8')] if selected != 'float32' else []
+    candidates.append((name, shipped, None))
+    if selected == 'pruned':
+        candidates.append(('keras', model, None))
+
+    for name, candidate, quantization in candidates:
+        accuracy = tfjs_accuracy(candidate, quantization, features_test, labels_test)
+        print(f"TF.js {name} model with {quantization or 'float32'} weights: {accuracy:.2f}% "
+              f"({accuracy - reference:+.2f})")
+        if accuracy >= reference - MAX_ACCURACY_DROP:
+            break
+
+    tfjs.converters.save_keras_model(candidate, ship_folder,
+                                     quantization_dtype_map={quantization: '*'} if quantization else None)
+    print(f"TF.js model ({name}, {quantization or 'float32'} weights) saved to {ship_folder}")
+    return name, quantization
+
+
+def export_variants(model, model_path, features_train, features_test, labels_train, labels_test, ship_folder=None):
+    """
+        Exports, evaluates and reports the TFLite variants of a trained model.
+
+        Args:
+            model: The trained Keras model.
+            model_path: Path of the saved Keras model, the variants are written next to it
+                        as '<model>.<variant>.tflite' with its schema sidecar.
+            features_train: Training features (int8 calibration and pruning fine-tune).
+            features_test: Test features.
+            labels_train: Training labels.
+            labels_test: Test labels.
+            ship_folder: If set, the selected variant is saved there as a TF.js model (see ship_tfjs).
+
+        Returns:
+            The name of the selected variant, None if none is within MAX_ACCURACY_DROP.
+    """
+    features_test = np.asarray(features_test, dtype=np.float32)
+    reference = np.mean(np.argmax(model.predict(features_test, verbose=0), axis=1) == labels_test) * 100
+    base = os.path.splitext(model_path)[0]
+
+    pruned = None
+    results = []
+    for variant in VARIANTS:
+        if variant == 'pruned':
+            pruned = prune_model(model, features_train, labels_train)
+            content = convert(pruned, 'dynamic')
+        else:
+            content = convert(model, variant, features_train)
+
+        path = f"{base}.{variant}.tflite"
+        with open(path, 'wb') as f:
+            f.write(content)
+        if os.path.exists(model_schema_path(model_path)):
+            shutil.copyfile(model_schema_path(model_path), model_schema_path(path))
+
+        accuracy, latency = evaluate(path, features_test, labels_test)
+        results.append((variant, path, accuracy, latency, os.path.getsize(path), compressed_size(path)))
+
+    print(f"Keras model accuracy: {reference:.2f}%")
+    print(f"{'variant':<10} {'accuracy %':>10} {'delta':>7} {'latency ms':>10} {'size kB':>8} {'gzip kB':>8}")
+    for variant, path, accuracy, latency, size, compressed in results:
+        print(f"{variant:<10} {accuracy:10.2f} {accuracy - reference:+7.2f} {latency:10.4f} "
+              f"{size / 1024:8.1f} {compressed / 1024:8.1f}")
+
+    acceptable = [result for result in results if result[2] >= reference - MAX_ACCURACY_DROP]
+    if not acceptable:
+        print(f"No variant within {MAX_ACCURACY_DROP} percentage points of the Keras model")
+        return None
+
+    selected, path = min(acceptable, key=lambda result: result[5])[:2]
+    print(f"Smallest acceptable variant: {selected} ({path})")
+
+    if ship_folder:
+        ship_tfjs(model, pruned, selected, reference, features_test, labels_test, ship_folder)
+
+    return selected
+
+
+def run(model_path=OUTPUT_KERAS_FILE, dataset_file=DATASET_FILENAME, ship_folder=None):
+    model = tf.keras.models.load_model(model_path)
+    features_train, features_test, labels_train, labels_test, _, schema = load_training_data(dataset_file)
+    print(f"Feature schema: {schema.name} ({schema.num_features} features)")
+
+    export_variants(model, model_path, features_train, features_test, labels_train, labels_test, ship_folder)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model', default=OUTPUT_KERAS_FILE, help=f"Keras model of TrainerNN (default: {OUTPUT_KERAS_FILE})")
+    parser.add_argument('--dataset', default=DATASET_FILENAME, help=f"Dataset file (default: {DATASET_FILENAME})")
+    parser.add_argument('--ship', default=None,
+                        help="Save the selected variant as a TF.js model to this folder, e.g. ../../../static/models/tfjsmodel")
+    args = parser.parse_args()
+
+    run(args.model, args.dataset, args.ship)
@@ -2,20 +2,27 @@
     Use keras version 2, tensorflow <= 2.15 (linux only)
 """
 
+import argparse
+import os
+import sys
+
 import numpy as np
 import tensorflow as tf
 import tensorflowjs as tfjs
 from sklearn.model_selection import train_test_split
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from common.DatasetFormat import load_dataset, resolve_dataset
+from common.FeatureSchema import dataset_schema, save_model_schema
+from common.NumpyMLP import check_parity, export_model
+
 
-DATASET_FILENAME = 'dataset.csv'
+DATASET_FILENAME = 'dataset.json'  # Binary dataset from LandmarksProcessor, falls back to a legacy 'dataset.csv'
 OUTPUT_TFJS_FOLDER = 'tfjsmodel'
 OUTPUT_KERAS_FILE = 'model.keras'
 RANDOM_SEED = 42
 TRAIN_SIZE = 0.75
 
-NUM_OF_FEATURES = 42
-
 
 def create_confusion_matrix(pred_labels, top_pred):
     import pandas as pd
@@ -34,20 +41,32 @@ def create_confusion_matrix(pred_labels, top_pred):
     plt.show()
 
 
-def run():
-    # Load dataset
-    data = np.loadtxt(DATASET_FILENAME, delimiter=',', dtype='float32', usecols=range(NUM_OF_FEATURES + 1))
-    features = data[:, 1:]
-    labels = data[:, 0].astype('int32')
+def load_training_data(dataset_file=DATASET_FILENAME):
+    """
+        Loads the dataset and splits it into the training and the test part.
 
-    num_of_classes = len(set(labels))
+        Returns:
+            A tuple (features_train, features_test, labels_train, labels_test, label_names, schema).
+    """
+    dataset_file = resolve_dataset(dataset_file)
+    features, labels, label_names = load_dataset(dataset_file)
+    labels = labels.astype('int32')
+    schema = dataset_schema(dataset_file, features.shape[1])
 
-    # Split dataset
     features_train, features_test, labels_train, labels_test = train_test_split(features, labels, train_size=TRAIN_SIZE, random_state=RANDOM_SEED)
+    return features_train, features_test, labels_train, labels_test, label_names, schema
+
+
+def run(export=False):
+    # Load dataset and split it
+    features_train, features_test, labels_train, labels_test, label_names, schema = load_training_data()
+    print(f"Feature schema: {schema.name} ({schema.num_features} features)")
+
+    num_of_classes = len(set(labels_train) | set(labels_test))
 
     # Model definition
     model = tf.keras.models.Sequential([
-        tf.keras.layers.Input(shape=(NUM_OF_FEATURES,)),
+        tf.keras.layers.Input(shape=(schema.num_features,)),
         tf.keras.layers.Dropout(0.2, name="d1"),
         tf.keras.layers.Dense(42, activation='relu', name="dense1"),
         tf.keras.layers.Dropout(0.2, name="d2"),
@@ -84,7 +103,24 @@ def run():
 
     # Save model
     model.save(OUTPUT_KERAS_FILE)
+    save_model_schema(OUTPUT_KERAS_FILE, schema, label_names)
     tfjs.converters.save_keras_model(model, OUTPUT_TFJS_FOLDER)
 
+    # Export the weights for the 'nn-numpy' backend, it has to predict like the Keras model
+    mlp_path, mlp = export_model(model, OUTPUT_KERAS_FILE)
+    difference = check_parity(model, mlp, features_test)
+    print(f"NumPy MLP saved to {mlp_path} ({mlp.num_parameters} parameters, max difference {difference:.1e})")
+
+    if export:
+        # Quantized and pruned variants, see ExportNN.py
+        from ExportNN import export_variants
+        export_variants(model, OUTPUT_KERAS_FILE, features_train, features_test, labels_train, labels_test)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Trains the MLP hand sign classifier.")
+    parser.add_argument('--export', action='store_true',
+                        help="Also export quantized and pruned TFLite variants and report their accuracy and latency")
+    args = parser.parse_args()
 
-run()
+    run(args.export)
@@ -0,0 +1,298 @@
+"""
+Parallel hyperparameter search for the XGBoost trainer.
+
+Candidate parameters are drawn at random from SEARCH_SPACE (seeded, so a rerun draws the same
+candidates) and evaluated by stratified k-fold cross-validation on the training part of the split
+used by TrainerXGB, so its held-out test set stays unseen. Early stopping watches
+EARLY_STOPPING_FRACTION of each training fold, the validation fold only scores the model.
+Trials run concurrently in worker processes, each training with --threads XGBoost threads, so
+workers x threads should not exceed the number of cores.
+
+A trial is pruned after PRUNE_AFTER_FOLDS folds when its mean fold accuracy is more than
+PRUNE_MARGIN below the best finished trial known when it started. Every evaluated trial (including
+the pruned ones) is appended to a JSONL trial log keyed by its parameters, the CV setup and the
+dataset, so a rerun (e.g. with more --trials) only evaluates the new configurations.
+
+The best parameters are written to best_params.json, train the final model with them by running
+python TrainerXGB.py --params best_params.json
+
+Usage: python SearchXGB.py [--dataset dataset.json] [--trials 50] [--workers N] [--threads 1] [--folds 5]
+                           [--log trials.jsonl] [--output best_params.json] [--seed 42]
+"""
+
+import argparse
+import concurrent.futures
+import hashlib
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import xgboost as xgb
+from sklearn.model_selection import StratifiedKFold, train_test_split
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from TrainerXGB import DATASET_FILENAME, EARLY_STOPPING_ROUNDS, NUM_BOOST_ROUND, RANDOM_SEED, load_training_data, make_params
+
+
+# --- Search Configuration Constants ---
+SEARCH_SPACE = {
+    'max_depth': [3, 4, 5, 6, 8],
+    'eta': [0.05, 0.1, 0.2, 0.3],
+    'subsample': [0.6, 0.8, 1.0],
+    'colsample_bytree': [0.5, 0.8, 1.0],
+    'min_child_weight': [1, 3, 5],
+    'lambda': [0.5, 1.0, 2.0],
+}
+NUM_TRIALS = 50  # Same budget as the RandomSearch of TrainerDF
+K_FOLDS = 5
+THREADS_PER_TRIAL = 1  # XGBoost threads of each trial
+PRUNE_AFTER_FOLDS = 1  # Folds evaluated before a trial can be pruned
+PRUNE_MARGIN = 0.02  # Pruned when the mean fold accuracy is this far below the best trial
+EARLY_STOPPING_FRACTION = 0.1  # Part of each training fold held out for early stopping
+SEARCH_VERSION = 2  # Bump when the evaluation changes, the logged trials are then evaluated again
+
+TRIAL_LOG_FILENAME = 'trials.jsonl'
+BEST_PARAMS_FILENAME = 'best_params.json'
+
+# Data of the worker process, set once by init_worker instead of being sent with every trial
+_worker_data = {}
+
+
+def sample_candidates(num_trials, seed=RANDOM_SEED):
+    """
+        Draws distinct random configurations from SEARCH_SPACE.
+
+        Returns:
+            A list of at most num_trials parameter dicts, the same list for the same seed.
+    """
+    rng = np.random.default_rng(seed)
+    size = np.prod([len(values) for values in SEARCH_SPACE.values()])
+
+    candidates = []
+    seen = set()
+    while len(candidates) < min(num_trials, size):
+        params = {name: values[rng.integers(len(values))] for name, values in SEARCH_SPACE.items()}
+        # Plain Python types, so the parameters are JSON serializable
+        params = {name: value.item() if isinstance(value, np.generic) else value for name, value in params.items()}
+        key = json.dumps(params, sort_keys=True)
+        if key not in seen:
+            seen.add(key)
+            candidates.append(params)
+    return candidates
+
+
+def dataset_digest(features, labels):
+    """Returns a digest of the training data, logged trials of another dataset are not reused."""
+    digest = hashlib.sha1()
+    digest.update(np.ascontiguousarray(features).tobytes())
+    digest.update(np.ascontiguousarray(labels).tobytes())
+    return digest.hexdigest()
+
+
+def trial_key(params, folds, seed, data_digest):
+    """Returns the key of a trial in the log."""
+    setup = {'params': params, 'folds': folds, 'seed': seed, 'data': data_digest, 'version': SEARCH_VERSION}
+    return hashlib.sha1(json.dumps(setup, sort_keys=True).encode()).hexdigest()
+
+
+def load_trial_log(path):
+    """Returns the logged trials by key, an empty dict if there is no log yet."""
+    trials = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    trial = json.loads(line)
+                    trials[trial['key']] = trial
+    return trials
+
+
+def init_worker(features, labels, num_classes, folds, seed, threads):
+    _worker_data.update(features=features, labels=labels, num_classes=num_classes, folds=folds, seed=seed,
+                        threads=threads)
+
+
+def log_loss(probabilities, labels):
+    """Returns the multi-class log loss of predicted probabilities, clipped like XGBoost's mlogloss."""
+    picked = probabilities[np.arange(len(labels)), labels]
+    return float(-np.mean(np.log(np.clip(picked, 1e-15, 1))))
+
+
+def evaluate(params, best_accuracy=None):
+    """
+        Cross-validates one configuration in a worker process.
+
+        Args:
+            params: The searched parameters, see SEARCH_SPACE.
+            best_accuracy: Mean CV accuracy of the best finished trial, None disables pruning.
+
+        Returns:
+            A dict with the status ('complete' or 'pruned'), the mean accuracy and log loss on the validation
+            folds, the mean number of boosting rounds chosen by early stopping, and the per-fold accuracies.
+    """
+    data = _worker_data
+    features, labels = data['features'], data['labels']
+    train_params = make_params(data['num_classes'], params)
+    train_params['nthread'] = data['threads']
+
+    start = time.perf_counter()
+    splitter = StratifiedKFold(n_splits=data['folds'], shuffle=True, random_state=data['seed'])
+    accuracies, losses, rounds = [], [], []
+    status = 'complete'
+
+    for train_index, valid_index in splitter.split(features, labels):
+        # Early stopping watches a part of the training fold, the validation fold only scores the model,
+        # otherwise the number of rounds is chosen on the rows the accuracy is reported for
+        fit_index, stop_index = train_test_split(train_index, test_size=EARLY_STOPPING_FRACTION,
+                                                 random_state=data['seed'], stratify=labels[train_index])
+        dtrain = xgb.DMatrix(features[fit_index], label=labels[fit_index], nthread=data['threads'])
+        dstop = xgb.DMatrix(features[stop_index], label=labels[stop_index], nthread=data['threads'])
+        model = xgb.train(train_params, dtrain, num_boost_round=NUM_BOOST_ROUND, evals=[(dstop, 'stop')],
+                          early_stopping_rounds=EARLY_STOPPING_ROUNDS, verbose_eval=False)
+
+        dvalid = xgb.DMatrix(features[valid_index], label=labels[valid_index], nthread=data['threads'])
+        probabilities = model.predict(dvalid, iteration_range=(0, model.best_iteration + 1))
+        accuracies.append(float(np.mean(np.argmax(probabilities, axis=1) == labels[valid_index])))
+        losses.append(log_loss(probabilities, labels[valid_index]))
+        rounds.append(model.best_iteration + 1)
+
+        if (best_accuracy is not None and len(accuracies) >= PRUNE_AFTER_FOLDS and len(accuracies) < data['folds']
+                and np.mean(accuracies) < best_accuracy - PRUNE_MARGIN):
+            status = 'pruned'
+            break
+
+    return {
+        'status': status,
+        'accuracy': float(np.mean(accuracies)),
+        'logloss': float(np.mean(losses)),
+        'num_boost_round': int(np.mean(rounds)),
+        'fold_accuracies': accuracies,
+        'seconds': round(time.perf_counter() - start, 3),
+    }
+
+
+def best_trial(trials):
+    """Returns the finished trial with the highest accuracy (lowest log loss on ties), or None."""
+    complete = [trial for trial in trials if trial['status'] == 'complete']
+    if not complete:
+        return None
+    return max(complete, key=lambda trial: (trial['accuracy'], -trial['logloss']))
+
+
+def evaluate_pending(pending, trials, log_file, workers, initargs):
+    """
+        Evaluates the trials missing from the log in worker processes.
+
+        Args:
+            pending: List of (key, params) of the trials to evaluate.
+            trials: List of the finished trials, the evaluated ones are appended.
+            log_file: JSONL trial log the evaluated trials are appended to.
+            workers: Number of worker processes.
+            initargs: Arguments of init_worker.
+    """
+    with open(log_file, 'a') as log, concurrent.futures.ProcessPoolExecutor(
+            workers, initializer=init_worker, initargs=initargs) as executor:
+
+        def submit(key, params):
+            best = best_trial(trials)
+            future = executor.submit(evaluate, params, best['accuracy'] if best else None)
+            running[future] = (key, params)
+
+        running = {}
+        queue = list(pending)
+        # Keep just one trial per worker queued, so every new trial prunes against the latest best one
+        while queue and len(running) < workers:
+            submit(*queue.pop(0))
+
+        while running:
+            done, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                key, params = running.pop(future)
+                trial = {'key': key, 'params': params, **future.result()}
+                trials.append(trial)
+                log.write(json.dumps(trial) + '\n')
+                log.flush()
+                print(f"[{len(trials)}/{len(trials) + len(running) + len(queue)}] {trial['status']:<8} "
+                      f"accuracy={trial['accuracy']:.4f} logloss={trial['logloss']:.4f} "
+                      f"rounds={trial['num_boost_round']} ({trial['seconds']:.1f} s) {params}")
+                if queue:
+                    submit(*queue.pop(0))
+
+
+def run(dataset_file=DATASET_FILENAME, num_trials=NUM_TRIALS, workers=None, threads=THREADS_PER_TRIAL, folds=K_FOLDS,
+        log_file=TRIAL_LOG_FILENAME, output_file=BEST_PARAMS_FILENAME, seed=RANDOM_SEED):
+    """
+        Runs the search.
+
+        Args:
+            dataset_file: Dataset of LandmarksProcessor (or a CSV file).
+            num_trials: Number of configurations to evaluate, including the logged ones.
+            workers: Number of trials evaluated concurrently, None for cores // threads.
+            threads: XGBoost threads of each trial.
+            folds: Number of cross-validation folds.
+            log_file: JSONL trial log, read to skip evaluated configurations and appended to.
+            output_file: JSON file the best parameters are written to.
+            seed: Seed of the candidate sampling and the fold split.
+    """
+    if workers is None:
+        workers = max(1, (os.cpu_count() or 1) // threads)
+
+    # Only the training part of TrainerXGB's split is searched on, its test set stays held out
+    features, _, labels, _, _, schema = load_training_data(dataset_file)
+    features = np.ascontiguousarray(features, dtype=np.float32)
+    labels = labels - labels.min()
+    num_classes = int(labels.max()) + 1
+    print(f"Feature schema: {schema.name} ({schema.num_features} features), {len(features)} training rows")
+
+    digest = dataset_digest(features, labels)
+    logged = load_trial_log(log_file)
+    trials = []
+    pending = []
+    for params in sample_candidates(num_trials, seed):
+        key = trial_key(params, folds, seed, digest)
+        if key in logged:
+            trials.append(logged[key])
+        else:
+            pending.append((key, params))
+    if pending:
+        print(f"{len(trials)} trials in {log_file}, evaluating {len(pending)} with {workers} workers x {threads} threads")
+        evaluate_pending(pending, trials, log_file, workers,
+                         initargs=(features, labels, num_classes, folds, seed, threads))
+    else:
+        print(f"All {len(trials)} trials are in {log_file}, nothing to evaluate")
+
+    best = best_trial(trials)
+    if best is None:
+        print("No trial finished")
+        return
+
+    ranked = sorted((trial for trial in trials if trial['status'] == 'complete'),
+                    key=lambda trial: (trial['accuracy'], -trial['logloss']), reverse=True)
+    print(f"Pruned trials: {sum(trial['status'] == 'pruned' for trial in trials)}")
+    print("Best trials:")
+    for trial in ranked[:5]:
+        print(f"  accuracy={trial['accuracy']:.4f} logloss={trial['logloss']:.4f} "
+              f"rounds={trial['num_boost_round']} {trial['params']}")
+
+    with open(output_file, 'w') as f:
+        json.dump({**best['params'], 'num_boost_round': best['num_boost_round']}, f, indent=2)
+    print(f"Best parameters written to {output_file}, train with: python TrainerXGB.py --params {output_file}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--dataset', default=DATASET_FILENAME, help=f"Dataset file (default: {DATASET_FILENAME})")
+    parser.add_argument('--trials', type=int, default=NUM_TRIALS, help=f"Number of configurations (default: {NUM_TRIALS})")
+    parser.add_argument('--workers', type=int, default=None, help="Concurrent trials (default: cores // threads)")
+    parser.add_argument('--threads', type=int, default=THREADS_PER_TRIAL,
+                        help=f"XGBoost threads per trial (default: {THREADS_PER_TRIAL})")
+    parser.add_argument('--folds', type=int, default=K_FOLDS, help=f"Cross-validation folds (default: {K_FOLDS})")
+    parser.add_argument('--log', default=TRIAL_LOG_FILENAME, help=f"JSONL trial log (default: {TRIAL_LOG_FILENAME})")
+    parser.add_argument('--output', default=BEST_PARAMS_FILENAME,
+                        help=f"Best parameters JSON (default: {BEST_PARAMS_FILENAME})")
+    parser.add_argument('--seed', type=int, default=RANDOM_SEED, help=f"Random seed (default: {RANDOM_SEED})")
+    args = parser.parse_args()
+
+    run(args.dataset, args.trials, args.workers, args.threads, args.folds, args.log, args.output, args.seed)
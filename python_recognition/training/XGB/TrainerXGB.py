@@ -1,15 +1,34 @@
+import argparse
+import json
+import os
+import sys
+
 import numpy as np
 import xgboost as xgb
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from common.DatasetFormat import load_dataset, resolve_dataset
+from common.FeatureSchema import dataset_schema, save_model_schema
+from common.FlatTrees import check_parity, export_model
+
 
-DATASET_FILENAME = 'dataset.csv'
+DATASET_FILENAME = 'dataset.json'  # Binary dataset from LandmarksProcessor, falls back to a legacy 'dataset.csv'
 OUTPUT_XGBOOST_MODEL = 'model.xgb'
 RANDOM_SEED = 42
 TRAIN_SIZE = 0.75
 
-NUM_OF_FEATURES = 42
+# Default training parameters, --params (e.g. the best_params.json of SearchXGB) overrides them
+PARAMS = {
+    'max_depth': 6,
+    'eta': 0.1,
+    'subsample': 0.8,
+    'colsample_bytree': 0.8,
+}
+NUM_BOOST_ROUND = 500
+EARLY_STOPPING_ROUNDS = 20
+
 
 def create_confusion_matrix(pred_labels, top_pred):
     import pandas as pd
@@ -28,16 +47,55 @@ def create_confusion_matrix(pred_labels, top_pred):
     plt.show()
 
 
-def run():
-    data = np.loadtxt(DATASET_FILENAME, delimiter=',', dtype='float32', usecols=range(NUM_OF_FEATURES + 1))
-    features = data[:, 1:]
-    labels = data[:, 0].astype('int32')
+def load_training_data(dataset_file=DATASET_FILENAME):
+    """
+        Loads the dataset and splits it into the training and the held-out test part.
 
-    num_of_classes = len(set(labels))
+        Returns:
+            A tuple (features_train, features_test, labels_train, labels_test, label_names, schema).
+    """
+    dataset_file = resolve_dataset(dataset_file)
+    features, labels, label_names = load_dataset(dataset_file)
+    labels = labels.astype('int32')
+    schema = dataset_schema(dataset_file, features.shape[1])
 
     features_train, features_test, labels_train, labels_test = train_test_split(
         features, labels, train_size=TRAIN_SIZE, random_state=RANDOM_SEED
     )
+    return features_train, features_test, labels_train, labels_test, label_names, schema
+
+
+def make_params(num_of_classes, overrides=None):
+    """Returns the full XGBoost parameters: the objective, PARAMS and the overrides."""
+    params = {
+        'objective': 'multi:softprob',
+        'num_class': num_of_classes,
+        'eval_metric': 'mlogloss',
+        'seed': RANDOM_SEED,
+        **PARAMS,
+    }
+    params.update(overrides or {})
+    return params
+
+
+def load_params(path):
+    """
+        Reads training parameters from a JSON file.
+
+        Returns:
+            A tuple (params, num_boost_round), num_boost_round is NUM_BOOST_ROUND unless the file sets it.
+    """
+    with open(path) as f:
+        params = json.load(f)
+    num_boost_round = params.pop('num_boost_round', NUM_BOOST_ROUND)
+    return params, num_boost_round
+
+
+def run(params=None, num_boost_round=NUM_BOOST_ROUND):
+    features_train, features_test, labels_train, labels_test, label_names, schema = load_training_data()
+    print(f"Feature schema: {schema.name} ({schema.num_features} features)")
+
+    num_of_classes = len(set(labels_train) | set(labels_test))
 
     # Convert labels to 0-based index for XGBoost compatibility
     labels_train -= labels_train.min()
@@ -48,25 +106,17 @@ def run():
     dtest = xgb.DMatrix(features_test, label=labels_test)
 
     # Model parameters
-    params = {
-        'objective': 'multi:softprob',
-        'num_class': num_of_classes,
-        'eval_metric': 'mlogloss',
-        'seed': RANDOM_SEED,
-        'max_depth': 6,
-        'eta': 0.1,
-        'subsample': 0.8,
-        'colsample_bytree': 0.8,
-    }
+    params = make_params(num_of_classes, params)
+    print(f"Parameters: {params}, {num_boost_round} rounds")
 
     # Train the model
     evals = [(dtrain, 'train'), (dtest, 'eval')]
     model = xgb.train(
         params,
         dtrain,
-        num_boost_round=500,
+        num_boost_round=num_boost_round,
         evals=evals,
-        early_stopping_rounds=20,
+        early_stopping_rounds=EARLY_STOPPING_ROUNDS,
         verbose_eval=10
     )
 
@@ -87,5 +137,21 @@ def run():
 
     # Save the trained model
     model.save_model(OUTPUT_XGBOOST_MODEL)
+    save_model_schema(OUTPUT_XGBOOST_MODEL, schema, label_names)
+
+    # Export the flattened model for the 'xgb-flat' backend, it has to predict like the booster
+    flat_path, trees = export_model(OUTPUT_XGBOOST_MODEL, booster=model)
+    difference = check_parity(model, trees, features_test)
+    print(f"Flattened model saved to {flat_path} ({trees.num_trees} trees, max difference {difference:.1e})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Trains the XGBoost hand sign classifier.")
+    parser.add_argument('--params', default=None,
+                        help="JSON file with parameters overriding the defaults, e.g. best_params.json of SearchXGB.py")
+    args = parser.parse_args()
 
-run()
+    if args.params:
+        run(*load_params(args.params))
+    else:
+        run()